@@ -0,0 +1,123 @@
+import glob
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from dax_analyzer.pipeline import PipelineExplicacoes
+from pbix_tools.cache import carregar_pbix_com_cache
+from pbix_tools.model_index import ModelIndex
+from utils import gerar_hash_medida
+
+EXTENSOES_PBIX = (".pbix", ".pbit")
+
+# Quantidade máxima de chamadas simultâneas ao LLM, somando todos os arquivos do lote.
+MAX_EXPLICACOES_SIMULTANEAS = int(os.getenv("PBIX_LOTE_MAX_LLM", "4"))
+
+
+def expandir_entradas(entradas) -> list:
+    """Converte pastas, padrões glob e arquivos em uma lista ordenada de .pbix/.pbit."""
+    arquivos = set()
+    for entrada in entradas:
+        if os.path.isdir(entrada):
+            candidatos = glob.glob(os.path.join(entrada, "**", "*"), recursive=True)
+        else:
+            candidatos = glob.glob(entrada, recursive=True) or [entrada]
+        arquivos.update(
+            os.path.abspath(c) for c in candidatos
+            if os.path.isfile(c) and c.lower().endswith(EXTENSOES_PBIX)
+        )
+    return sorted(arquivos)
+
+
+def _carregar_arquivo(pbix_path):
+    """Extrai e indexa um arquivo. Executado nos processos do pool."""
+    conteudo = carregar_pbix_com_cache(pbix_path)
+    if not conteudo:
+        return {"arquivo": pbix_path, "erro": "Não foi possível carregar o modelo."}
+
+    indice = ModelIndex(conteudo["model"])
+    return {
+        "arquivo": pbix_path,
+        "hash": conteudo["hash"],
+        "tabelas": [{"nome": nome, "colunas": indice.nomes_colunas(nome)} for nome in indice.tabelas_por_nome],
+        "medidas": indice.medidas,
+    }
+
+
+def processar_lote(entradas, processos=None, max_explicacoes=MAX_EXPLICACOES_SIMULTANEAS,
+                   pasta_saida=os.path.join("outputs", "lote")):
+    """
+    Analisa vários .pbix de uma vez.
+
+    A extração e o parsing rodam num pool de processos; as explicações de
+    todos os arquivos vão para uma única fila com no máximo ``max_explicacoes``
+    chamadas simultâneas ao LLM. Medidas idênticas em arquivos diferentes
+    são explicadas uma só vez.
+    """
+    arquivos = expandir_entradas(entradas)
+    if not arquivos:
+        print("❌ Nenhum arquivo .pbix encontrado nas entradas informadas.")
+        return []
+
+    print(f"📦 {len(arquivos)} arquivos no lote.")
+    os.makedirs(pasta_saida, exist_ok=True)
+
+    carregados = []
+    explicacoes_medidas = {}
+    explicacoes_tabelas = {}
+
+    with ProcessPoolExecutor(max_workers=processos) as pool, \
+            PipelineExplicacoes(max_workers=max_explicacoes) as fila_llm:
+        futuros = [pool.submit(_carregar_arquivo, arquivo) for arquivo in arquivos]
+
+        # Enfileira as explicações assim que cada arquivo termina de ser lido.
+        for futuro in as_completed(futuros):
+            try:
+                resultado = futuro.result()
+            except Exception as e:
+                print(f"❌ Falha ao processar arquivo do lote: {e}")
+                continue
+            if "erro" in resultado:
+                print(f"❌ {resultado['arquivo']}: {resultado['erro']}")
+                carregados.append(resultado)
+                continue
+
+            print(f"📄 {os.path.basename(resultado['arquivo'])}: "
+                  f"{len(resultado['tabelas'])} tabelas, {len(resultado['medidas'])} medidas.")
+            for tabela in resultado["tabelas"]:
+                chave = (tabela["nome"], tuple(tabela["colunas"]))
+                if chave not in explicacoes_tabelas:
+                    explicacoes_tabelas[chave] = fila_llm.enviar_tabela(tabela["nome"], tabela["colunas"])
+            novas = {}
+            for medida in resultado["medidas"]:
+                chave = gerar_hash_medida(medida["nome"], medida["expressao"])
+                if chave not in explicacoes_medidas and chave not in novas:
+                    novas[chave] = medida
+            explicacoes_medidas.update(zip(novas, fila_llm.enviar_medidas(list(novas.values()))))
+            carregados.append(resultado)
+
+        resumo = []
+        for resultado in sorted(carregados, key=lambda r: r["arquivo"]):
+            if "erro" in resultado:
+                resumo.append({"arquivo": resultado["arquivo"], "erro": resultado["erro"]})
+                continue
+
+            tabelas = [
+                {**t, "explicacao": explicacoes_tabelas[(t["nome"], tuple(t["colunas"]))].result()}
+                for t in resultado["tabelas"]
+            ]
+            medidas = [
+                {**m, "explicacao": explicacoes_medidas[gerar_hash_medida(m["nome"], m["expressao"])].result()}
+                for m in resultado["medidas"]
+            ]
+
+            nome_base = os.path.splitext(os.path.basename(resultado["arquivo"]))[0]
+            output_path = os.path.join(pasta_saida, f"{nome_base}_{resultado['hash'][:8]}.json")
+            with open(output_path, "w", encoding="utf-8") as f:
+                json.dump({"tabelas": tabelas, "medidas": medidas}, f, indent=4, ensure_ascii=False)
+            print(f"💾 {resultado['arquivo']} → {output_path}")
+            resumo.append({"arquivo": resultado["arquivo"], "saida": output_path,
+                           "tabelas": len(tabelas), "medidas": len(medidas)})
+
+    print(f"✅ Lote concluído: {len(explicacoes_medidas)} medidas distintas explicadas.")
+    return resumo
@@ -0,0 +1,266 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+
+import ollama
+
+# Escolha do backend (``PBIX_LLM_BACKEND``): ollama, llamacpp, openai ou falso.
+BACKEND_PADRAO = os.getenv("PBIX_LLM_BACKEND", "ollama")
+MODELO_PADRAO = os.getenv("PBIX_LLM_MODELO", "mistral")
+# Por quanto tempo o Ollama mantém o modelo na memória após a última chamada.
+OLLAMA_KEEP_ALIVE = os.getenv("PBIX_LLM_KEEP_ALIVE", "30m")
+LLAMACPP_MODELO = os.getenv("PBIX_LLAMACPP_MODELO", "")
+LLAMACPP_CONTEXTO = int(os.getenv("PBIX_LLAMACPP_CONTEXTO", "4096"))
+OPENAI_BASE_URL = os.getenv("PBIX_OPENAI_BASE_URL", "http://localhost:8000/v1")
+OPENAI_API_KEY = os.getenv("PBIX_OPENAI_API_KEY", "sem-chave")
+FALSO_ATRASO = float(os.getenv("PBIX_LLM_FALSO_ATRASO", "0"))
+
+
+def _ler_limites(texto: str) -> dict:
+    limites = {}
+    for parte in filter(None, (p.strip() for p in texto.split(","))):
+        nome, _, valor = parte.partition("=")
+        if valor.strip().isdigit():
+            limites[nome.strip()] = int(valor)
+    return limites
+
+
+# Chamadas simultâneas por backend (``PBIX_LLM_LIMITES``, ex.: ``ollama=2,openai=8``).
+# Os semáforos são do processo: pipelines, CLI e UI disputam as mesmas vagas.
+LIMITES_POR_BACKEND = _ler_limites(os.getenv("PBIX_LLM_LIMITES", ""))
+_semaforos = {nome: threading.BoundedSemaphore(max(1, valor)) for nome, valor in LIMITES_POR_BACKEND.items()}
+
+
+class BackendLLM:
+    """
+    Interface comum dos modelos usados nas explicações.
+
+    ``conversar`` devolve a resposta inteira para um prompt (em JSON quando
+    ``formato_json``); ``conversar_stream`` devolve os trechos conforme são
+    gerados. ``nome`` identifica o backend em ``PBIX_LLM_LIMITES``.
+    """
+
+    nome = "base"
+
+    def __init__(self, modelo: str = MODELO_PADRAO):
+        self.modelo = modelo
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.modelo!r})"
+
+    def conversar(self, prompt: str, formato_json: bool = False) -> str:
+        raise NotImplementedError
+
+    def conversar_stream(self, prompt: str):
+        yield self.conversar(prompt)
+
+    def aquecer(self):
+        """Deixa o modelo pronto para a primeira chamada real (por padrão, nada a fazer)."""
+
+
+class BackendOllama(BackendLLM):
+    """
+    Servidor Ollama local.
+
+    Usa um único ``ollama.Client`` (e, com ele, um pool de conexões HTTP) para
+    todas as chamadas, e pede ao servidor que mantenha o modelo carregado por
+    ``keep_alive`` entre elas.
+    """
+
+    nome = "ollama"
+
+    def __init__(self, modelo: str = MODELO_PADRAO, host: str | None = None, keep_alive: str = OLLAMA_KEEP_ALIVE):
+        super().__init__(modelo)
+        self.keep_alive = keep_alive
+        self.cliente = ollama.Client(host=host)
+
+    def conversar(self, prompt: str, formato_json: bool = False) -> str:
+        resposta = self.cliente.chat(
+            model=self.modelo,
+            messages=[{"role": "user", "content": prompt}],
+            format="json" if formato_json else None,
+            keep_alive=self.keep_alive,
+        )
+        return resposta["message"]["content"].strip()
+
+    def conversar_stream(self, prompt: str):
+        for parte in self.cliente.chat(
+            model=self.modelo, messages=[{"role": "user", "content": prompt}], stream=True, keep_alive=self.keep_alive
+        ):
+            trecho = parte["message"]["content"]
+            if trecho:
+                yield trecho
+
+    def aquecer(self):
+        # Um generate sem prompt só carrega o modelo na memória.
+        self.cliente.generate(model=self.modelo, keep_alive=self.keep_alive)
+
+
+class BackendLlamaCpp(BackendLLM):
+    """
+    Modelo GGUF carregado no próprio processo com ``llama-cpp-python``.
+
+    O modelo é carregado uma vez, no construtor, e reaproveitado em todas as
+    chamadas, sem HTTP nem serialização. ``Llama`` não aceita chamadas
+    simultâneas, então elas são feitas uma de cada vez.
+    """
+
+    nome = "llamacpp"
+
+    def __init__(self, caminho_modelo: str = LLAMACPP_MODELO, contexto: int = LLAMACPP_CONTEXTO):
+        if not caminho_modelo:
+            raise ValueError("Informe o arquivo .gguf do modelo em PBIX_LLAMACPP_MODELO.")
+        from llama_cpp import Llama
+
+        super().__init__(os.path.basename(caminho_modelo))
+        self.llm = Llama(model_path=caminho_modelo, n_ctx=contexto, verbose=False)
+        self._trava = threading.Lock()
+
+    def conversar(self, prompt: str, formato_json: bool = False) -> str:
+        with self._trava:
+            resposta = self.llm.create_chat_completion(
+                messages=[{"role": "user", "content": prompt}],
+                response_format={"type": "json_object"} if formato_json else None,
+            )
+        return resposta["choices"][0]["message"]["content"].strip()
+
+    def conversar_stream(self, prompt: str):
+        with self._trava:
+            for parte in self.llm.create_chat_completion(messages=[{"role": "user", "content": prompt}], stream=True):
+                trecho = parte["choices"][0]["delta"].get("content")
+                if trecho:
+                    yield trecho
+
+
+class BackendOpenAI(BackendLLM):
+    """Servidor local compatível com a API da OpenAI (vLLM, llama.cpp server, LM Studio...)."""
+
+    nome = "openai"
+
+    def __init__(self, modelo: str = MODELO_PADRAO, base_url: str = OPENAI_BASE_URL, api_key: str = OPENAI_API_KEY):
+        from openai import OpenAI
+
+        super().__init__(modelo)
+        self.cliente = OpenAI(base_url=base_url, api_key=api_key)
+
+    def conversar(self, prompt: str, formato_json: bool = False) -> str:
+        resposta = self.cliente.chat.completions.create(
+            model=self.modelo,
+            messages=[{"role": "user", "content": prompt}],
+            **({"response_format": {"type": "json_object"}} if formato_json else {}),
+        )
+        return (resposta.choices[0].message.content or "").strip()
+
+    def conversar_stream(self, prompt: str):
+        for parte in self.cliente.chat.completions.create(
+            model=self.modelo, messages=[{"role": "user", "content": prompt}], stream=True
+        ):
+            trecho = parte.choices[0].delta.content if parte.choices else None
+            if trecho:
+                yield trecho
+
+
+class BackendFalso(BackendLLM):
+    """
+    Backend determinístico, sem modelo: a mesma entrada gera sempre a mesma resposta.
+
+    Serve para testes e para medir o pipeline; ``atraso`` (segundos por
+    chamada) simula a latência de um modelo real.
+    """
+
+    nome = "falso"
+    _NOMES = re.compile(r"^(?:\[(\d+)\] )?Nome da (?:Medida|Tabela): (.*)$", re.MULTILINE)
+
+    def __init__(self, modelo: str = "falso", atraso: float = FALSO_ATRASO):
+        super().__init__(modelo)
+        self.atraso = atraso
+        self.chamadas = 0
+
+    def _explicacao(self, nome: str, prompt: str) -> str:
+        resumo = hashlib.blake2b(prompt.encode("utf-8"), digest_size=4).hexdigest()
+        return f"Explicação simulada de {nome} ({resumo})."
+
+    def conversar(self, prompt: str, formato_json: bool = False) -> str:
+        self.chamadas += 1
+        if self.atraso:
+            time.sleep(self.atraso)
+        nomes = self._NOMES.findall(prompt)
+        if formato_json:
+            return json.dumps({"explicacoes": [
+                {"id": int(identificador), "explicacao": self._explicacao(nome.strip(), prompt)}
+                for identificador, nome in nomes if identificador
+            ]}, ensure_ascii=False)
+        nome = nomes[0][1].strip() if nomes else "prompt"
+        return self._explicacao(nome, prompt)
+
+    def conversar_stream(self, prompt: str):
+        for i, palavra in enumerate(self.conversar(prompt).split(" ")):
+            yield palavra if i == 0 else " " + palavra
+
+
+BACKENDS = {
+    "ollama": BackendOllama,
+    "llamacpp": BackendLlamaCpp,
+    "openai": BackendOpenAI,
+    "falso": BackendFalso,
+}
+
+
+_instancias = {}
+_trava_instancias = threading.Lock()
+
+
+@contextmanager
+def limite_de_chamadas(backend: BackendLLM):
+    """Ocupa, durante o bloco, uma vaga do limite de ``PBIX_LLM_LIMITES`` do backend (se houver)."""
+    semaforo = _semaforos.get(backend.nome)
+    if semaforo is None:
+        yield
+        return
+    with semaforo:
+        yield
+
+
+def obter_backend(nome: str | None = None) -> BackendLLM:
+    """
+    Instância compartilhada do backend ``nome`` (padrão: ``PBIX_LLM_BACKEND``).
+
+    Uma por processo, para que o modelo do llama.cpp e os clientes HTTP sejam
+    reaproveitados entre chamadas.
+    """
+    nome = (nome or BACKEND_PADRAO).lower()
+    if nome not in BACKENDS:
+        raise ValueError(f"Backend de LLM desconhecido: {nome!r} (opções: {', '.join(BACKENDS)})")
+    with _trava_instancias:
+        if nome not in _instancias:
+            _instancias[nome] = BACKENDS[nome]()
+        return _instancias[nome]
+
+
+def aquecer_backend(nome: str | None = None) -> bool:
+    """
+    Carrega o modelo do backend antes da primeira explicação.
+
+    Feito em segundo plano na inicialização da CLI e da UI, o carregamento
+    corre em paralelo com a extração do .pbix. Falhas só são avisadas: a
+    primeira chamada real tentará de novo.
+    """
+    inicio = time.perf_counter()
+    try:
+        backend = obter_backend(nome)
+        backend.aquecer()
+    except Exception as e:
+        print(f"⚠️ Não foi possível pré-carregar o modelo: {e}")
+        return False
+    print(f"🔥 Modelo {backend.modelo} ({backend.nome}) pronto em {time.perf_counter() - inicio:.1f}s.")
+    return True
+
+
+def aquecer_em_segundo_plano(nome: str | None = None) -> threading.Thread:
+    tarefa = threading.Thread(target=aquecer_backend, args=(nome,), name="aquecimento-llm", daemon=True)
+    tarefa.start()
+    return tarefa
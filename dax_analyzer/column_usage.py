@@ -0,0 +1,150 @@
+import pandas as pd
+
+from dax_analyzer.lexer import PADRAO_REFERENCIAS_NOMEADAS
+from pbix_tools.model_index import coluna_interna
+
+# Origens de uso de uma coluna, na ordem em que aparecem no resultado.
+ORIGENS = ["medidas", "relacionamentos", "visuais", "modelo"]
+
+
+def _texto(valor) -> str:
+    if isinstance(valor, list):
+        return "\n".join(map(str, valor))
+    return str(valor) if valor is not None else ""
+
+
+def _sem_delimitadores(serie: pd.Series, abre: str, fecha: str, escape: str) -> pd.Series:
+    """Remove aspas/colchetes das pontas e desfaz o escape (``''`` ou ``]]``)."""
+    delimitada = serie.str.startswith(abre, na=False)
+    limpa = serie.where(~delimitada, serie.str[1:-1].str.replace(escape, fecha, regex=False))
+    return limpa
+
+
+def montar_colunas(tabelas: list) -> pd.DataFrame:
+    """Colunas do modelo em formato colunar: ``tabela, coluna, oculta, calculada``."""
+    linhas = [
+        (t.get("name", "Desconhecida"), c.get("name"), bool(c.get("isHidden", False)), bool(c.get("expression")))
+        for t in tabelas for c in t.get("columns", [])
+        if c.get("name") and not coluna_interna(c)
+    ]
+    return pd.DataFrame(linhas, columns=["tabela", "coluna", "oculta", "calculada"])
+
+
+def referencias_em_expressoes(expressoes: pd.DataFrame) -> pd.DataFrame:
+    """
+    Extrai ``tabela[coluna]`` e ``[nome]`` de uma coluna ``expressao`` de uma vez (``str.extractall``).
+
+    Usa as mesmas regras do lexer: o que está em comentários e strings é ignorado.
+    Retorna ``tabela_origem, tabela, nome`` com ``tabela`` vazia em ``[nome]``.
+    """
+    if expressoes.empty:
+        return pd.DataFrame(columns=["tabela_origem", "tabela", "nome"])
+    encontrados = expressoes["expressao"].str.extractall(PADRAO_REFERENCIAS_NOMEADAS).dropna(subset=["nome"])
+    encontrados = encontrados.droplevel("match")
+    encontrados["tabela_origem"] = expressoes["tabela"].reindex(encontrados.index).to_numpy()
+    encontrados["nome"] = _sem_delimitadores(encontrados["nome"], "[", "]", "]]")
+    encontrados["tabela"] = _sem_delimitadores(encontrados["tabela"].fillna(""), "'", "'", "''")
+    return encontrados.reset_index(drop=True)[["tabela_origem", "tabela", "nome"]]
+
+
+def _usos_por_expressao(colunas: pd.DataFrame, refs: pd.DataFrame, nomes_medidas: set) -> pd.DataFrame:
+    """Liga as referências às colunas; ``[nome]`` sem tabela casa com a coluna de mesmo nome em qualquer tabela."""
+    refs = refs.assign(chave_tabela=refs["tabela"].str.lower(), chave_nome=refs["nome"].str.lower())
+    qualificadas = refs[refs["chave_tabela"] != ""]
+    # ``[nome]`` que é uma medida não é coluna; o resto pode ser coluna em contexto de linha.
+    soltas = refs[(refs["chave_tabela"] == "") & ~refs["chave_nome"].isin(nomes_medidas)]
+
+    usos = pd.concat([
+        colunas.merge(qualificadas[["chave_tabela", "chave_nome"]], on=["chave_tabela", "chave_nome"]),
+        colunas.merge(soltas[["chave_nome"]], on="chave_nome"),
+    ])
+    return usos[["chave_tabela", "chave_nome"]]
+
+
+def analisar_uso_colunas(tabelas: list, relacionamentos=(), medidas=None, visuais=None) -> pd.DataFrame:
+    """
+    Cruza as colunas do modelo com tudo que as usa e indica as que ninguém usa.
+
+    ``tabelas`` é a lista de tabelas do modelo (como em ``carregar_tabelas_modelo``
+    ou ``ModelIndex.tabelas``); sem ``medidas``, usa as medidas dessas tabelas.
+    ``visuais`` é o ``IndiceVisuais`` do relatório. Além de medidas,
+    relacionamentos e visuais, conta como uso do próprio modelo: colunas
+    calculadas, ``sortByColumn`` e níveis de hierarquia.
+
+    Retorna um DataFrame ``tabela, coluna, oculta, calculada, <uma contagem por
+    origem>, usos, usada``, com uma linha por coluna.
+    """
+    colunas = montar_colunas(tabelas)
+    colunas["chave_tabela"] = colunas["tabela"].str.lower()
+    colunas["chave_nome"] = colunas["coluna"].str.lower()
+
+    if medidas is None:
+        medidas = [
+            {"tabela": t.get("name"), "nome": m.get("name", ""), "expressao": _texto(m.get("expression", ""))}
+            for t in tabelas for m in t.get("measures", [])
+        ]
+    nomes_medidas = {str(m.get("nome", "")).lower() for m in medidas}
+    df_medidas = pd.DataFrame(
+        [(m.get("tabela"), str(m.get("expressao", ""))) for m in medidas], columns=["tabela", "expressao"]
+    )
+    df_calculadas = pd.DataFrame(
+        [(t.get("name"), _texto(c.get("expression"))) for t in tabelas for c in t.get("columns", []) if c.get("expression")],
+        columns=["tabela", "expressao"],
+    )
+
+    refs_medidas = referencias_em_expressoes(df_medidas)
+    refs_calculadas = referencias_em_expressoes(df_calculadas)
+    # Dentro de uma coluna calculada, ``[nome]`` se refere à própria tabela.
+    refs_calculadas["tabela"] = refs_calculadas["tabela"].where(refs_calculadas["tabela"] != "", refs_calculadas["tabela_origem"])
+
+    estruturais = [
+        (t.get("name"), c["sortByColumn"]) for t in tabelas for c in t.get("columns", []) if c.get("sortByColumn")
+    ] + [
+        (t.get("name"), nivel.get("column"))
+        for t in tabelas for h in t.get("hierarchies", []) for nivel in h.get("levels", []) if nivel.get("column")
+    ]
+    pontas = [
+        (r.get(f"{lado}Table"), r.get(f"{lado}Column"))
+        for r in relacionamentos for lado in ("from", "to") if r.get(f"{lado}Column")
+    ]
+    em_visuais = [(tabela, nome) for _, _, tipo, tabela, nome in (visuais.referencias if visuais else []) if tipo == "coluna"]
+
+    def pares(lista):
+        df = pd.DataFrame(lista, columns=["tabela", "nome"]).dropna()
+        return pd.DataFrame({"chave_tabela": df["tabela"].str.lower(), "chave_nome": df["nome"].str.lower()})
+
+    usos = pd.concat([
+        _usos_por_expressao(colunas, refs_medidas, nomes_medidas).assign(origem="medidas"),
+        pares(pontas).assign(origem="relacionamentos"),
+        pares(em_visuais).assign(origem="visuais"),
+        pd.concat([
+            _usos_por_expressao(colunas, refs_calculadas, nomes_medidas),
+            pares(estruturais),
+        ]).assign(origem="modelo"),
+    ])
+
+    contagens = (
+        usos.groupby(["chave_tabela", "chave_nome", "origem"]).size()
+        .unstack("origem").reindex(columns=ORIGENS).fillna(0).astype(int)
+    )
+    resultado = colunas.merge(contagens, left_on=["chave_tabela", "chave_nome"], right_index=True, how="left")
+    resultado[ORIGENS] = resultado[ORIGENS].fillna(0).astype(int)
+    resultado["usos"] = resultado[ORIGENS].sum(axis=1)
+    resultado["usada"] = resultado["usos"] > 0
+    return resultado.drop(columns=["chave_tabela", "chave_nome"]).reset_index(drop=True)
+
+
+def colunas_nao_utilizadas(analise: pd.DataFrame) -> dict:
+    """
+    Resume a análise por tabela: ``{tabela: {"nao_utilizadas": [...], "ocultas_nao_utilizadas": [...]}}``.
+
+    Só aparecem as tabelas com ao menos uma coluna sem uso.
+    """
+    ociosas = analise[~analise["usada"]]
+    resumo = {}
+    for tabela, grupo in ociosas.groupby("tabela", sort=True):
+        resumo[tabela] = {
+            "nao_utilizadas": grupo["coluna"].tolist(),
+            "ocultas_nao_utilizadas": grupo.loc[grupo["oculta"], "coluna"].tolist(),
+        }
+    return resumo
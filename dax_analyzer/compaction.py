@@ -0,0 +1,137 @@
+import math
+import os
+
+from dax_analyzer.lexer import ABRE, CHAVES, COMENTARIO, ESPACO, FECHA, VIRGULA, tokenizar
+
+# Orçamento de tokens de um prompt (``PBIX_LLM_ORCAMENTO_TOKENS``). O padrão cabe
+# no contexto de 2048 tokens do Ollama com folga para a resposta.
+ORCAMENTO_TOKENS = int(os.getenv("PBIX_LLM_ORCAMENTO_TOKENS", "1536"))
+# Estimativa sem tokenizador: DAX tem muitos símbolos e nomes curtos, então fica
+# perto de 3,5 caracteres por token nos modelos mais usados.
+CARACTERES_POR_TOKEN = 3.5
+# Listas literais ({...}) com mais itens que isto são encurtadas no prompt.
+LIMITE_ITENS_LISTA = 6
+ITENS_MANTIDOS_LISTA = 3
+# Ao truncar, a parte do começo que é mantida (o resto vem do fim, com o RETURN).
+PROPORCAO_INICIO = 0.7
+
+_PONTUACAO = set("(),{}+-*/^&=<>!|;")
+# Pares que, colados, abririam um comentário e engoliriam o resto da expressão.
+_INICIOS_COMENTARIO = ("--", "//", "/*")
+
+
+def estimar_tokens(texto: str) -> int:
+    return math.ceil(len(texto or "") / CARACTERES_POR_TOKEN)
+
+
+def _abre_comentario(anterior: str, seguinte: str) -> bool:
+    return anterior[-1:] + seguinte[:1] in _INICIOS_COMENTARIO
+
+
+def _precisa_espaco(anterior: str, seguinte: str) -> bool:
+    # Espaço só separa dois trechos que grudariam (ex.: "VAR x", "RETURN 'T'[c]")
+    # ou que formariam um comentário (ex.: "1 - -2" não pode virar "1--2").
+    if _abre_comentario(anterior, seguinte):
+        return True
+    return anterior[-1] not in _PONTUACAO and seguinte[0] not in _PONTUACAO
+
+
+def _tokens_sem_ruido(expressao: str) -> list:
+    """``(tipo, valor, separador)``: tokens sem comentários; ``separador`` é o espaço que vinha antes."""
+    tokens = []
+    separador = ""
+    for tipo, valor, _ in tokenizar(expressao, incluir_espacos=True):
+        if tipo in (ESPACO, COMENTARIO):
+            separador = "\n" if "\n" in valor or separador == "\n" else " "
+            continue
+        tokens.append((tipo, valor, separador if tokens else ""))
+        separador = ""
+    return tokens
+
+
+def _fim_da_lista(tokens: list, inicio: int) -> tuple:
+    """Posição do ``}`` que fecha a lista aberta em ``inicio`` e as posições das vírgulas de primeiro nível."""
+    profundidade = 0
+    virgulas = []
+    for i in range(inicio, len(tokens)):
+        tipo, valor, _ = tokens[i]
+        if tipo == ABRE or (tipo == CHAVES and valor == "{"):
+            profundidade += 1
+        elif tipo == FECHA or tipo == CHAVES:
+            profundidade -= 1
+            if profundidade == 0:
+                return i, virgulas
+        elif tipo == VIRGULA and profundidade == 1:
+            virgulas.append(i)
+    return None, virgulas
+
+
+def _encolher_listas(tokens: list) -> list:
+    """Troca listas literais longas por seus primeiros itens e a contagem do restante."""
+    resultado = []
+    i = 0
+    while i < len(tokens):
+        tipo, valor, separador = tokens[i]
+        if tipo == CHAVES and valor == "{":
+            fim, virgulas = _fim_da_lista(tokens, i)
+            if fim is not None and len(virgulas) + 1 > LIMITE_ITENS_LISTA:
+                corte = virgulas[ITENS_MANTIDOS_LISTA - 1]
+                omitidos = len(virgulas) + 1 - ITENS_MANTIDOS_LISTA
+                resultado.extend(tokens[i:corte + 1])
+                resultado.append((COMENTARIO, f"… +{omitidos} itens", " "))
+                resultado.append(tokens[fim][:2] + ("",))
+                i = fim + 1
+                continue
+        resultado.append(tokens[i])
+        i += 1
+    return resultado
+
+
+def minificar_dax(expressao: str, encolher_listas: bool = True) -> str:
+    """
+    Versão enxuta de uma expressão DAX para mandar ao LLM.
+
+    Remove comentários (inclusive código comentado) e indentação, junta linhas
+    em branco e tira espaços desnecessários, mantendo as quebras de linha entre
+    instruções. Com ``encolher_listas``, listas literais longas (``{...}``, como
+    em ``IN { ... }``) ficam com os primeiros itens e um marcador ``… +N itens``.
+    """
+    tokens = _tokens_sem_ruido(str(expressao or ""))
+    if encolher_listas:
+        tokens = _encolher_listas(tokens)
+    partes = []
+    for _, valor, separador in tokens:
+        if separador == "\n":
+            partes.append("\n")
+        elif partes and (separador or _abre_comentario(partes[-1], valor)) and _precisa_espaco(partes[-1], valor):
+            partes.append(" ")
+        partes.append(valor)
+    return "".join(partes)
+
+
+def truncar_no_orcamento(texto: str, orcamento_tokens: int) -> str:
+    """
+    Corta ``texto`` para caber em ``orcamento_tokens``, mantendo o começo e o fim.
+
+    O trecho do meio é trocado por um marcador com o número de caracteres
+    omitidos; os cortes caem em quebras de linha sempre que possível, para não
+    partir uma instrução ao meio.
+    """
+    limite = int(max(orcamento_tokens, 1) * CARACTERES_POR_TOKEN)
+    if len(texto) <= limite:
+        return texto
+    tamanho_inicio = int(limite * PROPORCAO_INICIO)
+    tamanho_fim = limite - tamanho_inicio
+    inicio = texto[:tamanho_inicio]
+    if "\n" in inicio:
+        inicio = inicio[:inicio.rfind("\n")]
+    fim = texto[-tamanho_fim:] if tamanho_fim else ""
+    if "\n" in fim:
+        fim = fim[fim.find("\n") + 1:]
+    omitidos = len(texto) - len(inicio) - len(fim)
+    return f"{inicio}\n… ({omitidos} caracteres omitidos) …\n{fim}"
+
+
+def compactar_expressao(expressao: str, orcamento_tokens: int = ORCAMENTO_TOKENS) -> str:
+    """Minifica a expressão e, se ainda passar do orçamento, trunca o meio (``truncar_no_orcamento``)."""
+    return truncar_no_orcamento(minificar_dax(expressao), orcamento_tokens)
@@ -0,0 +1,100 @@
+from functools import lru_cache
+
+from dax_analyzer.lexer import (
+    PADRAO_FUNCAO,
+    PADRAO_PARENTESES,
+    PADRAO_RUIDO_OU_REFERENCIA,
+    PADRAO_VAR,
+    PALAVRAS_CHAVE,
+)
+
+ITERADORES = {
+    "SUMX", "AVERAGEX", "COUNTX", "COUNTAX", "MINX", "MAXX", "PRODUCTX", "MEDIANX",
+    "RANKX", "CONCATENATEX", "FILTER", "GENERATE", "GENERATEALL", "ADDCOLUMNS",
+    "SELECTCOLUMNS", "GEOMEANX", "STDEVX.P", "STDEVX.S", "VARX.P", "VARX.S",
+    "PERCENTILEX.INC", "PERCENTILEX.EXC",
+}
+MODIFICADORES_FILTRO = {
+    "ALL", "ALLEXCEPT", "ALLSELECTED", "ALLNOBLANKROW", "REMOVEFILTERS", "KEEPFILTERS",
+    "USERELATIONSHIP", "CROSSFILTER", "TREATAS",
+}
+FUNCOES_RELACIONAIS = {"RELATED", "RELATEDTABLE", "DISTINCT", "VALUES", "LOOKUPVALUE", "SUMMARIZE", "SUMMARIZECOLUMNS"}
+RAMIFICACOES = {"IF", "SWITCH", "IFERROR", "IF.EAGER"}
+
+LIMIAR_INTERMEDIARIA = 4
+LIMIAR_AVANCADA = 10
+
+
+@lru_cache(maxsize=200_000)
+def metricas_complexidade(expressao: str) -> dict:
+    """
+    Calcula métricas numéricas de uma expressão DAX.
+
+    Usa os padrões de varredura do lexer (mesmas regras de strings, comentários e
+    referências de ``tokenizar``) sem materializar tokens, e memoriza o resultado
+    por expressão: recalcular a cada rerun da UI é praticamente grátis.
+    """
+    # split alterna trechos de código e o grupo capturado (referência ou None para ruído).
+    partes = PADRAO_RUIDO_OU_REFERENCIA.split(expressao)
+    referencias = len(partes) // 2 - partes[1::2].count(None)
+    limpa = " ".join(partes[::2]) if len(partes) > 1 else expressao
+
+    funcoes = [nome for nome in map(str.upper, PADRAO_FUNCAO.findall(limpa)) if nome not in PALAVRAS_CHAVE]
+    iteradores = calculates = ramificacoes = modificadores = relacionais = 0
+    for nome in funcoes:
+        if nome in ITERADORES:
+            iteradores += 1
+        elif nome in ("CALCULATE", "CALCULATETABLE"):
+            calculates += 1
+        elif nome in RAMIFICACOES:
+            ramificacoes += 1
+        elif nome in MODIFICADORES_FILTRO:
+            modificadores += 1
+        elif nome in FUNCOES_RELACIONAIS:
+            relacionais += 1
+
+    profundidade = profundidade_maxima = 0
+    if funcoes or "(" in limpa:
+        for parentese in PADRAO_PARENTESES.findall(limpa):
+            if parentese == "(":
+                profundidade += 1
+                if profundidade > profundidade_maxima:
+                    profundidade_maxima = profundidade
+            else:
+                profundidade -= 1
+
+    return {
+        "profundidade": profundidade_maxima,
+        "funcoes": len(funcoes),
+        "iteradores": iteradores,
+        "calculates": calculates,
+        "variaveis": len(PADRAO_VAR.findall(limpa)),
+        "ramificacoes": ramificacoes,
+        "modificadores_filtro": modificadores,
+        "relacionais": relacionais,
+        "referencias": referencias,
+    }
+
+
+def pontuar_complexidade(metricas: dict) -> int:
+    """Combina as métricas em uma pontuação única."""
+    return (
+        3 * metricas["iteradores"]
+        + 2 * metricas["calculates"]
+        + 2 * metricas["variaveis"]
+        + 2 * metricas["ramificacoes"]
+        + metricas["modificadores_filtro"]
+        + metricas["relacionais"]
+        + max(0, metricas["profundidade"] - 2)
+    )
+
+
+def classificar_por_metricas(metricas: dict) -> str:
+    """Converte as métricas nas faixas usadas pela UI: Simples, Intermediária ou Avançada."""
+    pontuacao = pontuar_complexidade(metricas)
+    if metricas["variaveis"] or metricas["ramificacoes"] or pontuacao >= LIMIAR_AVANCADA:
+        return "Avançada"
+    if (metricas["calculates"] or metricas["iteradores"] or metricas["modificadores_filtro"]
+            or metricas["relacionais"] or pontuacao >= LIMIAR_INTERMEDIARIA):
+        return "Intermediária"
+    return "Simples"
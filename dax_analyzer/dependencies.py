@@ -0,0 +1,286 @@
+import heapq
+from collections import defaultdict
+
+from dax_analyzer.lexer import referencias
+
+
+def _chave(nome: str) -> str:
+    # Nomes em DAX não diferenciam maiúsculas de minúsculas.
+    return str(nome).strip().lower()
+
+
+class GrafoDependencias:
+    """
+    Grafo de dependências entre medidas, montado a partir das referências ``[Medida]``.
+
+    Uma aresta ``A -> B`` significa que a expressão de ``A`` usa ``B``. Além das
+    arestas diretas, o grafo mantém o fecho transitivo nos dois sentidos
+    (``dependencias(..., transitivas=True)`` e ``dependentes(..., transitivas=True)``),
+    atualizado incrementalmente a cada ``definir_medida``/``remover_medida``: as
+    consultas nunca percorrem o grafo de novo.
+
+    Referências ``[Nome]`` só viram arestas quando ``Nome`` é uma medida do grafo;
+    uma referência a uma medida ainda não definida fica pendente e é ligada assim
+    que ela aparecer. ``'Tabela'[Nome]`` só conta como medida se a tabela for a da
+    própria medida (caso contrário é uma coluna).
+    """
+
+    def __init__(self, medidas=None):
+        self.nomes = {}                          # chave -> nome original
+        self.tabelas = {}                        # chave -> tabela da medida
+        self._referencias = {}                   # chave -> {chave referenciada: tabelas citadas ou None}
+        self._diretas = defaultdict(set)         # chave -> medidas usadas diretamente
+        self._reversas = defaultdict(set)        # chave -> medidas que a usam diretamente
+        self._descendentes = defaultdict(set)    # fecho transitivo de _diretas
+        self._ancestrais = defaultdict(set)      # fecho transitivo de _reversas
+        self._pendentes = defaultdict(set)       # chave não definida -> quem a referencia
+        if medidas:
+            self._carregar(medidas)
+
+    @classmethod
+    def de_medidas(cls, medidas) -> "GrafoDependencias":
+        """Monta o grafo a partir da lista de ``parse_measures``/``ModelIndex.medidas``."""
+        return cls(medidas)
+
+    def __contains__(self, nome) -> bool:
+        return _chave(nome) in self.nomes
+
+    def __len__(self) -> int:
+        return len(self.nomes)
+
+    # === Atualização ===
+
+    def _resolver(self, chave: str) -> set:
+        resolvidas = set()
+        for alvo, tabelas in self._referencias[chave].items():
+            if alvo not in self.nomes:
+                continue
+            if tabelas is not None and _chave(self.tabelas.get(alvo) or "") not in tabelas:
+                continue
+            resolvidas.add(alvo)
+        return resolvidas
+
+    def _religar(self, chave: str, novas: set):
+        """Troca as arestas diretas de ``chave`` e corrige o fecho dos afetados."""
+        antigas = self._diretas.get(chave, set())
+        if novas == antigas:
+            return
+        for alvo in antigas - novas:
+            self._reversas[alvo].discard(chave)
+        for alvo in novas - antigas:
+            self._reversas[alvo].add(chave)
+        self._diretas[chave] = novas
+
+        # Mudar as arestas de saída de ``chave`` só altera os descendentes dela e de
+        # quem chega até ela; o fecho de qualquer outro nó continua válido.
+        afetados = {chave} | self._ancestrais[chave]
+        for no in afetados:
+            alcancaveis = set()
+            pilha = list(self._diretas.get(no, ()))
+            while pilha:
+                atual = pilha.pop()
+                if atual in alcancaveis:
+                    continue
+                alcancaveis.add(atual)
+                if atual in afetados:
+                    pilha.extend(self._diretas.get(atual, ()))
+                else:
+                    alcancaveis |= self._descendentes[atual]
+
+            anterior = self._descendentes[no]
+            for removido in anterior - alcancaveis:
+                self._ancestrais[removido].discard(no)
+            for adicionado in alcancaveis - anterior:
+                self._ancestrais[adicionado].add(no)
+            self._descendentes[no] = alcancaveis
+
+    def _registrar(self, nome: str, expressao: str, tabela: str | None) -> str:
+        chave = _chave(nome)
+        self.nomes[chave] = nome
+        self.tabelas[chave] = tabela
+        for alvo in self._referencias.get(chave, {}):
+            self._pendentes[alvo].discard(chave)
+        refs = {}
+        for tabela_ref, nome_ref in referencias(str(expressao or "")):
+            if nome_ref is not None:
+                alvo = _chave(nome_ref)
+                # Uma referência sem tabela prevalece sobre as qualificadas; destas,
+                # basta uma citar a tabela da medida (as demais são colunas homônimas).
+                if tabela_ref is None or (alvo in refs and refs[alvo] is None):
+                    refs[alvo] = None
+                else:
+                    refs.setdefault(alvo, set()).add(_chave(tabela_ref))
+        self._referencias[chave] = refs
+        return chave
+
+    def _carregar(self, medidas):
+        """Carga inicial: registra todas as medidas e calcula o fecho uma única vez."""
+        for medida in medidas:
+            self._registrar(medida.get("nome", "Sem nome"), medida.get("expressao", ""), medida.get("tabela"))
+        for chave, refs in self._referencias.items():
+            self._diretas[chave] = self._resolver(chave)
+            for alvo in self._diretas[chave]:
+                self._reversas[alvo].add(chave)
+            for alvo in refs:
+                if alvo not in self.nomes:
+                    self._pendentes[alvo].add(chave)
+
+        # Em ordem topológica, o fecho de cada medida é a união do fecho das que ela
+        # usa. As medidas em ciclos (ou que dependem deles) ficam no fim da ordem e
+        # são resolvidas por busca, aproveitando o fecho já calculado das demais.
+        calculadas = set()
+        for nome in self.ordem_topologica():
+            chave = _chave(nome)
+            alcancaveis = set()
+            pilha = list(self._diretas.get(chave, ()))
+            while pilha:
+                atual = pilha.pop()
+                if atual in alcancaveis:
+                    continue
+                alcancaveis.add(atual)
+                if atual in calculadas:
+                    alcancaveis |= self._descendentes[atual]
+                else:
+                    pilha.extend(self._diretas.get(atual, ()))
+            self._descendentes[chave] = alcancaveis
+            calculadas.add(chave)
+        for chave, alcancaveis in self._descendentes.items():
+            for alvo in alcancaveis:
+                self._ancestrais[alvo].add(chave)
+
+    def definir_medida(self, nome: str, expressao: str, tabela: str | None = None):
+        """Inclui ou atualiza uma medida, recalculando só a parte afetada do fecho."""
+        novo = _chave(nome) not in self.nomes
+        chave = self._registrar(nome, expressao, tabela)
+        for alvo in self._referencias[chave]:
+            if alvo not in self.nomes:
+                self._pendentes[alvo].add(chave)
+
+        self._religar(chave, self._resolver(chave))
+        if novo:
+            for origem in sorted(self._pendentes.pop(chave, ())):
+                self._religar(origem, self._resolver(origem))
+
+    def remover_medida(self, nome: str):
+        """Remove uma medida; quem a referenciava passa a ter a referência pendente."""
+        chave = _chave(nome)
+        if chave not in self.nomes:
+            return
+        self._religar(chave, set())
+        for alvo in self._referencias.pop(chave, {}):
+            self._pendentes[alvo].discard(chave)
+
+        origens = sorted(self._reversas.get(chave, ()))
+        del self.nomes[chave]
+        del self.tabelas[chave]
+        for origem in origens:
+            self._religar(origem, self._resolver(origem))
+            self._pendentes[chave].add(origem)
+
+        for indice in (self._diretas, self._reversas, self._descendentes, self._ancestrais):
+            indice.pop(chave, None)
+
+    # === Consultas ===
+
+    def _nomes(self, chaves) -> list:
+        return sorted((self.nomes[c] for c in chaves if c in self.nomes), key=str.lower)
+
+    def dependencias(self, nome: str, transitivas: bool = False) -> list:
+        """Medidas usadas por ``nome`` (diretamente ou, com ``transitivas``, em qualquer nível)."""
+        indice = self._descendentes if transitivas else self._diretas
+        return self._nomes(indice.get(_chave(nome), ()))
+
+    def dependentes(self, nome: str, transitivas: bool = False) -> list:
+        """Medidas que usam ``nome`` — "quem depende desta medida?"."""
+        indice = self._ancestrais if transitivas else self._reversas
+        return self._nomes(indice.get(_chave(nome), ()))
+
+    def alcancaveis(self, nomes) -> set:
+        """Chaves (minúsculas) de ``nomes`` e de tudo de que elas dependem, em qualquer nível."""
+        chaves = {_chave(n) for n in nomes}
+        for chave in list(chaves):
+            chaves |= self._descendentes.get(chave, set())
+        return chaves
+
+    def referencias_pendentes(self) -> dict:
+        """Referências ``[Nome]`` que não correspondem a nenhuma medida, por medida de origem."""
+        pendentes = defaultdict(list)
+        for alvo, origens in self._pendentes.items():
+            for origem in origens:
+                pendentes[self.nomes[origem]].append(alvo)
+        return dict(pendentes)
+
+    def ciclos(self) -> list:
+        """
+        Dependências circulares, como listas de medidas (algoritmo de Tarjan, iterativo).
+
+        Cada ciclo é um componente fortemente conexo com mais de uma medida, ou uma
+        medida que referencia a si mesma.
+        """
+        indice, menor, na_pilha = {}, {}, set()
+        pilha, ciclos, contador = [], [], 0
+
+        for inicio in sorted(self.nomes):
+            if inicio in indice:
+                continue
+            trabalho = [(inicio, iter(sorted(self._diretas.get(inicio, ()))))]
+            indice[inicio] = menor[inicio] = contador
+            contador += 1
+            pilha.append(inicio)
+            na_pilha.add(inicio)
+
+            while trabalho:
+                no, vizinhos = trabalho[-1]
+                avancou = False
+                for vizinho in vizinhos:
+                    if vizinho not in indice:
+                        indice[vizinho] = menor[vizinho] = contador
+                        contador += 1
+                        pilha.append(vizinho)
+                        na_pilha.add(vizinho)
+                        trabalho.append((vizinho, iter(sorted(self._diretas.get(vizinho, ())))))
+                        avancou = True
+                        break
+                    if vizinho in na_pilha:
+                        menor[no] = min(menor[no], indice[vizinho])
+                if avancou:
+                    continue
+
+                trabalho.pop()
+                if trabalho:
+                    pai = trabalho[-1][0]
+                    menor[pai] = min(menor[pai], menor[no])
+                if menor[no] == indice[no]:
+                    componente = []
+                    while True:
+                        membro = pilha.pop()
+                        na_pilha.discard(membro)
+                        componente.append(membro)
+                        if membro == no:
+                            break
+                    if len(componente) > 1 or no in self._diretas.get(no, ()):
+                        ciclos.append(self._nomes(componente))
+        return ciclos
+
+    def ordem_topologica(self) -> list:
+        """
+        Medidas ordenadas de forma que cada uma venha depois das que ela usa (Kahn).
+
+        Medidas presas em ciclos não têm ordem válida; elas vão para o fim da lista,
+        em ordem alfabética, para que quem percorre o grafo ainda visite todas.
+        """
+        grau = {chave: len(self._diretas.get(chave, ())) for chave in self.nomes}
+        prontas = [c for c, g in grau.items() if g == 0]
+        heapq.heapify(prontas)
+        ordem = []
+        while prontas:
+            chave = heapq.heappop(prontas)
+            ordem.append(chave)
+            for origem in self._reversas.get(chave, ()):
+                grau[origem] -= 1
+                if grau[origem] == 0:
+                    heapq.heappush(prontas, origem)
+
+        vistas = set(ordem)
+        ordem += sorted(c for c in self.nomes if c not in vistas)
+        return [self.nomes[c] for c in ordem]
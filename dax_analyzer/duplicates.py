@@ -0,0 +1,169 @@
+import hashlib
+import re
+from collections import defaultdict
+from functools import lru_cache
+
+import numpy as np
+
+from dax_analyzer.lexer import PADRAO_TOKENS_SIGNIFICATIVOS
+
+# Parâmetros do MinHash/LSH: 16 faixas de 4 linhas tornam candidato quase todo
+# par com Jaccard >= 0,8 (e poucos abaixo de 0,5); a confirmação usa
+# ``LIMIAR_SIMILARIDADE`` sobre a assinatura inteira.
+NUM_PERMUTACOES = 64
+FAIXAS = 16
+TAMANHO_SHINGLE = 4
+LIMIAR_SIMILARIDADE = 0.8
+BLOCO_MEDIDAS = 1024
+
+# Permutações por multiplicação e deslocamento (a * x + b mod 2**64, 32 bits altos).
+_gerador = np.random.default_rng(20240607)
+_COEF_A = (_gerador.integers(0, 2**63 - 1, NUM_PERMUTACOES, dtype=np.uint64) | np.uint64(1))[:, None]
+_COEF_B = _gerador.integers(0, 2**63 - 1, NUM_PERMUTACOES, dtype=np.uint64)[:, None]
+_DESLOCAMENTO = np.uint64(32)
+
+_TABELA_ENTRE_ASPAS = re.compile(r"'((?:[^']|'')*)'")
+
+
+def _referencia_canonica(referencia: str) -> str:
+    """``'Tabela'[Nome]`` e ``Tabela[Nome]`` na mesma forma; ``''`` dentro das aspas vira ``'``."""
+    m = _TABELA_ENTRE_ASPAS.match(referencia)
+    if m:
+        referencia = m.group(1).replace("''", "'") + referencia[m.end():]
+    return referencia.upper()
+
+
+@lru_cache(maxsize=200_000)
+def normalizar_tokens(expressao: str) -> tuple:
+    """
+    Sequência de tokens canônica de uma expressão DAX.
+
+    Ignora espaços, quebras de linha e comentários; padroniza maiúsculas em
+    funções, palavras-chave e referências; e troca o nome de cada ``VAR`` por
+    um marcador posicional, para que renomear variáveis não mude o resultado.
+    Strings e números são mantidos como estão.
+    """
+    tokens = []
+    variaveis = {}
+    declarando = False
+    for string, referencia, identificador, outro in PADRAO_TOKENS_SIGNIFICATIVOS.findall(str(expressao or "")):
+        if identificador:
+            valor = identificador.upper()
+            if declarando:
+                variaveis.setdefault(valor, f"$v{len(variaveis)}")
+            tokens.append(variaveis.get(valor, valor))
+            declarando = valor == "VAR"
+            continue
+        if referencia:
+            tokens.append(_referencia_canonica(referencia))
+        elif string or outro:
+            tokens.append(string or outro)
+        else:
+            continue  # espaço ou comentário
+        declarando = False
+    return tuple(tokens)
+
+
+def impressao_digital(tokens) -> str:
+    """Hash da sequência normalizada: expressões equivalentes caem no mesmo balde."""
+    return hashlib.blake2b("\x1f".join(tokens).encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _hash_shingle(tokens) -> int:
+    # Digest estável: hash() de str é semeado por processo e mudaria as assinaturas a cada execução.
+    return int.from_bytes(hashlib.blake2b("\x1f".join(tokens).encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def _shingles(tokens: tuple) -> list:
+    if len(tokens) <= TAMANHO_SHINGLE:
+        return [_hash_shingle(tokens)]
+    return list({_hash_shingle(g) for g in zip(*(tokens[i:] for i in range(TAMANHO_SHINGLE)))})
+
+
+def assinaturas_minhash(lista_tokens: list) -> np.ndarray:
+    """
+    Assinaturas MinHash (``len(lista_tokens) x NUM_PERMUTACOES``) das sequências.
+
+    Os shingles de um bloco de medidas são concatenados e as permutações são
+    aplicadas de uma vez; ``np.minimum.reduceat`` tira o mínimo de cada medida.
+    """
+    assinaturas = np.empty((len(lista_tokens), NUM_PERMUTACOES), dtype=np.uint64)
+    for inicio in range(0, len(lista_tokens), BLOCO_MEDIDAS):
+        bloco = [_shingles(t) for t in lista_tokens[inicio:inicio + BLOCO_MEDIDAS]]
+        tamanhos = np.fromiter((len(s) for s in bloco), dtype=np.int64, count=len(bloco))
+        deslocamentos = np.concatenate(([0], np.cumsum(tamanhos)[:-1]))
+        hashes = np.fromiter((h for s in bloco for h in s), dtype=np.uint64, count=int(tamanhos.sum()))
+        permutados = (_COEF_A * hashes + _COEF_B) >> _DESLOCAMENTO
+        assinaturas[inicio:inicio + len(bloco)] = np.minimum.reduceat(permutados, deslocamentos, axis=1).T
+    return assinaturas
+
+
+def _raiz(pais: list, i: int) -> int:
+    while pais[i] != i:
+        pais[i] = pais[pais[i]]
+        i = pais[i]
+    return i
+
+
+def agrupar_duplicadas(medidas: list, limiar: float = LIMIAR_SIMILARIDADE) -> list:
+    """
+    Agrupa medidas duplicadas e quase duplicadas sem comparar todos os pares.
+
+    1. Medidas com a mesma impressão digital normalizada são idênticas.
+    2. Um representante de cada impressão recebe uma assinatura MinHash; as
+       faixas do LSH geram os pares candidatos, confirmados pela similaridade
+       de Jaccard estimada (>= ``limiar``) e unidos em grupos.
+
+    Retorna uma lista de grupos ``{"tipo": "identica" | "similar", "similaridade",
+    "medidas"}``, com os maiores grupos primeiro.
+    """
+    baldes = defaultdict(list)
+    tokens_por_impressao = {}
+    for medida in medidas:
+        tokens = normalizar_tokens(str(medida.get("expressao", "")))
+        if not tokens:
+            continue
+        impressao = impressao_digital(tokens)
+        baldes[impressao].append(medida)
+        tokens_por_impressao.setdefault(impressao, tokens)
+
+    impressoes = list(tokens_por_impressao)
+    assinaturas = assinaturas_minhash([tokens_por_impressao[i] for i in impressoes])
+
+    linhas = NUM_PERMUTACOES // FAIXAS
+    pais = list(range(len(impressoes)))
+    similaridade = {}
+    for faixa in range(FAIXAS):
+        # Cada faixa vira uma chave inteira; ordenar as chaves agrupa os candidatos.
+        chaves = (assinaturas[:, faixa * linhas:(faixa + 1) * linhas] * _COEF_A[:linhas, 0]).sum(axis=1)
+        ordem = np.argsort(chaves, kind="stable")
+        chaves = chaves[ordem]
+        inicios = np.flatnonzero(np.r_[True, chaves[1:] != chaves[:-1]])
+        fins = np.r_[inicios[1:], len(chaves)]
+        for inicio, fim in zip(inicios[fins - inicios > 1], fins[fins - inicios > 1]):
+            membros = ordem[inicio:fim]
+            i = int(membros[0])
+            estimadas = (assinaturas[membros[1:]] == assinaturas[i]).mean(axis=1)
+            for j, estimada in zip(membros[1:].tolist(), estimadas.tolist()):
+                raiz_i, raiz_j = _raiz(pais, i), _raiz(pais, j)
+                if raiz_i == raiz_j or estimada < limiar:
+                    continue
+                pais[raiz_j] = raiz_i
+                similaridade[raiz_i] = min(similaridade.get(raiz_i, 1.0), similaridade.get(raiz_j, 1.0), estimada)
+
+    componentes = defaultdict(list)
+    for i in range(len(impressoes)):
+        componentes[_raiz(pais, i)].append(i)
+
+    grupos = []
+    for raiz, membros in componentes.items():
+        medidas_grupo = [m for i in membros for m in baldes[impressoes[i]]]
+        if len(medidas_grupo) < 2:
+            continue
+        grupos.append({
+            "tipo": "identica" if len(membros) == 1 else "similar",
+            "similaridade": 1.0 if len(membros) == 1 else round(similaridade.get(raiz, 1.0), 2),
+            "medidas": medidas_grupo,
+        })
+    grupos.sort(key=lambda g: (-len(g["medidas"]), g["tipo"]))
+    return grupos
@@ -1,50 +1,197 @@
-import ollama
+import json
 
-def explicar_medida_dax(nome, expressao_dax, modelo="mistral"):
+from dax_analyzer.backends import limite_de_chamadas, obter_backend
+from dax_analyzer.compaction import (
+    CARACTERES_POR_TOKEN, ORCAMENTO_TOKENS, compactar_expressao, estimar_tokens, minificar_dax,
+)
+from dax_analyzer.rules import explicar_por_regras
+
+ERRO_EXPLICACAO = "Erro ao gerar explicação."
+LIMITE_RESUMO = 160
+# Mesmo com muitas dependências, a expressão nunca fica com menos que isto.
+ORCAMENTO_MINIMO_EXPRESSAO = 256
+
+def resumir_explicacao(explicacao, limite=LIMITE_RESUMO):
     """
-    Usa o modelo local via Ollama para explicar uma medida DAX.
+    Versão curta de uma explicação já gerada, para citar a medida no prompt de
+    quem a usa: a primeira frase, cortada em ``limite`` caracteres.
     """
-    prompt = f"""
+    texto = " ".join(str(explicacao or "").split())
+    if not texto or texto.startswith(ERRO_EXPLICACAO[:-1]):
+        return ""
+    frase, ponto, _ = texto.partition(". ")
+    texto = frase + "." if ponto else texto
+    if len(texto) <= limite:
+        return texto
+    return texto[:limite].rsplit(" ", 1)[0] + "…"
+
+def _limitar_itens(itens, orcamento_tokens, separador="\n"):
+    """Os primeiros ``itens`` que cabem em ``orcamento_tokens``, e quantos ficaram de fora."""
+    mantidos = []
+    tamanho = 0
+    for item in itens:
+        tamanho += len(item) + len(separador)
+        if mantidos and tamanho / CARACTERES_POR_TOKEN > orcamento_tokens:
+            break
+        mantidos.append(item)
+    return mantidos, len(itens) - len(mantidos)
+
+def _prompt_medida(nome, expressao_dax, dependencias=None, orcamento_tokens=ORCAMENTO_TOKENS):
+    """
+    Monta o prompt de uma medida dentro de ``orcamento_tokens`` (estimados).
+
+    A expressão vai minificada (``compactar_expressao``); os resumos das
+    dependências ocupam no máximo um quarto do orçamento, e a expressão fica com
+    o que sobrar, truncada no meio se ainda assim não couber.
+    """
+    contexto = ""
+    if dependencias:
+        linhas, restantes = _limitar_itens(
+            [f"- [{dependencia}]: {resumo}" for dependencia, resumo in dependencias.items()], orcamento_tokens // 4
+        )
+        if restantes:
+            linhas.append(f"- … e mais {restantes} medidas")
+        linhas = "\n".join(linhas)
+        contexto = f"""
+Medidas usadas por ela (já explicadas; não é preciso explicá-las de novo):
+{linhas}
+"""
+
+    def montar(expressao):
+        return f"""
 Você é um especialista em Power BI e DAX. Recebe uma medida DAX e deve explicar de forma clara e simples o que ela faz.
 
 Nome da Medida: {nome}
 Expressão DAX:
-{expressao_dax}
-
+{expressao}
+{contexto}
 Explique de forma clara e objetiva, como se estivesse ensinando alguém que já entende de Power BI e lógica de programação, mas sem deixar de falar sobre a lógica base da medida.
 Lembre que você tem um limite de 300 caracteres para dizer essa explicação.
 """
 
+    restante = max(orcamento_tokens - estimar_tokens(montar("")), ORCAMENTO_MINIMO_EXPRESSAO)
+    return montar(compactar_expressao(expressao_dax, restante))
+
+def explicar_medida_dax(nome, expressao_dax, backend=None, dependencias=None):
+    """
+    Usa o modelo local (``backend``, padrão: ``obter_backend()``) para explicar uma medida DAX.
+
+    ``dependencias`` (``{medida: resumo}``) descreve as medidas referenciadas
+    que já foram explicadas, para que o modelo não precise adivinhá-las.
+    Medidas triviais (``explicar_por_regras``) são explicadas sem chamar o modelo.
+    """
+    por_regras = explicar_por_regras(nome, expressao_dax)
+    if por_regras:
+        return por_regras
+    backend = backend or obter_backend()
     try:
-        resposta = ollama.chat(
-            model=modelo,
-            messages=[
-                {"role": "user", "content": prompt}
-            ]
-        )
-        return resposta['message']['content'].strip()
+        with limite_de_chamadas(backend):
+            return backend.conversar(_prompt_medida(nome, expressao_dax, dependencias))
+
+    except Exception as e:
+        print(f"Erro ao tentar gerar explicação com o modelo {backend.modelo}: {e}")
+        return ERRO_EXPLICACAO
+
+def explicar_medida_dax_stream(nome, expressao_dax, backend=None):
+    """
+    Como ``explicar_medida_dax``, mas devolve os trechos da explicação à medida
+    que o modelo os gera, para exibir o texto sem esperar o fim.
+    """
+    por_regras = explicar_por_regras(nome, expressao_dax)
+    if por_regras:
+        yield por_regras
+        return
+    backend = backend or obter_backend()
+    try:
+        with limite_de_chamadas(backend):
+            yield from backend.conversar_stream(_prompt_medida(nome, expressao_dax))
+    except Exception as e:
+        print(f"Erro ao tentar gerar explicação com o modelo {backend.modelo}: {e}")
+        yield ERRO_EXPLICACAO
+
+def _ler_explicacoes_em_lote(conteudo: str, total: int) -> dict:
+    """Lê ``{"explicacoes": [{"id": n, "explicacao": "..."}]}`` e devolve ``{n: texto}`` para os ids válidos."""
+    dados = json.loads(conteudo)
+    itens = dados.get("explicacoes", []) if isinstance(dados, dict) else dados
+    explicacoes = {}
+    for item in itens if isinstance(itens, list) else []:
+        if not isinstance(item, dict):
+            continue
+        try:
+            identificador = int(item.get("id"))
+        except (TypeError, ValueError):
+            continue
+        texto = item.get("explicacao")
+        if 1 <= identificador <= total and isinstance(texto, str) and texto.strip():
+            explicacoes[identificador] = texto.strip()
+    return explicacoes
+
+
+def explicar_medidas_em_lote(medidas, backend=None):
+    """
+    Explica várias medidas (dicts com ``nome`` e ``expressao``) em uma única chamada.
+
+    O modelo devolve um JSON com uma explicação por id; as medidas que faltarem
+    na resposta, ou todas, se ela vier malformada, são explicadas uma a uma
+    com ``explicar_medida_dax``. Retorna as explicações na ordem da entrada.
+    """
+    backend = backend or obter_backend()
+    # As triviais saem das regras; só o restante vai ao modelo.
+    por_regras = [explicar_por_regras(m["nome"], m["expressao"]) for m in medidas]
+    if any(por_regras):
+        restantes = [m for m, explicacao in zip(medidas, por_regras) if not explicacao]
+        explicadas = iter(explicar_medidas_em_lote(restantes, backend) if restantes else [])
+        return [explicacao or next(explicadas) for explicacao in por_regras]
 
+    if len(medidas) == 1:
+        return [explicar_medida_dax(medidas[0]["nome"], medidas[0]["expressao"], backend)]
+
+    blocos = "\n\n".join(
+        f"[{i}] Nome da Medida: {m['nome']}\nExpressão DAX:\n{minificar_dax(m['expressao'])}"
+        for i, m in enumerate(medidas, start=1)
+    )
+    prompt = f"""
+Você é um especialista em Power BI e DAX. Recebe {len(medidas)} medidas DAX numeradas e deve explicar, de forma clara e simples, o que cada uma faz.
+
+{blocos}
+
+Explique cada medida de forma clara e objetiva, como se estivesse ensinando alguém que já entende de Power BI e lógica de programação, mas sem deixar de falar sobre a lógica base da medida.
+Cada explicação tem um limite de 300 caracteres.
+Responda apenas com JSON no formato {{"explicacoes": [{{"id": 1, "explicacao": "..."}}]}}, com um item para cada id.
+"""
+
+    explicacoes = {}
+    try:
+        with limite_de_chamadas(backend):
+            resposta = backend.conversar(prompt, formato_json=True)
+        explicacoes = _ler_explicacoes_em_lote(resposta, len(medidas))
     except Exception as e:
-        print(f"Erro ao tentar gerar explicação com o modelo {modelo}: {e}")
-        return "Erro ao gerar explicação."
+        print(f"Erro ao explicar lote de {len(medidas)} medidas com o modelo {backend.modelo}: {e}")
+
+    return [
+        explicacoes.get(i) or explicar_medida_dax(m["nome"], m["expressao"], backend)
+        for i, m in enumerate(medidas, start=1)
+    ]
 
-def explicar_tabela(nome_tabela, colunas, modelo="mistral"):
+def explicar_tabela(nome_tabela, colunas, backend=None):
     """Gera uma breve descrição do papel de uma tabela em um modelo."""
 
+    # Tabelas muito largas: as colunas que couberem em metade do orçamento, e a contagem do resto.
+    nomes_colunas, restantes = _limitar_itens([str(c) for c in colunas], ORCAMENTO_TOKENS // 2, ", ")
+    lista_colunas = ", ".join(nomes_colunas) + (f" … e mais {restantes} colunas" if restantes else "")
+
     prompt = f"""
 Você é um especialista em modelagem de dados. Analise o nome da tabela e a lista
 de colunas a seguir e descreva, em até 300 caracteres, qual é o propósito dessa
 tabela dentro de um modelo do Power BI.
 
 Nome da Tabela: {nome_tabela}
-Colunas: {', '.join(colunas)}
+Colunas: {lista_colunas}
 """
 
+    backend = backend or obter_backend()
     try:
-        resposta = ollama.chat(
-            model=modelo,
-            messages=[{"role": "user", "content": prompt}]
-        )
-        return resposta["message"]["content"].strip()
+        with limite_de_chamadas(backend):
+            return backend.conversar(prompt)
     except Exception as e:
         return f"Erro ao gerar explicação: {e}"
@@ -0,0 +1,130 @@
+import re
+from collections import namedtuple
+
+Token = namedtuple("Token", ["tipo", "valor", "pos"])
+
+# Tipos de token produzidos por ``tokenizar``.
+COMENTARIO = "comentario"
+STRING = "string"
+REF_QUALIFICADA = "ref_qualificada"   # 'Tabela'[Coluna] ou Tabela[Coluna]
+TABELA = "tabela"                     # 'Tabela'
+REFERENCIA = "referencia"             # [Medida] ou [Coluna]
+NUMERO = "numero"
+FUNCAO = "funcao"                     # identificador seguido de "("
+PALAVRA_CHAVE = "palavra_chave"
+IDENTIFICADOR = "identificador"
+OPERADOR = "operador"
+ABRE = "abre"
+FECHA = "fecha"
+VIRGULA = "virgula"
+CHAVES = "chaves"                     # { e } de construtores de tabela
+ESPACO = "espaco"
+OUTRO = "outro"
+
+PALAVRAS_CHAVE = {"VAR", "RETURN", "IN", "NOT", "AND", "OR", "DEFINE", "EVALUATE", "MEASURE", "ORDER", "BY", "ASC", "DESC"}
+
+_NOME_ENTRE_ASPAS = r"'(?:[^']|'')*'"
+_COLCHETES = r"\[(?:[^\]]|\]\])*\]"
+_COMENTARIO = r"//[^\n]*|--[^\n]*|/\*.*?(?:\*/|\Z)"
+_STRING = r'"(?:[^"]|"")*"?'
+_IDENTIFICADOR = r"[A-Za-z_][\w.]*"
+# Palavra-chave inteira (``RETURN``, mas não ``RETURNS`` nem ``VAR.P``): seguida de
+# "(" continua sendo palavra-chave, e não chamada de função.
+_PALAVRA_CHAVE = rf"(?i:(?:{'|'.join(sorted(PALAVRAS_CHAVE))})(?![\w.]))"
+
+_PADRAO = re.compile(
+    rf"""
+    (?P<{ESPACO}>\s+)
+    |(?P<{COMENTARIO}>{_COMENTARIO})
+    |(?P<{STRING}>{_STRING})
+    |(?P<{REF_QUALIFICADA}>(?:{_NOME_ENTRE_ASPAS}|{_IDENTIFICADOR}){_COLCHETES})
+    |(?P<{TABELA}>{_NOME_ENTRE_ASPAS})
+    |(?P<{REFERENCIA}>{_COLCHETES})
+    |(?P<{NUMERO}>(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)
+    |(?P<{FUNCAO}>(?!{_PALAVRA_CHAVE}){_IDENTIFICADOR}(?=\s*\())
+    |(?P<{IDENTIFICADOR}>{_IDENTIFICADOR})
+    |(?P<{OPERADOR}>&&|\|\||<=|>=|<>|==|[-+*/^&=<>!])
+    |(?P<{ABRE}>\()
+    |(?P<{FECHA}>\))
+    |(?P<{VIRGULA}>,)
+    |(?P<{CHAVES}>[{{}}])
+    |(?P<{OUTRO}>.)
+    """,
+    re.S | re.X,
+)
+
+_PARTES_QUALIFICADA = re.compile(rf"({_NOME_ENTRE_ASPAS}|{_IDENTIFICADOR})({_COLCHETES})", re.S)
+
+# Padrões de varredura rápida, com as mesmas regras do tokenizador, para quem só
+# precisa de contagens (ex.: métricas de complexidade) sem materializar tokens.
+# Todas as alternativas começam por um caractere fixo (/ - " ' [), o que mantém a
+# varredura rápida; o grupo captura só o trecho entre colchetes de cada referência.
+PADRAO_RUIDO_OU_REFERENCIA = re.compile(rf"{_COMENTARIO}|{_STRING}|{_NOME_ENTRE_ASPAS}|({_COLCHETES})", re.S)
+# Também captura palavras-chave antes de "(" (``RETURN (``, ``NOT (``): quem conta
+# funções descarta as de ``PALAVRAS_CHAVE``, o que sai bem mais barato que excluí-las
+# no padrão, já que ele é tentado em toda posição do texto.
+PADRAO_FUNCAO = re.compile(rf"({_IDENTIFICADOR})\s*\(")
+# VAR como palavra-chave; VAR.P( e VAR.S( são funções (variância), não variáveis.
+PADRAO_VAR = re.compile(r"(?<![\w.])VAR\b(?!\s*\.)", re.I)
+PADRAO_PARENTESES = re.compile(r"[()]")
+# Referências com tabela opcional em grupos nomeados, para ``Series.str.extractall``:
+# comentários, strings e nomes de tabela soltos casam sem preencher os grupos.
+PADRAO_REFERENCIAS_NOMEADAS = (
+    rf"(?s:{_COMENTARIO})|{_STRING}"
+    rf"|(?P<tabela>{_NOME_ENTRE_ASPAS}|{_IDENTIFICADOR})?(?P<nome>{_COLCHETES})"
+    rf"|{_NOME_ENTRE_ASPAS}"
+)
+# Tokens significativos já classificados em grupos (string, referência, identificador,
+# demais); espaços e comentários casam sem grupo nenhum e podem ser descartados.
+PADRAO_TOKENS_SIGNIFICATIVOS = re.compile(
+    rf"\s+|{_COMENTARIO}|({_STRING})"
+    rf"|((?:{_NOME_ENTRE_ASPAS}|{_IDENTIFICADOR})?{_COLCHETES}|{_NOME_ENTRE_ASPAS})"
+    rf"|({_IDENTIFICADOR})"
+    rf"|((?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?|&&|\|\||<=|>=|<>|==|\S)",
+    re.S,
+)
+
+
+def tokenizar(expressao: str, incluir_espacos: bool = False) -> list:
+    """
+    Quebra uma expressão DAX em tokens numa única passada.
+
+    Trata strings (com ``""`` escapado), comentários (``//``, ``--``, ``/* */``),
+    referências ``'Tabela'[Coluna]``/``Tabela[Coluna]`` e ``[Medida]``, chamadas
+    de função e palavras-chave como ``VAR``/``RETURN``.
+    """
+    tokens = []
+    for m in _PADRAO.finditer(expressao or ""):
+        tipo = m.lastgroup
+        if tipo == ESPACO and not incluir_espacos:
+            continue
+        valor = m.group()
+        if tipo == IDENTIFICADOR and valor.upper() in PALAVRAS_CHAVE:
+            tipo = PALAVRA_CHAVE
+        tokens.append(Token(tipo, valor, m.start()))
+    return tokens
+
+
+def _sem_aspas(nome: str) -> str:
+    return nome[1:-1].replace("''", "'") if nome.startswith("'") else nome
+
+
+def _sem_colchetes(nome: str) -> str:
+    return nome[1:-1].replace("]]", "]")
+
+
+def partes_referencia(token: Token):
+    """Retorna ``(tabela, nome)`` de um token de referência; ``tabela`` é ``None`` em ``[Nome]``."""
+    if token.tipo == REFERENCIA:
+        return None, _sem_colchetes(token.valor)
+    if token.tipo == REF_QUALIFICADA:
+        tabela, nome = _PARTES_QUALIFICADA.fullmatch(token.valor).groups()
+        return _sem_aspas(tabela), _sem_colchetes(nome)
+    if token.tipo == TABELA:
+        return _sem_aspas(token.valor), None
+    return None, None
+
+
+def referencias(expressao: str) -> list:
+    """Lista as referências ``(tabela, nome)`` da expressão, na ordem em que aparecem."""
+    return [partes_referencia(t) for t in tokenizar(expressao) if t.tipo in (REFERENCIA, REF_QUALIFICADA)]
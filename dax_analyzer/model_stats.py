@@ -0,0 +1,99 @@
+from functools import cached_property
+
+import pandas as pd
+
+from dax_analyzer.complexity import classificar_por_metricas, metricas_complexidade
+from dax_analyzer.lexer import PADRAO_FUNCAO, PADRAO_RUIDO_OU_REFERENCIA, PALAVRAS_CHAVE
+
+FAIXAS_COMPLEXIDADE = ["Simples", "Intermediária", "Avançada"]
+FAIXAS_COMPRIMENTO = [0, 50, 100, 250, 500, 1000, 2500, float("inf")]
+ROTULOS_COMPRIMENTO = ["até 50", "51–100", "101–250", "251–500", "501–1000", "1001–2500", "> 2500"]
+
+
+class EstatisticasModelo:
+    """
+    Estatísticas do modelo calculadas sobre DataFrames colunares.
+
+    Medidas, tabelas e colunas são carregadas uma única vez; cada agregado é
+    calculado com operações vetorizadas na primeira consulta e guardado na
+    instância. A UI mantém uma instância por hash do modelo.
+
+    ``medidas_em_uso`` são os nomes (minúsculos) das medidas usadas pelos
+    visuais, direta ou indiretamente; sem ele, a taxa de uso fica indisponível.
+    """
+
+    def __init__(self, indice, medidas_em_uso=None):
+        self.medidas = pd.DataFrame(indice.medidas, columns=["tabela", "nome", "expressao"])
+        self.medidas["expressao"] = self.medidas["expressao"].fillna("").astype(str)
+        self.medidas["comprimento"] = self.medidas["expressao"].str.len()
+        # Classificação memorizada por expressão (lru_cache), só então vetorizada em categoria.
+        self.medidas["complexidade"] = pd.Categorical(
+            [classificar_por_metricas(metricas_complexidade(e)) for e in self.medidas["expressao"]],
+            categories=FAIXAS_COMPLEXIDADE,
+        )
+        self.medidas["em_uso"] = (
+            self.medidas["nome"].str.lower().isin(medidas_em_uso) if medidas_em_uso is not None else pd.NA
+        )
+
+        self.colunas = pd.DataFrame(indice.colunas, columns=["tabela", "nome", "tipo", "oculta", "expressao"])
+        self.colunas["calculada"] = self.colunas["expressao"].notna()
+        self.tabelas = pd.DataFrame(
+            [(t.get("name", "Desconhecida"), bool(t.get("isHidden", False))) for t in indice.tabelas],
+            columns=["tabela", "oculta"],
+        )
+        self.relacionamentos = len(indice.relacionamentos)
+        self.uso_disponivel = medidas_em_uso is not None
+
+    @cached_property
+    def totais(self) -> dict:
+        return {
+            "tabelas": len(self.tabelas),
+            "medidas": len(self.medidas),
+            "colunas": len(self.colunas),
+            "colunas_calculadas": int(self.colunas["calculada"].sum()),
+            "relacionamentos": self.relacionamentos,
+            "taxa_colunas_ocultas": float(self.colunas["oculta"].mean()) if len(self.colunas) else 0.0,
+            "taxa_medidas_em_uso": (
+                float(self.medidas["em_uso"].astype(bool).mean()) if self.uso_disponivel and len(self.medidas) else None
+            ),
+        }
+
+    @cached_property
+    def por_tabela(self) -> pd.DataFrame:
+        """Uma linha por tabela: medidas, colunas, proporção de ocultas e de medidas em uso."""
+        medidas = self.medidas.groupby("tabela").agg(
+            medidas=("nome", "size"),
+            comprimento_medio=("comprimento", "mean"),
+        )
+        if self.uso_disponivel:
+            medidas["taxa_em_uso"] = self.medidas.assign(em_uso=self.medidas["em_uso"].astype(bool)).groupby("tabela")["em_uso"].mean()
+        colunas = self.colunas.groupby("tabela").agg(
+            colunas=("nome", "size"),
+            taxa_ocultas=("oculta", "mean"),
+            calculadas=("calculada", "sum"),
+        )
+        resumo = self.tabelas.set_index("tabela").join([medidas, colunas], how="left")
+        contagens = ["medidas", "colunas", "calculadas"]
+        resumo[contagens] = resumo[contagens].fillna(0).astype(int)
+        return resumo.reset_index().sort_values(["medidas", "colunas"], ascending=False, ignore_index=True)
+
+    @cached_property
+    def histograma_complexidade(self) -> pd.Series:
+        return self.medidas["complexidade"].value_counts(sort=False)
+
+    @cached_property
+    def distribuicao_comprimento(self) -> pd.Series:
+        """Quantidade de medidas por faixa de comprimento da expressão (em caracteres)."""
+        faixas = pd.cut(self.medidas["comprimento"], FAIXAS_COMPRIMENTO, labels=ROTULOS_COMPRIMENTO, include_lowest=True)
+        return faixas.value_counts(sort=False)
+
+    @cached_property
+    def resumo_comprimento(self) -> pd.Series:
+        return self.medidas["comprimento"].describe(percentiles=[0.5, 0.9, 0.99])
+
+    @cached_property
+    def frequencia_funcoes(self) -> pd.Series:
+        """Chamadas de função DAX em todas as medidas, ignorando strings, comentários e referências."""
+        limpas = self.medidas["expressao"].str.replace(PADRAO_RUIDO_OU_REFERENCIA, " ", regex=True)
+        funcoes = limpas.str.findall(PADRAO_FUNCAO).explode().dropna().str.upper()
+        return funcoes[~funcoes.isin(PALAVRAS_CHAVE)].value_counts()
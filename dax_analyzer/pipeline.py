@@ -0,0 +1,234 @@
+import os
+import threading
+from collections import defaultdict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from dax_analyzer.backends import BackendLLM, obter_backend
+from dax_analyzer.dependencies import GrafoDependencias
+from dax_analyzer.explain import (
+    ERRO_EXPLICACAO, explicar_medida_dax, explicar_medidas_em_lote, explicar_tabela, resumir_explicacao,
+)
+from dax_analyzer.rules import explicar_por_regras
+
+# Chamadas simultâneas ao LLM por pipeline (``PBIX_LLM_WORKERS``). O limite por
+# backend (``PBIX_LLM_LIMITES``) vale para o processo todo; ver ``backends``.
+MAX_WORKERS = int(os.getenv("PBIX_LLM_WORKERS", "4"))
+
+# Medidas de até ``LIMITE_MEDIDA_CURTA`` caracteres vão ao LLM em lotes de
+# ``PBIX_LLM_LOTE`` por chamada; 1 desliga o agrupamento.
+TAMANHO_LOTE = int(os.getenv("PBIX_LLM_LOTE", "8"))
+LIMITE_MEDIDA_CURTA = 300
+
+
+class PipelineExplicacoes:
+    """
+    Envia explicações de medidas e tabelas ao LLM por um pool limitado de threads.
+
+    ``max_workers`` limita as chamadas em andamento deste pipeline; o limite
+    por backend de ``PBIX_LLM_LIMITES`` é aplicado a cada chamada ao modelo e
+    compartilhado com os demais pipelines, a CLI e a UI. Pedidos idênticos
+    ainda em andamento são compartilhados, e medidas curtas enviadas juntas
+    são agrupadas em lotes de ``tamanho_lote`` por chamada. Medidas triviais
+    são explicadas na hora, por regras, sem ocupar o pool
+    (``explicadas_por_regras`` conta quantas). Os métodos ``explicar_*`` devolvem
+    os resultados na ordem da entrada, qualquer que seja a ordem de conclusão.
+    """
+
+    def __init__(self, max_workers: int = MAX_WORKERS, backend: BackendLLM | None = None,
+                 tamanho_lote: int = TAMANHO_LOTE):
+        self.backend = backend or obter_backend()
+        self.tamanho_lote = tamanho_lote
+        self.explicadas_por_regras = 0
+        self._pool = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="explicacao")
+        self._em_andamento = {}
+        # Reentrante: o callback de um futuro já concluído roda com a trava em posse.
+        self._trava = threading.RLock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.encerrar()
+
+    def encerrar(self, esperar: bool = True):
+        self._pool.shutdown(wait=esperar, cancel_futures=not esperar)
+
+    def _executar(self, funcao, *args, **kwargs):
+        return funcao(*args, backend=self.backend, **kwargs)
+
+    def _enviar(self, chave, funcao, *args, **kwargs) -> Future:
+        with self._trava:
+            futuro = self._em_andamento.get(chave)
+            if futuro is None:
+                futuro = self._pool.submit(self._executar, funcao, *args, **kwargs)
+                self._registrar(chave, futuro)
+            return futuro
+
+    def _registrar(self, chave, futuro: Future):
+        self._em_andamento[chave] = futuro
+        futuro.add_done_callback(lambda _, c=chave: self._esquecer(c))
+
+    def _esquecer(self, chave):
+        with self._trava:
+            self._em_andamento.pop(chave, None)
+
+    def enviar_medida(self, nome: str, expressao: str, dependencias: dict | None = None) -> Future:
+        """
+        Agenda a explicação de uma medida e devolve o ``Future`` com o texto.
+
+        ``dependencias`` (``{medida: resumo}``) é repassado a ``explicar_medida_dax``.
+        """
+        resolvido = self._por_regras(nome, expressao)
+        if resolvido:
+            return resolvido
+        return self._enviar(
+            ("medida", nome, expressao), explicar_medida_dax, nome, expressao, dependencias=dependencias
+        )
+
+    def enviar_medidas(self, medidas: list) -> list:
+        """
+        Agenda várias medidas (dicts com ``nome`` e ``expressao``) e devolve um
+        ``Future`` por medida, na mesma ordem.
+
+        As curtas são agrupadas em lotes de ``tamanho_lote`` por chamada ao LLM;
+        as longas, e as que já estão em andamento, seguem como em ``enviar_medida``.
+        """
+        futuros = []
+        lote = []
+        with self._trava:
+            for medida in medidas:
+                nome, expressao = medida["nome"], medida["expressao"]
+                chave = ("medida", nome, expressao)
+                resolvido = self._por_regras(nome, expressao)
+                if resolvido:
+                    futuros.append(resolvido)
+                    continue
+                if self.tamanho_lote <= 1 or chave in self._em_andamento or len(expressao) > LIMITE_MEDIDA_CURTA:
+                    futuros.append(self.enviar_medida(nome, expressao))
+                    continue
+                futuro = Future()
+                self._registrar(chave, futuro)
+                futuros.append(futuro)
+                lote.append((medida, futuro))
+                if len(lote) == self.tamanho_lote:
+                    self._enviar_lote(lote)
+                    lote = []
+            if lote:
+                self._enviar_lote(lote)
+        return futuros
+
+    def _por_regras(self, nome: str, expressao: str) -> Future | None:
+        """``Future`` já concluído com a explicação por regras, ou ``None`` se a medida precisa do LLM."""
+        explicacao = explicar_por_regras(nome, expressao)
+        if not explicacao:
+            return None
+        with self._trava:
+            self.explicadas_por_regras += 1
+        futuro = Future()
+        futuro.set_result(explicacao)
+        return futuro
+
+    def _enviar_lote(self, lote: list):
+        """Uma chamada para o lote; o resultado é repartido entre os ``Future`` de cada medida."""
+        medidas = [medida for medida, _ in lote]
+        futuros = [futuro for _, futuro in lote]
+
+        def repartir(futuro_lote):
+            try:
+                explicacoes = futuro_lote.result()
+            except Exception as e:
+                for futuro in futuros:
+                    futuro.set_exception(e)
+                return
+            for futuro, explicacao in zip(futuros, explicacoes):
+                futuro.set_result(explicacao)
+
+        self._pool.submit(self._executar, explicar_medidas_em_lote, medidas).add_done_callback(repartir)
+
+    def enviar_tabela(self, nome: str, colunas: list) -> Future:
+        return self._enviar(("tabela", nome, tuple(colunas)), explicar_tabela, nome, colunas)
+
+    @staticmethod
+    def _coletar(futuros: list, itens: list, ao_concluir=None, posicoes=None) -> list:
+        resultados = []
+        for i, (item, futuro) in enumerate(zip(itens, futuros)):
+            try:
+                resultado = futuro.result()
+            except Exception as e:
+                print(f"Erro ao gerar explicação: {e}")
+                resultado = ERRO_EXPLICACAO
+            resultados.append(resultado)
+            if ao_concluir:
+                ao_concluir(posicoes[i] if posicoes else i, item, resultado)
+        return resultados
+
+    def explicar_medidas(self, medidas: list, ao_concluir=None) -> list:
+        """
+        Explica todas as medidas (dicts com ``nome`` e ``expressao``) em paralelo.
+
+        ``ao_concluir(i, medida, explicacao)`` é chamado na ordem da entrada,
+        assim que a explicação de cada medida (e das anteriores) fica pronta.
+        """
+        return self._coletar(self.enviar_medidas(medidas), medidas, ao_concluir)
+
+    def explicar_medidas_por_dependencia(self, medidas: list, grafo: GrafoDependencias | None = None,
+                                         ao_concluir=None, explicacoes_existentes: dict | None = None) -> list:
+        """
+        Explica as medidas das dependências para as dependentes.
+
+        As medidas são divididas em ondas pela profundidade no grafo (quem não usa
+        outras medidas fica na primeira); cada onda vai ao LLM em paralelo, e o
+        prompt de uma medida traz o resumo das explicações das medidas que ela
+        usa, em vez de deixar o modelo adivinhá-las. Medidas em ciclos ficam na
+        onda seguinte à de suas dependências fora do ciclo.
+
+        ``explicacoes_existentes`` (``{medida: explicação}``) traz explicações já
+        geradas de medidas fora de ``medidas``, para que uma medida reexplicada
+        sozinha tenha o mesmo contexto de dependências de uma execução completa.
+
+        ``ao_concluir(i, medida, explicacao)`` é chamado onda a onda, com ``i`` a
+        posição da medida na entrada; o retorno segue a ordem da entrada.
+        """
+        grafo = grafo or GrafoDependencias(medidas)
+        profundidade = {}
+        for nome in grafo.ordem_topologica():
+            usadas = (profundidade.get(d.lower()) for d in grafo.dependencias(nome))
+            profundidade[nome.lower()] = 1 + max((p for p in usadas if p is not None), default=-1)
+
+        ondas = defaultdict(list)
+        for i, medida in enumerate(medidas):
+            ondas[profundidade.get(str(medida["nome"]).lower(), 0)].append(i)
+
+        nomes = {str(m["nome"]).lower() for m in medidas}
+        resumos = {
+            str(nome).lower(): resumir_explicacao(explicacao)
+            for nome, explicacao in (explicacoes_existentes or {}).items() if str(nome).lower() not in nomes
+        }
+        resultados = [None] * len(medidas)
+        for onda in sorted(ondas):
+            posicoes = ondas[onda]
+            futuros = {}
+            sem_contexto = []
+            for i in posicoes:
+                medida = medidas[i]
+                contexto = {
+                    d: resumos[d.lower()] for d in grafo.dependencias(medida["nome"]) if resumos.get(d.lower())
+                }
+                if contexto:
+                    futuros[i] = self.enviar_medida(medida["nome"], medida["expressao"], contexto)
+                else:
+                    sem_contexto.append(i)
+            futuros.update(zip(sem_contexto, self.enviar_medidas([medidas[i] for i in sem_contexto])))
+
+            explicacoes = self._coletar(
+                [futuros[i] for i in posicoes], [medidas[i] for i in posicoes], ao_concluir, posicoes
+            )
+            for i, explicacao in zip(posicoes, explicacoes):
+                resultados[i] = explicacao
+                resumos[str(medidas[i]["nome"]).lower()] = resumir_explicacao(explicacao)
+        return resultados
+
+    def explicar_tabelas(self, tabelas: list, ao_concluir=None) -> list:
+        """Explica tabelas (dicts com ``nome`` e ``colunas``), como ``explicar_medidas``."""
+        futuros = [self.enviar_tabela(t["nome"], t["colunas"]) for t in tabelas]
+        return self._coletar(futuros, tabelas, ao_concluir)
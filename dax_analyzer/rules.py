@@ -0,0 +1,120 @@
+import os
+
+from dax_analyzer.lexer import (
+    ABRE, COMENTARIO, FECHA, FUNCAO, IDENTIFICADOR, NUMERO, OPERADOR, REF_QUALIFICADA, REFERENCIA, STRING, TABELA,
+    VIRGULA, partes_referencia, tokenizar,
+)
+
+# ``PBIX_LLM_REGRAS=0`` manda todas as medidas ao LLM, inclusive as triviais.
+USAR_REGRAS = os.getenv("PBIX_LLM_REGRAS", "1") != "0"
+
+AGREGACOES = {
+    "SUM": "Soma os valores da coluna {coluna}",
+    "AVERAGE": "Calcula a média dos valores da coluna {coluna}",
+    "MIN": "Retorna o menor valor da coluna {coluna}",
+    "MAX": "Retorna o maior valor da coluna {coluna}",
+    "COUNT": "Conta as linhas com valor (não vazio) na coluna {coluna}",
+    "COUNTA": "Conta as linhas com valor (não vazio) na coluna {coluna}",
+    "COUNTBLANK": "Conta as linhas em que a coluna {coluna} está vazia",
+    "DISTINCTCOUNT": "Conta os valores distintos da coluna {coluna}, incluindo o vazio se houver",
+    "DISTINCTCOUNTNOBLANK": "Conta os valores distintos da coluna {coluna}, ignorando o vazio",
+}
+OPERACOES = {
+    "+": "Soma {a} e {b}",
+    "-": "Subtrai {b} de {a}",
+    "*": "Multiplica {a} por {b}",
+    "/": "Divide {a} por {b} (com o operador /, que gera erro ou infinito se {b} for zero)",
+}
+SUFIXO_CONTEXTO = ", respeitando os filtros aplicados no relatório."
+
+# Forma dos tokens: cada um vira um símbolo genérico (os operandos) ou o próprio valor.
+_SIMBOLOS = {REF_QUALIFICADA: "COL", REFERENCIA: "REF", TABELA: "TAB", IDENTIFICADOR: "TAB",
+             NUMERO: "NUM", STRING: "STR", ABRE: "(", FECHA: ")", VIRGULA: ","}
+_OPERANDOS = {"COL", "REF", "TAB", "NUM", "STR"}
+
+
+def _descrever(token) -> str:
+    tabela, nome = partes_referencia(token)
+    if token.tipo == REF_QUALIFICADA:
+        return f"{nome} da tabela {tabela}"
+    if token.tipo == REFERENCIA:
+        return f"[{nome}]"
+    if token.tipo in (TABELA, IDENTIFICADOR):
+        return tabela or token.valor
+    return token.valor
+
+
+def _forma(tokens) -> tuple:
+    forma = []
+    for token in tokens:
+        if token.tipo == FUNCAO:
+            forma.append(token.valor.upper())
+        elif token.tipo == OPERADOR:
+            forma.append(token.valor)
+        elif token.tipo in _SIMBOLOS:
+            forma.append(_SIMBOLOS[token.tipo])
+        else:
+            return ()
+    return tuple(forma)
+
+
+def _explicar_forma(forma: tuple, operandos: list) -> str | None:
+    """Casa a forma da expressão com um dos modelos de medida trivial."""
+    if forma == ("REF",):
+        return f"Repete o resultado da medida {operandos[0]}, com outro nome{SUFIXO_CONTEXTO}"
+    if forma in (("NUM",), ("STR",), ("-", "NUM")):
+        sinal = "-" if forma[0] == "-" else ""
+        return f"Retorna sempre o valor fixo {sinal}{operandos[0]}, independente dos filtros."
+    if forma == ("BLANK", "(", ")"):
+        return "Retorna sempre vazio (BLANK); costuma ser usada como marcador ou medida reservada."
+
+    if len(forma) == 4 and forma[1:] == ("(", "COL", ")") and forma[0] in AGREGACOES:
+        return AGREGACOES[forma[0]].format(coluna=operandos[0]) + SUFIXO_CONTEXTO
+    if forma == ("COUNTROWS", "(", "TAB", ")"):
+        return f"Conta as linhas da tabela {operandos[0]}{SUFIXO_CONTEXTO}"
+    if forma == ("SELECTEDVALUE", "(", "COL", ")"):
+        return (f"Retorna o valor de {operandos[0]} quando há exatamente um valor selecionado "
+                "no contexto; caso contrário, retorna vazio.")
+    if forma in (("SELECTEDVALUE", "(", "COL", ",", "STR", ")"), ("SELECTEDVALUE", "(", "COL", ",", "NUM", ")")):
+        return (f"Retorna o valor de {operandos[0]} quando há exatamente um valor selecionado "
+                f"no contexto; caso contrário, retorna {operandos[1]}.")
+
+    if forma[:2] == ("DIVIDE", "(") and forma[-1] == ")":
+        argumentos, separadores = forma[2:-1:2], forma[3:-1:2]
+        if len(argumentos) in (2, 3) and set(separadores) == {","} and set(argumentos) <= {"REF", "NUM"}:
+            alternativo = operandos[2] if len(operandos) == 3 else "vazio (BLANK)"
+            return (f"Divide {operandos[0]} por {operandos[1]} com DIVIDE, retornando {alternativo} "
+                    f"quando {operandos[1]} for zero ou vazio{SUFIXO_CONTEXTO}")
+
+    if len(forma) == 3 and forma[1] in OPERACOES and {forma[0], forma[2]} <= {"REF", "NUM"} and "REF" in forma:
+        return OPERACOES[forma[1]].format(a=operandos[0], b=operandos[1]) + SUFIXO_CONTEXTO
+
+    if forma == ("CALCULATE", "(", "REF", ",", "ALL", "(", "TAB", ")", ")"):
+        return (f"Calcula {operandos[0]} ignorando todos os filtros da tabela {operandos[1]}, "
+                "útil como total geral para percentuais.")
+    if forma in (("CALCULATE", "(", "REF", ",", "COL", "=", "STR", ")"),
+                 ("CALCULATE", "(", "REF", ",", "COL", "=", "NUM", ")")):
+        return (f"Calcula {operandos[0]} considerando apenas as linhas em que {operandos[1]} "
+                f"é igual a {operandos[2]}, substituindo outros filtros nessa coluna.")
+    return None
+
+
+def explicar_por_regras(nome: str, expressao: str) -> str | None:
+    """
+    Explica, sem LLM, medidas triviais reconhecidas pela forma dos tokens.
+
+    Cobre agregações diretas de uma coluna (``SUM('Fato'[Valor])``),
+    ``COUNTROWS(Tabela)``, ``DIVIDE([A], [B])``, operações entre duas medidas,
+    apelidos (``[Outra]``), constantes, ``SELECTEDVALUE`` e ``CALCULATE`` com um
+    único filtro simples. Retorna ``None`` para tudo que pede raciocínio.
+    """
+    if not USAR_REGRAS or not isinstance(expressao, str):
+        return None
+    tokens = [t for t in tokenizar(expressao) if t.tipo != COMENTARIO]
+    if not tokens or len(tokens) > 12:
+        return None
+    forma = _forma(tokens)
+    if not forma:
+        return None
+    operandos = [_descrever(t) for t, simbolo in zip(tokens, forma) if simbolo in _OPERANDOS]
+    return _explicar_forma(forma, operandos)
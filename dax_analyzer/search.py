@@ -0,0 +1,153 @@
+import re
+from collections import defaultdict
+
+import numpy as np
+
+from dax_analyzer.lexer import PADRAO_TOKENS_SIGNIFICATIVOS
+
+_PALAVRAS = re.compile(r"\w+")
+
+
+def _trigramas(texto: str) -> set:
+    return {texto[i:i + 3] for i in range(len(texto) - 2)}
+
+
+def _termos_da_expressao(expressao: str) -> set:
+    """Termos exatos de uma expressão: funções, identificadores e nomes referenciados (e suas palavras)."""
+    termos = set()
+    for string, referencia, identificador, _ in PADRAO_TOKENS_SIGNIFICATIVOS.findall(expressao.lower()):
+        if identificador:
+            termos.add(identificador)
+        elif referencia:
+            tabela, _, nome = referencia.partition("[")
+            for parte in (tabela.strip("'"), nome[:-1]):
+                if parte:
+                    termos.add(parte)
+                    termos.update(_PALAVRAS.findall(parte))
+        elif string:
+            termos.update(_PALAVRAS.findall(string))
+    return termos
+
+
+_VAZIA = np.empty(0, dtype=np.int32)
+
+
+def _listas(postagens: dict) -> dict:
+    """Listas de posições (já crescentes, pela ordem de inserção) como vetores ``int32``."""
+    return {chave: np.array(posicoes, dtype=np.int32) for chave, posicoes in postagens.items()}
+
+
+def _intersectar(a: np.ndarray | None, b: np.ndarray) -> np.ndarray:
+    """Interseção de duas listas crescentes; ``None`` representa todas as medidas."""
+    if a is None:
+        return b
+    menor, maior = (a, b) if len(a) <= len(b) else (b, a)
+    if not len(menor):
+        return _VAZIA
+    if len(menor) * 32 < len(maior):
+        # Lista curta contra lista longa: busca binária de cada posição curta.
+        indices = np.searchsorted(maior, menor)
+        encontrados = indices < len(maior)
+        encontrados[encontrados] = maior[indices[encontrados]] == menor[encontrados]
+        return menor[encontrados]
+    return np.intersect1d(menor, maior, assume_unique=True)
+
+
+class IndiceBusca:
+    """
+    Índice de busca das medidas de um modelo, montado uma vez e consultado a cada tecla.
+
+    Combina dois índices:
+
+    - invertido, de termos DAX (funções, identificadores, tabelas e nomes
+      referenciados) para as medidas que os usam; e
+    - de trigramas, sobre nome e expressão, que reduz uma busca por trecho
+      à interseção de poucas listas antes da verificação final com ``in``.
+
+    As listas de posições são vetores ordenados, intersectados da menor para a
+    maior; a memória acompanha o número de ocorrências, não chaves x medidas.
+    Os resultados são posições em ``medidas``; quem usa o termo buscado como
+    termo exato aparece antes de quem só o contém como trecho.
+    """
+
+    def __init__(self, medidas: list):
+        self.medidas = medidas
+        self._nomes = []
+        self._expressoes = []
+        por_tabela = defaultdict(list)
+        por_termo = defaultdict(list)
+        trigramas_nome = defaultdict(list)
+        trigramas_expressao = defaultdict(list)
+
+        for i, medida in enumerate(medidas):
+            nome = str(medida.get("nome", "")).lower()
+            expressao = medida.get("expressao", "")
+            expressao = expressao.lower() if isinstance(expressao, str) else ""
+            self._nomes.append(nome)
+            self._expressoes.append(expressao)
+            por_tabela[medida.get("tabela")].append(i)
+            for termo in _termos_da_expressao(expressao):
+                por_termo[termo].append(i)
+            for trigrama in _trigramas(nome):
+                trigramas_nome[trigrama].append(i)
+            for trigrama in _trigramas(expressao):
+                trigramas_expressao[trigrama].append(i)
+
+        total = len(medidas)
+        self.por_tabela = _listas(por_tabela)
+        self.por_termo = _listas(por_termo)
+        self._trigramas_nome = _listas(trigramas_nome)
+        self._trigramas_expressao = _listas(trigramas_expressao)
+
+        self._ordem_nome = np.empty(total, dtype=np.int64)
+        self._ordem_nome[np.argsort(np.array(self._nomes, dtype=object), kind="stable")] = np.arange(total)
+
+    def _filtrar(self, trecho: str, trigramas: dict, textos: list, universo: np.ndarray | None) -> np.ndarray:
+        """Restringe ``universo`` às posições cujo texto contém ``trecho``."""
+        listas = []
+        for chave in _trigramas(trecho):
+            lista = trigramas.get(chave)
+            if lista is None:
+                return _VAZIA
+            listas.append(lista)
+        for lista in sorted(listas, key=len):
+            universo = _intersectar(universo, lista)
+            if not len(universo):
+                return _VAZIA
+        # Os trigramas só garantem candidatos; a verificação confirma o trecho contíguo.
+        candidatas = np.arange(len(textos), dtype=np.int32) if universo is None else universo
+        return np.array([i for i in candidatas.tolist() if trecho in textos[i]], dtype=np.int32)
+
+    def buscar(self, nome: str = "", trecho_dax: str = "", tabela: str | None = None) -> list:
+        """
+        Posições das medidas que atendem a todos os filtros informados.
+
+        ``nome`` e ``trecho_dax`` são buscados como trechos, sem diferenciar
+        maiúsculas de minúsculas; ``tabela`` (ou ``None``/"Todas") restringe a tabela.
+        """
+        universo = None
+        if tabela and tabela != "Todas":
+            universo = self.por_tabela.get(tabela, _VAZIA)
+
+        nome = nome.strip().lower()
+        if nome:
+            universo = self._filtrar(nome, self._trigramas_nome, self._nomes, universo)
+
+        trecho_dax = trecho_dax.strip().lower()
+        if not trecho_dax:
+            posicoes = np.arange(len(self.medidas)) if universo is None else universo
+            if not nome:
+                return posicoes.tolist()
+            return posicoes[np.argsort(self._ordem_nome[posicoes], kind="stable")].tolist()
+
+        posicoes = self._filtrar(trecho_dax, self._trigramas_expressao, self._expressoes, universo)
+        # Relevância: quantos termos da busca a medida usa como termo exato (negativo para ordenar).
+        relevancia = np.zeros(len(posicoes), dtype=np.int64)
+        for termo in set(_PALAVRAS.findall(trecho_dax)):
+            relevancia -= np.isin(posicoes, self.por_termo.get(termo, _VAZIA), assume_unique=True)
+        ordem = np.lexsort((self._ordem_nome[posicoes], relevancia))
+        return posicoes[ordem].tolist()
+
+    def medidas_com_termo(self, termo: str) -> list:
+        """Medidas que usam exatamente o termo (ex.: ``calculate`` ou o nome de uma medida)."""
+        return [self.medidas[i] for i in self.por_termo.get(termo.lower(), _VAZIA).tolist()]
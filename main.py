@@ -1,67 +1,78 @@
 import os
 import json
-from pbix_tools.extractor import (
-    extract_pbix,
-    find_model_file,
-    parse_measures,
-    carregar_tabelas_modelo,
-)
-from dax_analyzer.explain import explicar_medida_dax, explicar_tabela
+from pbix_tools.cache import carregar_pbix_com_cache
+from pbix_tools.model_index import ModelIndex
+from pbix_tools.tmdl import carregar_projeto_pbip
+from dax_analyzer.explain import explicar_medida_dax_stream
+from dax_analyzer.pipeline import PipelineExplicacoes
 
-def processar_pbix(pbix_path, salvar_em_json=True):
+def processar_pbix(pbix_path, salvar_em_json=True, stream=False):
     print(f"🔍 Processando arquivo: {pbix_path}")
     
     if not os.path.exists(pbix_path):
-        print("❌ Arquivo .pbix não encontrado.")
+        print("❌ Arquivo .pbix ou projeto PBIP não encontrado.")
         return
 
-    pasta_extraida = extract_pbix(pbix_path)
-    print(f"📁 Arquivo descompactado em: {pasta_extraida}")
-
-    model_file = find_model_file(pasta_extraida)
-    if not model_file:
-        print("❌ Arquivo de modelo não encontrado dentro do .pbix.")
+    if os.path.isdir(pbix_path) or pbix_path.lower().endswith(".pbip"):
+        conteudo = carregar_projeto_pbip(pbix_path)
+    else:
+        conteudo = carregar_pbix_com_cache(pbix_path)
+    if not conteudo:
+        print("❌ Não foi possível carregar o modelo do .pbix.")
         return
 
-    print(f"📄 Modelo encontrado: {model_file}")
+    indice = ModelIndex(conteudo["model"])
 
-    # ---- Tabelas ----
-    tabelas_raw = carregar_tabelas_modelo(model_file, pasta_extraida)
-    tabelas = []
-    if tabelas_raw:
-        print(f"📂 {len(tabelas_raw)} tabelas encontradas. Gerando explicações...\n")
-        for i, t in enumerate(tabelas_raw, start=1):
-            nome_tabela = t.get("name", "Desconhecida")
-            colunas = [c.get("name") for c in t.get("columns", [])]
-            print(f"🗂️ [{i}/{len(tabelas_raw)}] {nome_tabela}")
-            explicacao = explicar_tabela(nome_tabela, colunas)
-            tabela_com_explicacao = {
-                "nome": nome_tabela,
-                "colunas": colunas,
-                "explicacao": explicacao,
-            }
-            tabelas.append(tabela_com_explicacao)
-            print(f"   {explicacao}\n{'-'*60}")
-    else:
-        print("⚠️ Nenhuma tabela encontrada.")
+    with PipelineExplicacoes() as pipeline:
+        # ---- Tabelas ----
+        tabelas_raw = indice.tabelas
+        tabelas = []
+        if tabelas_raw:
+            print(f"📂 {len(tabelas_raw)} tabelas encontradas. Gerando explicações...\n")
+            entradas = [
+                {"nome": t.get("name", "Desconhecida"), "colunas": indice.nomes_colunas(t.get("name", "Desconhecida"))}
+                for t in tabelas_raw
+            ]
 
-    # ---- Medidas ----
-    medidas = parse_measures(model_file)
-    if not medidas:
-        print("⚠️ Nenhuma medida encontrada.")
-        medidas_resultado = []
-    else:
-        print(f"📊 {len(medidas)} medidas encontradas. Gerando explicações...\n")
-        medidas_resultado = []
-        for i, medida in enumerate(medidas, start=1):
-            print(f"🔹 [{i}/{len(medidas)}] {medida['nome']}")
-            explicacao = explicar_medida_dax(medida['nome'], medida['expressao'])
-            medida_com_explicacao = {
-                **medida,
-                "explicacao": explicacao,
-            }
-            medidas_resultado.append(medida_com_explicacao)
-            print(f"✅ Explicação gerada:\n{explicacao}\n{'-'*60}\n")
+            def tabela_concluida(i, tabela, explicacao):
+                print(f"🗂️ [{i + 1}/{len(entradas)}] {tabela['nome']}")
+                tabelas.append({**tabela, "explicacao": explicacao})
+                print(f"   {explicacao}\n{'-'*60}")
+
+            pipeline.explicar_tabelas(entradas, ao_concluir=tabela_concluida)
+        else:
+            print("⚠️ Nenhuma tabela encontrada.")
+
+        # ---- Medidas ----
+        medidas = indice.medidas
+        if not medidas:
+            print("⚠️ Nenhuma medida encontrada.")
+            medidas_resultado = []
+        else:
+            print(f"📊 {len(medidas)} medidas encontradas. Gerando explicações...\n")
+            medidas_resultado = []
+
+            def medida_concluida(i, medida, explicacao):
+                print(f"🔹 [{i + 1}/{len(medidas)}] {medida['nome']}")
+                print(f"✅ Explicação gerada:\n{explicacao}\n{'-'*60}\n")
+
+            if stream:
+                # Uma medida por vez, imprimindo a explicação enquanto o modelo a escreve.
+                for i, medida in enumerate(medidas, start=1):
+                    print(f"🔹 [{i}/{len(medidas)}] {medida['nome']}")
+                    print("✅ Explicação gerada:")
+                    trechos = []
+                    for trecho in explicar_medida_dax_stream(medida["nome"], medida["expressao"]):
+                        print(trecho, end="", flush=True)
+                        trechos.append(trecho)
+                    medidas_resultado.append({**medida, "explicacao": "".join(trechos).strip()})
+                    print(f"\n{'-'*60}\n")
+            else:
+                # Dependências primeiro: cada medida recebe o resumo das que ela usa.
+                explicacoes = pipeline.explicar_medidas_por_dependencia(medidas, ao_concluir=medida_concluida)
+                medidas_resultado = [{**m, "explicacao": e} for m, e in zip(medidas, explicacoes)]
+            if pipeline.explicadas_por_regras:
+                print(f"⚡ {pipeline.explicadas_por_regras} medidas triviais explicadas por regras, sem o LLM.")
 
     if salvar_em_json:
         os.makedirs("outputs", exist_ok=True)
@@ -75,8 +86,25 @@ def processar_pbix(pbix_path, salvar_em_json=True):
 
 if __name__ == "__main__":
     import sys
+    from dax_analyzer.backends import aquecer_em_segundo_plano
+    from pbix_tools.workspace import obter_area_de_trabalho
+    obter_area_de_trabalho().instalar_limpeza_ao_sair()
+    if len(sys.argv) >= 2:
+        # Carrega o modelo enquanto o arquivo é extraído.
+        aquecer_em_segundo_plano()
     if len(sys.argv) < 2:
-        print("Uso: python main.py <caminho_arquivo.pbix>")
+        print("Uso: python main.py <caminho_arquivo.pbix | projeto.pbip | pasta do projeto>")
+        print("     python main.py --stream <caminho_arquivo.pbix | projeto.pbip | pasta do projeto>")
+        print("     python main.py --lote <pasta|padrão glob|arquivo.pbix> [...]")
+        print("     python main.py --observar <projeto.pbip | pasta do projeto>")
+    elif sys.argv[1] == "--observar" and len(sys.argv) > 2:
+        from watch import ObservadorProjeto
+        ObservadorProjeto(sys.argv[2]).observar()
+    elif sys.argv[1] == "--stream" and len(sys.argv) > 2:
+        processar_pbix(sys.argv[2], stream=True)
+    elif sys.argv[1] == "--lote":
+        from batch import processar_lote
+        processar_lote(sys.argv[2:])
     else:
         caminho_pbix = sys.argv[1]
         processar_pbix(caminho_pbix)
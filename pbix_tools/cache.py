@@ -0,0 +1,212 @@
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+from collections import OrderedDict
+
+from pbix_tools.extractor import (
+    carregar_modelo_pbix,
+    encontrar_dax_usadas_em_visuais,
+    extrair_dax_usadas_do_layout,
+)
+from pbix_tools.streaming import CHAVES_IGNORADAS
+from pbix_tools.visual_usage import IndiceVisuais
+from pbix_tools.workspace import AreaDeTrabalho, obter_area_de_trabalho
+
+# Cache persistente de extrações, endereçado pelo SHA-256 do arquivo .pbix.
+# Pode ser configurado via ``PBIX_CACHE_DIR`` e ``PBIX_CACHE_MAX_MB``.
+DIRETORIO_CACHE = os.getenv("PBIX_CACHE_DIR", os.path.join(".cache", "extracoes"))
+LIMITE_CACHE_BYTES = int(os.getenv("PBIX_CACHE_MAX_MB", "512")) * 1024 * 1024
+
+# Incrementar sempre que o formato das entradas mudar, para invalidar o cache antigo.
+VERSAO_CACHE = 4
+
+# Partições (queries M e SQL) e as subárvores que a leitura incremental já descarta
+# não são usadas depois da extração, então não vão para o cache.
+CHAVES_FORA_DO_CACHE = CHAVES_IGNORADAS | {"partitions"}
+
+# Camada em memória para evitar descompactar a mesma entrada a cada rerun do Streamlit,
+# limitada pelo tamanho do JSON das entradas (``PBIX_CACHE_MEMORIA_MB``).
+LIMITE_MEMORIA_BYTES = int(os.getenv("PBIX_CACHE_MEMORIA_MB", "256")) * 1024 * 1024
+_ENTRADAS_EM_MEMORIA = OrderedDict()
+
+
+def calcular_hash_arquivo(caminho: str, tamanho_bloco: int = 1024 * 1024) -> str:
+    """Calcula o SHA-256 de um arquivo lendo em blocos."""
+    sha = hashlib.sha256()
+    with open(caminho, "rb") as f:
+        for bloco in iter(lambda: f.read(tamanho_bloco), b""):
+            sha.update(bloco)
+    return sha.hexdigest()
+
+
+def _caminho_entrada(chave: str, diretorio: str) -> str:
+    return os.path.join(diretorio, f"{chave}.json.gz")
+
+
+class _ContadorEscrita:
+    """Repassa as escritas a ``destino`` contando os caracteres escritos."""
+
+    def __init__(self, destino):
+        self.destino = destino
+        self.total = 0
+
+    def write(self, texto: str):
+        self.total += len(texto)
+        return self.destino.write(texto)
+
+
+def _enxugar(valor):
+    """Remove, no próprio objeto e em qualquer nível, as chaves de ``CHAVES_FORA_DO_CACHE``."""
+    if isinstance(valor, dict):
+        for chave in CHAVES_FORA_DO_CACHE & valor.keys():
+            del valor[chave]
+        itens = valor.values()
+    elif isinstance(valor, list):
+        itens = valor
+    else:
+        return valor
+    for item in itens:
+        _enxugar(item)
+    return valor
+
+
+def _lembrar(chave: str, entrada: dict, tamanho: int, limite_bytes: int | None = None):
+    """
+    Guarda a entrada na camada em memória e descarta as menos usadas até caber em ``limite_bytes``.
+
+    ``tamanho`` é o do JSON da entrada, uma aproximação do que ela ocupa já
+    decodificada. A entrada mais recente fica mesmo que sozinha passe do limite,
+    para que os reruns da sessão atual não a descompactem de novo.
+    """
+    limite_bytes = LIMITE_MEMORIA_BYTES if limite_bytes is None else limite_bytes
+    _ENTRADAS_EM_MEMORIA[chave] = (entrada, tamanho)
+    _ENTRADAS_EM_MEMORIA.move_to_end(chave)
+    total = sum(t for _, t in _ENTRADAS_EM_MEMORIA.values())
+    while total > limite_bytes and len(_ENTRADAS_EM_MEMORIA) > 1:
+        _, (_, removido) = _ENTRADAS_EM_MEMORIA.popitem(last=False)
+        total -= removido
+
+
+def _tocar(caminho: str):
+    """Atualiza o mtime da entrada em disco: é ele que define a ordem de remoção (LRU)."""
+    try:
+        os.utime(caminho)
+    except OSError:
+        pass
+
+
+def obter_extracao(chave: str, diretorio: str = DIRETORIO_CACHE) -> dict | None:
+    """Retorna a entrada do cache para o hash informado, ou ``None``."""
+    caminho = _caminho_entrada(chave, diretorio)
+    if chave in _ENTRADAS_EM_MEMORIA:
+        _ENTRADAS_EM_MEMORIA.move_to_end(chave)
+        # Servida da memória, a entrada continua em uso: não pode ser a primeira a sair do disco.
+        _tocar(caminho)
+        return _ENTRADAS_EM_MEMORIA[chave][0]
+
+    try:
+        with gzip.open(caminho, "rt", encoding="utf-8") as f:
+            texto = f.read()
+        entrada = json.loads(texto)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        print(f"⚠️ Entrada de cache inválida ({caminho}): {e}")
+        return None
+
+    if entrada.get("versao") != VERSAO_CACHE:
+        return None
+
+    _tocar(caminho)
+
+    entrada["visuais"] = IndiceVisuais.de_lista(entrada.get("visuais"))
+    _lembrar(chave, entrada, len(texto))
+    return entrada
+
+
+def salvar_extracao(chave: str, entrada: dict, diretorio: str = DIRETORIO_CACHE,
+                    limite_bytes: int = LIMITE_CACHE_BYTES):
+    """Grava uma entrada no cache (escrita atômica) e aplica o limite de tamanho."""
+    os.makedirs(diretorio, exist_ok=True)
+    serializavel = {**entrada, "versao": VERSAO_CACHE, "visuais": entrada["visuais"].para_lista()}
+
+    fd, temporario = tempfile.mkstemp(dir=diretorio, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as bruto, gzip.open(bruto, "wt", encoding="utf-8") as f:
+            contador = _ContadorEscrita(f)
+            json.dump(serializavel, contador, ensure_ascii=False)
+        os.replace(temporario, _caminho_entrada(chave, diretorio))
+    except Exception as e:
+        print(f"Erro ao salvar cache de extração: {e}")
+        if os.path.exists(temporario):
+            os.remove(temporario)
+        return
+
+    _lembrar(chave, {**entrada, "versao": VERSAO_CACHE}, contador.total)
+    limitar_cache(diretorio, limite_bytes)
+
+
+def limitar_cache(diretorio: str = DIRETORIO_CACHE, limite_bytes: int = LIMITE_CACHE_BYTES):
+    """Remove as entradas menos usadas recentemente até caber no limite."""
+    try:
+        entradas = [e for e in os.scandir(diretorio) if e.is_file() and e.name.endswith(".json.gz")]
+    except FileNotFoundError:
+        return
+
+    entradas = sorted(entradas, key=lambda e: e.stat().st_mtime)
+    total = sum(e.stat().st_size for e in entradas)
+    for entrada in entradas:
+        if total <= limite_bytes:
+            break
+        try:
+            tamanho = entrada.stat().st_size
+            os.remove(entrada.path)
+            total -= tamanho
+            _ENTRADAS_EM_MEMORIA.pop(entrada.name[:-len(".json.gz")], None)
+        except OSError:
+            pass
+
+
+def carregar_pbix_com_cache(pbix_path: str, chave: str | None = None, area: AreaDeTrabalho | None = None,
+                            diretorio: str = DIRETORIO_CACHE) -> dict | None:
+    """
+    Carrega modelo, layout e índice de uso em visuais de um .pbix, consultando o cache antes.
+
+    Em caso de acerto, não há extração nem parsing de JSON do pacote. Em caso de
+    falta, a extração do pbi-tools (se necessária) acontece na área de trabalho
+    e é removida assim que o conteúdo vai para o cache.
+    Retorna ``{"hash", "model", "visuais"}`` ou ``None`` em caso de erro; o
+    layout só serve para montar ``visuais`` e não é guardado, e o modelo vem
+    sem partições (``CHAVES_FORA_DO_CACHE``).
+    """
+    chave = chave or calcular_hash_arquivo(pbix_path)
+    entrada = obter_extracao(chave, diretorio)
+    if entrada:
+        print(f"♻️ Extração reaproveitada do cache ({chave[:12]}).")
+        return entrada
+
+    area = area or obter_area_de_trabalho()
+    pasta_destino = area.pasta_extracao(chave)
+    try:
+        conteudo = carregar_modelo_pbix(pbix_path, pasta_destino)
+        if not conteudo:
+            return None
+
+        if conteudo["layout"]:
+            visuais = extrair_dax_usadas_do_layout(conteudo["layout"])
+        elif conteudo["pasta_extraida"]:
+            visuais = encontrar_dax_usadas_em_visuais(conteudo["pasta_extraida"], conteudo["manifesto"])
+        else:
+            visuais = IndiceVisuais()
+    finally:
+        area.liberar(pasta_destino)
+
+    entrada = {
+        "hash": chave,
+        "model": _enxugar(conteudo["model"]),
+        "visuais": visuais,
+    }
+    salvar_extracao(chave, entrada, diretorio)
+    return entrada
@@ -3,18 +3,25 @@ import subprocess
 import json
 import tempfile
 
+from pbix_tools.manifest import localizar_modelo, montar_manifesto
+from pbix_tools.reader import ler_pbix
+from pbix_tools.streaming import carregar_modelo_enxuto, iterar_medidas
+from pbix_tools.visual_usage import IndiceVisuais, indexar_layout, indexar_visuais_extraidos
+
 # Caminho para o executável do pbi-tools. Permite sobrescrever via variável de
 # ambiente ``PBI_TOOLS_EXE``. Caso não seja definido, assume que ``pbi-tools``
 # está disponível no PATH.
 PBI_TOOLS_EXE = os.getenv("PBI_TOOLS_EXE", "./pbix_tools/pbi-tools.1.2.0/pbi-tools.exe")
 
 
-def desmontar_pbix_com_pbitools(pbix_path):
+def desmontar_pbix_com_pbitools(pbix_path, pasta_destino=None):
     """
     Usa o pbi-tools.exe para extrair o conteúdo do .pbix.
     Retorna o caminho da pasta extraída.
+
+    Sem ``pasta_destino``, cria uma pasta temporária que fica a cargo de quem chama.
     """
-    pasta_destino = tempfile.mkdtemp(prefix="pbix_extract_")
+    pasta_destino = pasta_destino or tempfile.mkdtemp(prefix="pbix_extract_")
     try:
         print(f"🔧 Executando pbi-tools em: {pbix_path}")
         subprocess.run(
@@ -38,43 +45,31 @@ def desmontar_pbix_com_pbitools(pbix_path):
 
 def localizar_model_bim(pasta_extraida):
     """
-    Retorna o caminho do arquivo do modelo extraído (model.json ou Model.bim).
-    """
-    print("🔍 Verificando arquivos extraídos:")
-    for root, dirs, files in os.walk(pasta_extraida):
-        for file in files:
-            caminho = os.path.join(root, file)
-            print(f"🗂️ {caminho}")
-            if file.lower() in ["database.bim", "database.json"]:
-                print(f"✅ Modelo encontrado: {caminho}")
-                return caminho
-    print("❌ Arquivo do modelo não encontrado (nem database.bim nem database.json).")
-    return None
+    Retorna o caminho do arquivo do modelo extraído (database.json ou database.bim).
 
-def localizar_database_json(pasta_extraida):
-    """
-    Procura por database.json dentro da pasta Report/Model (formato TMDL).
+    Verifica os caminhos conhecidos do pbi-tools antes de uma busca limitada,
+    sem percorrer as pastas de visuais e recursos.
     """
-    caminho = os.path.join(pasta_extraida, "Report", "Model", "database.json")
-    if os.path.exists(caminho):
+    caminho = localizar_modelo(pasta_extraida)
+    if caminho:
+        print(f"✅ Modelo encontrado: {caminho}")
         return caminho
+    print("❌ Arquivo do modelo não encontrado (nem database.bim nem database.json).")
     return None
 
-def localizar_database_modelo(pasta_extraida):
-    caminho = os.path.join(pasta_extraida, "Model", "database.json")
-    if os.path.exists(caminho):
-        return caminho
-    return None
+def extrair_tabelas(model_data: dict) -> list:
+    """Retorna a lista de tabelas de um modelo já carregado."""
+    return model_data.get("model", {}).get("tables", [])
 
 def carregar_tabelas_modelo(model_file: str, pasta_extraida: str) -> list:
     """
     Retorna as tabelas a partir do arquivo model_file, com fallback para Model/database.json.
     Garante que retorna uma lista, mesmo se estiver vazia. Inclui logs para debug.
+    Os arquivos são lidos de forma incremental (``carregar_modelo_enxuto``).
     """
     def ler_json(path):
         try:
-            with open(path, "r", encoding="utf-8") as f:
-                return json.load(f)
+            return carregar_modelo_enxuto(path, incluir_particoes=False)
         except Exception as e:
             print(f"[ERRO] Falha ao ler JSON em {path}: {e}")
             return {}
@@ -82,7 +77,7 @@ def carregar_tabelas_modelo(model_file: str, pasta_extraida: str) -> list:
     # Tenta carregar do model_file
     print(f"[INFO] Tentando carregar tabelas de: {model_file}")
     model_json = ler_json(model_file)
-    tabelas = model_json.get("model", {}).get("tables", [])
+    tabelas = extrair_tabelas(model_json)
 
     if tabelas:
         print(f"[OK] {len(tabelas)} tabelas encontradas em model_file")
@@ -93,7 +88,7 @@ def carregar_tabelas_modelo(model_file: str, pasta_extraida: str) -> list:
     if os.path.exists(db_path):
         print(f"[INFO] Tentando fallback para {db_path}")
         model_json = ler_json(db_path)
-        tabelas = model_json.get("model", {}).get("tables", [])
+        tabelas = extrair_tabelas(model_json)
         if tabelas:
             print(f"[OK] {len(tabelas)} tabelas encontradas no database.json")
             return tabelas
@@ -101,17 +96,10 @@ def carregar_tabelas_modelo(model_file: str, pasta_extraida: str) -> list:
     print("[WARN] Nenhuma tabela encontrada em nenhuma fonte.")
     return []
 
-def parse_measures(model_file):
+def extrair_medidas(model_data):
     """
-    Extrai medidas DAX do arquivo Model.bim (JSON).
+    Extrai medidas DAX de um modelo já carregado (JSON do Model.bim/DataModelSchema).
     """
-    with open(model_file, 'r', encoding='utf-8') as f:
-        try:
-            model_data = json.load(f)
-        except Exception as e:
-            print(f"❌ Erro ao carregar JSON: {e}")
-            return []
-
     medidas = []
     if "model" in model_data and "tables" in model_data["model"]:
         for tabela in model_data["model"]["tables"]:
@@ -132,90 +120,113 @@ def parse_measures(model_file):
         print("⚠️ Estrutura inesperada no arquivo Model.bim.")
     return medidas
 
-def extrair_dax_usadas_nos_visuais(report_layout_path):
+def parse_measures(model_file):
     """
-    Lê o arquivo de layout e extrai todas as expressões DAX utilizadas nos visuais.
+    Extrai medidas DAX do arquivo Model.bim (JSON).
+
+    O arquivo é lido de forma incremental (``iterar_medidas``), então o pico de
+    memória não cresce com partições, anotações e queries M embutidas.
     """
-    usadas = set()
+    try:
+        return list(iterar_medidas(model_file))
+    except Exception as e:
+        print(f"❌ Erro ao carregar JSON: {e}")
+        return []
 
+def extrair_dax_usadas_nos_visuais(report_layout_path):
+    """
+    Lê o arquivo de layout e indexa as medidas e colunas utilizadas nos visuais.
+    """
     try:
         with open(report_layout_path, "r", encoding="utf-8") as f:
             layout = json.load(f)
-
-        for section in layout.get("sections", []):
-            for visual in section.get("visualContainers", []):
-                config = visual.get("config", {})
-                json_config = json.loads(config) if isinstance(config, str) else config
-
-                # Caminhos comuns com DAX dentro de visuais
-                for query_key in ["expression", "query", "formula"]:
-                    trecho = str(json_config.get("singleVisual", {}).get("prototypeQuery", {}).get(query_key, ""))
-                    if trecho:
-                        usadas.update(trecho.lower().split())
-
     except Exception as e:
         print(f"Erro ao analisar o layout: {e}")
+        return IndiceVisuais()
 
-    return usadas
+    return extrair_dax_usadas_do_layout(layout)
 
-def encontrar_dax_usadas_em_visuais(pasta_extraida):
-    """
-    Varre todos os arquivos JSON em Report/sections/*/visualContainers/
-    e extrai nomes de medidas usados nos visuais (via expression, query, formula).
-    Compatível com arquivos que são listas ou dicionários.
+def extrair_dax_usadas_do_layout(layout):
     """
-    usados = set()
-    base_path = os.path.join(pasta_extraida, "Report", "sections")
-
-    if not os.path.exists(base_path):
-        return usados
-
-    for root, dirs, files in os.walk(base_path):
-        if "visualContainers" in root:
-            for file in files:
-                if not file.endswith(".json"):
-                    continue
-                caminho = os.path.join(root, file)
-                try:
-                    with open(caminho, "r", encoding="utf-8") as f:
-                        content = json.load(f)
-
-                    visuais = content if isinstance(content, list) else [content]
-
-                    for visual in visuais:
-                        proto = visual.get("prototypeQuery", {})
-                        if not isinstance(proto, dict):
-                            continue
+    Indexa as medidas e colunas utilizadas nos visuais de um layout já carregado.
 
-                        for key in ["expression", "query", "formula"]:
-                            raw = proto.get(key)
-                            if isinstance(raw, str):
-                                nomes = raw.lower().replace("[", "").replace("]", "").split()
-                                usados.update(nomes)
+    Retorna um ``IndiceVisuais`` com as referências exatas ``(tabela, campo)`` de
+    cada página e visual, lidas do ``prototypeQuery`` (Select/From/Where).
+    """
+    return indexar_layout(layout)
 
-                except Exception as e:
-                    print(f"⚠️ Erro lendo visual {file}: {e}")
+def encontrar_dax_usadas_em_visuais(pasta_extraida, manifesto=None):
+    """
+    Lê os arquivos JSON em Report/sections/*/visualContainers/
+    e indexa as medidas e colunas usadas nos visuais (via ``prototypeQuery``).
+    Compatível com arquivos que são listas ou dicionários.
 
-    return usados
+    Se o ``manifesto`` da extração for informado, usa a lista de visuais dele
+    em vez de varrer a pasta novamente.
+    """
+    return indexar_visuais_extraidos(manifesto or montar_manifesto(pasta_extraida))
 
 # ---------------------------------------------------------------------------
 # Funções utilitárias usadas pelo módulo principal
 
-def extract_pbix(pbix_path: str) -> str | None:
+def extract_pbix(pbix_path: str, pasta_destino: str | None = None) -> str | None:
     """Desmonta o arquivo .pbix utilizando o pbi-tools.
 
     Retorna o caminho da pasta extraída ou ``None`` em caso de erro.
     """
-    return desmontar_pbix_com_pbitools(pbix_path)
+    return desmontar_pbix_com_pbitools(pbix_path, pasta_destino)
 
 
 def find_model_file(pasta_extraida: str) -> str | None:
     """Tenta localizar o arquivo do modelo dentro da pasta extraída."""
-    caminho = localizar_model_bim(pasta_extraida)
-    if not caminho:
-        caminho = localizar_database_json(pasta_extraida)
-    if not caminho:
-        caminho = localizar_database_modelo(pasta_extraida)
-    return caminho
+    return localizar_model_bim(pasta_extraida)
+
 
+def carregar_modelo_pbix(pbix_path: str, pasta_destino: str | None = None) -> dict | None:
+    """Carrega modelo e layout de um .pbix/.pbit.
 
+    Tenta primeiro a leitura nativa do zip (``ler_pbix``) e só recorre ao
+    pbi-tools quando o pacote não traz o ``DataModelSchema`` em JSON.
+    Retorna ``{"model", "layout", "pasta_extraida", "manifesto"}`` ou ``None`` em caso de erro.
+    """
+    conteudo = ler_pbix(pbix_path) or {"model": None, "layout": None}
+    if conteudo["model"]:
+        print("⚡ Modelo lido diretamente do pacote, sem pbi-tools.")
+        return {**conteudo, "pasta_extraida": None, "manifesto": None}
+
+    pasta_extraida = extract_pbix(pbix_path, pasta_destino)
+    if not pasta_extraida:
+        return None
+
+    manifesto = montar_manifesto(pasta_extraida)
+    model_file = manifesto["modelo"]
+    if not model_file:
+        print("❌ Arquivo de modelo não encontrado dentro do .pbix.")
+        return None
+
+    try:
+        # Leitura incremental: o modelo nunca é decodificado inteiro de uma vez, e as
+        # partições (consultas M) nem chegam a ser montadas, já que o cache as descarta.
+        model_data = carregar_modelo_enxuto(model_file, incluir_particoes=False)
+    except Exception as e:
+        print(f"❌ Erro ao carregar JSON: {e}")
+        return None
+
+    if not extrair_tabelas(model_data):
+        tabelas = carregar_tabelas_modelo(model_file, pasta_extraida)
+        model_data = {**model_data, "model": {**model_data.get("model", {}), "tables": tabelas}}
+
+    layout = conteudo["layout"]
+    if not layout and manifesto["layout"]:
+        try:
+            with open(manifesto["layout"], "r", encoding="utf-8") as f:
+                layout = json.load(f)
+        except Exception as e:
+            print(f"⚠️ Erro ao carregar layout: {e}")
+
+    return {
+        "model": model_data,
+        "layout": layout,
+        "pasta_extraida": pasta_extraida,
+        "manifesto": manifesto,
+    }
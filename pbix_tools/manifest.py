@@ -0,0 +1,112 @@
+import os
+
+# Locais onde o pbi-tools (e exportações manuais) costumam gravar o modelo,
+# verificados antes de qualquer varredura da pasta.
+CAMINHOS_MODELO_CONHECIDOS = [
+    ("Model", "database.json"),
+    ("Model", "database.bim"),
+    ("Report", "Model", "database.json"),
+    ("database.json",),
+    ("database.bim",),
+    ("Model.bim",),
+]
+NOMES_ARQUIVO_MODELO = {"database.json", "database.bim", "model.bim"}
+CAMINHOS_LAYOUT_CONHECIDOS = [
+    ("Report", "report.json"),
+    ("Report", "Layout"),
+]
+
+# A busca de fallback não desce nestas pastas, que concentram milhares de
+# arquivos de visuais e recursos e nunca contêm o modelo.
+PASTAS_IGNORADAS_NA_BUSCA = {"sections", "staticresources", "customvisuals"}
+PROFUNDIDADE_MAXIMA_BUSCA = 3
+
+
+def _primeiro_existente(pasta, candidatos):
+    for partes in candidatos:
+        caminho = os.path.join(pasta, *partes)
+        if os.path.isfile(caminho):
+            return caminho
+    return None
+
+
+def _buscar_modelo(pasta, profundidade_maxima=PROFUNDIDADE_MAXIMA_BUSCA):
+    """Busca em largura, limitada em profundidade, por um arquivo de modelo."""
+    fila = [(pasta, 0)]
+    while fila:
+        atual, profundidade = fila.pop(0)
+        try:
+            with os.scandir(atual) as entradas:
+                entradas = list(entradas)
+        except OSError:
+            continue
+        for entrada in entradas:
+            if entrada.is_file() and entrada.name.lower() in NOMES_ARQUIVO_MODELO:
+                return entrada.path
+        if profundidade < profundidade_maxima:
+            fila.extend(
+                (e.path, profundidade + 1) for e in entradas
+                if e.is_dir() and e.name.lower() not in PASTAS_IGNORADAS_NA_BUSCA
+            )
+    return None
+
+
+def localizar_modelo(pasta_extraida: str) -> str | None:
+    """Localiza o arquivo do modelo: caminhos conhecidos primeiro, busca limitada depois."""
+    return _primeiro_existente(pasta_extraida, CAMINHOS_MODELO_CONHECIDOS) or _buscar_modelo(pasta_extraida)
+
+
+def _listar_arquivos(pasta):
+    arquivos = []
+    pilha = [pasta]
+    while pilha:
+        atual = pilha.pop()
+        try:
+            with os.scandir(atual) as entradas:
+                for entrada in entradas:
+                    if entrada.is_dir():
+                        pilha.append(entrada.path)
+                    elif entrada.is_file():
+                        arquivos.append(entrada.path)
+        except OSError:
+            continue
+    return sorted(arquivos)
+
+
+def _listar_secoes(pasta_secoes):
+    secoes = []
+    try:
+        entradas = sorted(os.scandir(pasta_secoes), key=lambda e: e.name)
+    except OSError:
+        return secoes
+
+    for entrada in entradas:
+        if not entrada.is_dir():
+            continue
+        visuais = [
+            arquivo for arquivo in _listar_arquivos(os.path.join(entrada.path, "visualContainers"))
+            if arquivo.endswith(".json")
+        ]
+        secoes.append({
+            "nome": entrada.name,
+            "caminho": entrada.path,
+            "visuais": visuais,
+        })
+    return secoes
+
+
+def montar_manifesto(pasta_extraida: str) -> dict:
+    """
+    Monta o manifesto de uma pasta extraída pelo pbi-tools.
+
+    Reúne, numa única passada, o arquivo do modelo, o layout do relatório, as
+    seções com seus arquivos de visuais e os recursos estáticos, para que as
+    etapas seguintes não precisem varrer a pasta novamente.
+    """
+    return {
+        "pasta": pasta_extraida,
+        "modelo": localizar_modelo(pasta_extraida),
+        "layout": _primeiro_existente(pasta_extraida, CAMINHOS_LAYOUT_CONHECIDOS),
+        "secoes": _listar_secoes(os.path.join(pasta_extraida, "Report", "sections")),
+        "recursos": _listar_arquivos(os.path.join(pasta_extraida, "StaticResources")),
+    }
@@ -0,0 +1,95 @@
+from collections import defaultdict
+
+from pbix_tools.streaming import carregar_modelo_enxuto
+
+# Colunas que o próprio Power BI cria em cada tabela (``RowNumber-<guid>``). Não são
+# do usuário: ficam fora das contagens, da análise de uso de colunas e dos prompts.
+TIPOS_COLUNAS_INTERNAS = frozenset({"rowNumber", "RowNumber"})
+
+
+def coluna_interna(coluna: dict) -> bool:
+    """Se a coluna (no formato do Model.bim) é interna do Power BI, como ``RowNumber``."""
+    return coluna.get("type") in TIPOS_COLUNAS_INTERNAS
+
+
+def _texto(valor):
+    """Normaliza propriedades que o Power BI serializa como lista de linhas."""
+    if isinstance(valor, list):
+        return "\n".join(map(str, valor))
+    return str(valor) if valor is not None else ""
+
+
+class ModelIndex:
+    """
+    Índice do modelo construído a partir de um único parsing do JSON.
+
+    Expõe medidas, tabelas, colunas e relacionamentos já com os dicionários de
+    consulta pré-calculados, para que CLI e abas da UI não precisem reler nem
+    percorrer o modelo novamente. Partições (consultas M) ficam de fora: o
+    cache de extração não as guarda.
+    """
+
+    def __init__(self, model_data: dict):
+        self.model_data = model_data or {}
+        modelo = self.model_data.get("model", {})
+
+        self.tabelas = modelo.get("tables", [])
+        self.relacionamentos = modelo.get("relationships", [])
+        self.medidas = []
+        self.colunas = []
+
+        self.tabelas_por_nome = {}
+        self.medidas_por_nome = {}
+        self.medidas_por_nome_lower = {}
+        self.medidas_por_tabela = defaultdict(list)
+        self.colunas_por_tabela = defaultdict(list)
+        self.colunas_por_chave = {}
+        self.relacionamentos_por_tabela = defaultdict(list)
+
+        for tabela in self.tabelas:
+            nome_tabela = tabela.get("name", "Desconhecida")
+            self.tabelas_por_nome[nome_tabela] = tabela
+
+            for medida in tabela.get("measures", []):
+                item = {
+                    "tabela": nome_tabela,
+                    "nome": medida.get("name", "Sem nome"),
+                    "expressao": _texto(medida.get("expression", "")),
+                }
+                self.medidas.append(item)
+                self.medidas_por_nome[item["nome"]] = item
+                self.medidas_por_nome_lower[item["nome"].lower()] = item
+                self.medidas_por_tabela[nome_tabela].append(item)
+
+            for coluna in tabela.get("columns", []):
+                if coluna_interna(coluna):
+                    continue
+                item = {
+                    "tabela": nome_tabela,
+                    "nome": coluna.get("name"),
+                    "tipo": coluna.get("dataType"),
+                    "oculta": bool(coluna.get("isHidden", False)),
+                    "expressao": _texto(coluna.get("expression")) if coluna.get("expression") else None,
+                    "ordenar_por": coluna.get("sortByColumn"),
+                }
+                self.colunas.append(item)
+                self.colunas_por_tabela[nome_tabela].append(item)
+                self.colunas_por_chave[(nome_tabela, item["nome"])] = item
+
+        for rel in self.relacionamentos:
+            self.relacionamentos_por_tabela[rel.get("fromTable")].append(rel)
+            if rel.get("toTable") != rel.get("fromTable"):
+                self.relacionamentos_por_tabela[rel.get("toTable")].append(rel)
+
+    @classmethod
+    def de_arquivo(cls, model_file: str) -> "ModelIndex":
+        """Constrói o índice a partir de um Model.bim/database.json em disco, com leitura incremental."""
+        return cls(carregar_modelo_enxuto(model_file, incluir_particoes=False))
+
+    def nomes_colunas(self, nome_tabela: str) -> list:
+        return [c["nome"] for c in self.colunas_por_tabela.get(nome_tabela, [])]
+
+    def tabelas_visiveis(self, prefixos_ignorados=()) -> list:
+        """Tabelas cujo nome não começa com nenhum dos prefixos informados."""
+        return [t for t in self.tabelas
+                if not any(t.get("name", "").startswith(p) for p in prefixos_ignorados)]
@@ -0,0 +1,70 @@
+import io
+import json
+import zipfile
+
+from pbix_tools.streaming import carregar_modelo_enxuto, detectar_encoding
+
+# Entradas do pacote .pbix/.pbit que interessam à análise. Ambas são JSON
+# serializado em UTF-16 LE pelo Power BI Desktop.
+ENTRADA_MODELO = "DataModelSchema"
+ENTRADA_LAYOUT = "Report/Layout"
+
+# Acima deste tamanho (descompactado) o modelo é lido de forma incremental,
+# descartando anotações, partições e demais subárvores que a análise não usa.
+LIMITE_LEITURA_INTEGRAL = 64 * 1024 * 1024
+
+
+def _decodificar_texto(dados: bytes) -> str:
+    """Decodifica o conteúdo de uma entrada do pacote (UTF-16 com ou sem BOM, ou UTF-8)."""
+    if dados.startswith((b"\xff\xfe", b"\xfe\xff")):
+        return dados.decode("utf-16")
+    if len(dados) > 1 and dados[1:2] == b"\x00":
+        return dados.decode("utf-16-le")
+    return dados.decode("utf-8-sig")
+
+
+def _ler_modelo_incremental(pacote: zipfile.ZipFile, nome: str):
+    with pacote.open(nome) as bruto:
+        encoding = detectar_encoding(bruto.read(4))
+    try:
+        with pacote.open(nome) as bruto, io.TextIOWrapper(bruto, encoding=encoding) as fluxo:
+            return carregar_modelo_enxuto(fluxo, incluir_particoes=False)
+    except (UnicodeDecodeError, ValueError) as e:
+        print(f"⚠️ Erro ao decodificar {nome}: {e}")
+        return None
+
+
+def _ler_json_da_entrada(pacote: zipfile.ZipFile, nome: str):
+    try:
+        info = pacote.getinfo(nome)
+    except KeyError:
+        return None
+    if nome == ENTRADA_MODELO and info.file_size > LIMITE_LEITURA_INTEGRAL:
+        return _ler_modelo_incremental(pacote, nome)
+
+    dados = pacote.read(info)
+    try:
+        return json.loads(_decodificar_texto(dados))
+    except (UnicodeDecodeError, ValueError) as e:
+        print(f"⚠️ Erro ao decodificar {nome}: {e}")
+        return None
+
+
+def ler_pbix(pbix_path: str) -> dict | None:
+    """
+    Lê um .pbix/.pbit diretamente do zip, sem pbi-tools e sem gravar em disco.
+
+    Retorna ``{"model": ..., "layout": ...}`` com o mesmo JSON de modelo usado por
+    ``parse_measures``/``carregar_tabelas_modelo``. ``model`` fica ``None`` quando o
+    pacote só traz o ``DataModel`` binário (modo importação), caso em que ainda é
+    preciso recorrer ao pbi-tools. Retorna ``None`` se o arquivo não for um zip válido.
+    """
+    try:
+        with zipfile.ZipFile(pbix_path) as pacote:
+            return {
+                "model": _ler_json_da_entrada(pacote, ENTRADA_MODELO),
+                "layout": _ler_json_da_entrada(pacote, ENTRADA_LAYOUT),
+            }
+    except (zipfile.BadZipFile, OSError) as e:
+        print(f"❌ Não foi possível abrir o pacote {pbix_path}: {e}")
+        return None
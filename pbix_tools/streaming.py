@@ -0,0 +1,301 @@
+import io
+import re
+from json.decoder import scanstring
+
+# Subárvores que nenhuma etapa da análise usa. São descartadas durante a
+# leitura, sem nunca serem materializadas em memória.
+CHAVES_IGNORADAS = frozenset({"annotations", "lineageTag", "extendedProperties", "changedProperties"})
+
+_TAMANHO_BLOCO = 1024 * 1024
+_FOLGA_MINIMA = 64
+
+_ESPACOS = re.compile(r"[ \t\r\n]*")
+_PRIMITIVO = re.compile(r"-?\d+(?:\.\d+)?(?:[eE][+-]?\d+)?|true|false|null")
+_ESTRUTURAL = re.compile(r'["{}\[\]]')
+_FIM_STRING = re.compile(r'(?:[^"\\]|\\.)*"', re.S)
+
+
+def detectar_encoding(inicio: bytes) -> str:
+    """Detecta UTF-16 (DataModelSchema) ou UTF-8 (Model.bim) pelos primeiros bytes."""
+    if inicio.startswith((b"\xff\xfe", b"\xfe\xff")):
+        return "utf-16"
+    if inicio[1:2] == b"\x00":
+        return "utf-16-le"
+    return "utf-8-sig"
+
+
+def abrir_texto_modelo(caminho: str):
+    """Abre o arquivo do modelo como texto, com o encoding detectado."""
+    with open(caminho, "rb") as f:
+        inicio = f.read(4)
+    return io.open(caminho, "r", encoding=detectar_encoding(inicio))
+
+
+class LeitorJSONIncremental:
+    """
+    Leitor JSON de consumo sob demanda sobre um fluxo de texto.
+
+    Mantém em memória apenas um bloco do arquivo por vez: quem chama percorre
+    objetos e arrays chave a chave e decide, para cada valor, se quer
+    materializá-lo (``ler_valor``) ou descartá-lo (``pular_valor``).
+    """
+
+    def __init__(self, fluxo, tamanho_bloco: int = _TAMANHO_BLOCO):
+        self.fluxo = fluxo
+        self.tamanho_bloco = tamanho_bloco
+        self.buf = ""
+        self.pos = 0
+        self.fim = False
+
+    # ---- buffer ----
+
+    def _carregar(self) -> bool:
+        if self.fim:
+            return False
+        bloco = self.fluxo.read(self.tamanho_bloco)
+        if not bloco:
+            self.fim = True
+            return False
+        self.buf = self.buf[self.pos:] + bloco
+        self.pos = 0
+        return True
+
+    def _proximo_char(self) -> str:
+        while True:
+            self.pos = _ESPACOS.match(self.buf, self.pos).end()
+            if len(self.buf) - self.pos < _FOLGA_MINIMA and self._carregar():
+                continue
+            if self.pos >= len(self.buf):
+                raise ValueError("Fim inesperado do JSON")
+            return self.buf[self.pos]
+
+    def _esperar(self, char: str):
+        if self._proximo_char() != char:
+            raise ValueError(f"Esperado '{char}' na posição {self.pos}, encontrado '{self.buf[self.pos]}'")
+        self.pos += 1
+
+    # ---- primitivos ----
+
+    def _ler_string(self) -> str:
+        inicio = self.pos + 1
+        while True:
+            try:
+                valor, fim = scanstring(self.buf, inicio)
+                self.pos = fim
+                return valor
+            except ValueError:
+                deslocamento = inicio - self.pos
+                if not self._carregar():
+                    raise
+                inicio = self.pos + deslocamento
+
+    def _pular_string(self):
+        inicio = self.pos + 1
+        while True:
+            m = _FIM_STRING.match(self.buf, inicio)
+            if m:
+                self.pos = m.end()
+                return
+            deslocamento = inicio - self.pos
+            if not self._carregar():
+                raise ValueError("String não terminada")
+            inicio = self.pos + deslocamento
+
+    def _ler_primitivo(self):
+        m = _PRIMITIVO.match(self.buf, self.pos)
+        if not m:
+            raise ValueError(f"Valor JSON inválido na posição {self.pos}")
+        self.pos = m.end()
+        texto = m.group()
+        if texto == "true":
+            return True
+        if texto == "false":
+            return False
+        if texto == "null":
+            return None
+        if "." in texto or "e" in texto or "E" in texto:
+            return float(texto)
+        return int(texto)
+
+    # ---- navegação ----
+
+    def iterar_objeto(self):
+        """Gera as chaves do objeto atual; o valor de cada chave deve ser consumido por quem chama."""
+        self._esperar("{")
+        if self._proximo_char() == "}":
+            self.pos += 1
+            return
+        while True:
+            if self._proximo_char() != '"':
+                raise ValueError(f"Chave esperada na posição {self.pos}")
+            chave = self._ler_string()
+            self._esperar(":")
+            yield chave
+            char = self._proximo_char()
+            self.pos += 1
+            if char == "}":
+                return
+            if char != ",":
+                raise ValueError(f"Esperado ',' ou '}}' na posição {self.pos - 1}")
+
+    def iterar_array(self):
+        """Gera uma vez por elemento do array atual; o elemento deve ser consumido por quem chama."""
+        self._esperar("[")
+        if self._proximo_char() == "]":
+            self.pos += 1
+            return
+        while True:
+            yield
+            char = self._proximo_char()
+            self.pos += 1
+            if char == "]":
+                return
+            if char != ",":
+                raise ValueError(f"Esperado ',' ou ']' na posição {self.pos - 1}")
+
+    def ler_valor(self, ignorar=CHAVES_IGNORADAS):
+        """Materializa o próximo valor, descartando as chaves em ``ignorar`` em qualquer nível."""
+        char = self._proximo_char()
+        if char == "{":
+            objeto = {}
+            for chave in self.iterar_objeto():
+                if chave in ignorar:
+                    self.pular_valor()
+                else:
+                    objeto[chave] = self.ler_valor(ignorar)
+            return objeto
+        if char == "[":
+            return [self.ler_valor(ignorar) for _ in self.iterar_array()]
+        if char == '"':
+            return self._ler_string()
+        return self._ler_primitivo()
+
+    def pular_valor(self):
+        """Descarta o próximo valor sem decodificá-lo."""
+        char = self._proximo_char()
+        if char == '"':
+            self._pular_string()
+            return
+        if char not in "{[":
+            self._ler_primitivo()
+            return
+
+        profundidade = 0
+        while True:
+            m = _ESTRUTURAL.search(self.buf, self.pos)
+            if not m:
+                self.pos = len(self.buf)
+                if not self._carregar():
+                    raise ValueError("Fim inesperado do JSON")
+                continue
+            self.pos = m.start()
+            char = m.group()
+            if char == '"':
+                self._pular_string()
+                continue
+            self.pos += 1
+            profundidade += 1 if char in "{[" else -1
+            if profundidade == 0:
+                return
+
+
+def _iterar_tabela(leitor, ignorar, incluir_particoes):
+    tabela = {}
+    pendentes = []
+
+    def emitir(tipo, obj):
+        if "name" in tabela:
+            yield (tipo, tabela["name"], obj)
+        else:
+            # O nome da tabela costuma vir primeiro; se não vier, segura até conhecê-lo.
+            pendentes.append((tipo, obj))
+
+    for chave in leitor.iterar_objeto():
+        if chave == "columns" or chave == "measures":
+            tipo = "coluna" if chave == "columns" else "medida"
+            for _ in leitor.iterar_array():
+                yield from emitir(tipo, leitor.ler_valor(ignorar))
+        elif chave == "partitions" and incluir_particoes:
+            for _ in leitor.iterar_array():
+                yield from emitir("particao", leitor.ler_valor(ignorar))
+        elif chave in ignorar or chave == "partitions":
+            leitor.pular_valor()
+        else:
+            tabela[chave] = leitor.ler_valor(ignorar)
+
+    nome = tabela.setdefault("name", "Desconhecida")
+    for tipo, obj in pendentes:
+        yield (tipo, nome, obj)
+    yield ("tabela", nome, tabela)
+
+
+def iterar_modelo(caminho: str, ignorar=CHAVES_IGNORADAS, incluir_particoes: bool = False):
+    """
+    Percorre um Model.bim/DataModelSchema sem carregá-lo inteiro em memória.
+
+    Gera tuplas ``(tipo, nome_tabela, objeto)`` com ``tipo`` em ``"coluna"``,
+    ``"medida"``, ``"particao"`` (se ``incluir_particoes``), ``"tabela"`` (com as
+    propriedades escalares, emitida após seus itens) e ``"relacionamento"``
+    (``nome_tabela`` = ``None``). O pico de memória fica limitado ao maior item.
+
+    ``caminho`` também pode ser um fluxo de texto já aberto (ex.: entrada do zip).
+    """
+    if not isinstance(caminho, str):
+        yield from _iterar_fluxo(caminho, ignorar, incluir_particoes)
+        return
+    with abrir_texto_modelo(caminho) as fluxo:
+        yield from _iterar_fluxo(fluxo, ignorar, incluir_particoes)
+
+
+def _iterar_fluxo(fluxo, ignorar, incluir_particoes):
+    leitor = LeitorJSONIncremental(fluxo)
+    for chave in leitor.iterar_objeto():
+        if chave != "model":
+            leitor.pular_valor()
+            continue
+        for chave_modelo in leitor.iterar_objeto():
+            if chave_modelo == "tables":
+                for _ in leitor.iterar_array():
+                    yield from _iterar_tabela(leitor, ignorar, incluir_particoes)
+            elif chave_modelo == "relationships":
+                for _ in leitor.iterar_array():
+                    yield ("relacionamento", None, leitor.ler_valor(ignorar))
+            else:
+                leitor.pular_valor()
+
+
+def iterar_medidas(caminho: str):
+    """Gera as medidas do modelo, uma a uma, no mesmo formato de ``parse_measures``."""
+    for tipo, nome_tabela, obj in iterar_modelo(caminho):
+        if tipo != "medida":
+            continue
+        expressao = obj.get("expression", "")
+        yield {
+            "tabela": nome_tabela,
+            "nome": obj.get("name", "Sem nome"),
+            "expressao": "\n".join(expressao) if isinstance(expressao, list) else str(expressao),
+        }
+
+
+def carregar_modelo_enxuto(caminho, incluir_particoes: bool = True) -> dict:
+    """
+    Reconstrói o JSON do modelo (tabelas, colunas, medidas, partições e
+    relacionamentos) a partir da leitura incremental, sem as subárvores ignoradas.
+    """
+    tabelas = []
+    relacionamentos = []
+    itens = {"coluna": [], "medida": [], "particao": []}
+
+    for tipo, _, obj in iterar_modelo(caminho, incluir_particoes=incluir_particoes):
+        if tipo == "relacionamento":
+            relacionamentos.append(obj)
+        elif tipo == "tabela":
+            obj["columns"], obj["measures"] = itens["coluna"], itens["medida"]
+            if incluir_particoes:
+                obj["partitions"] = itens["particao"]
+            tabelas.append(obj)
+            itens = {"coluna": [], "medida": [], "particao": []}
+        else:
+            itens[tipo].append(obj)
+
+    return {"model": {"tables": tabelas, "relationships": relacionamentos}}
@@ -0,0 +1,292 @@
+import glob
+import json
+import os
+import textwrap
+from concurrent.futures import ProcessPoolExecutor
+
+from pbix_tools.visual_usage import indexar_layout, indexar_relatorio_pbir
+
+# Palavras-chave que iniciam a declaração de um objeto em TMDL.
+PALAVRAS_OBJETO = {
+    "model", "database", "table", "column", "measure", "partition", "hierarchy",
+    "level", "relationship", "annotation", "calculationGroup", "calculationItem",
+    "expression", "role", "tablePermission", "perspective", "culture", "dataSource",
+    "ref", "variation", "extendedProperty", "changedProperty", "queryGroup", "function",
+    "linguisticMetadata", "perspectiveTable", "perspectiveColumn", "perspectiveMeasure",
+}
+
+# Abaixo desse número de arquivos de tabela, o pool de processos custa mais do que economiza.
+LIMIAR_PARALELO = 16
+
+
+def _nivel(linha: str) -> int:
+    espacos = len(linha) - len(linha.lstrip("\t "))
+    prefixo = linha[:espacos]
+    return prefixo.count("\t") + prefixo.count(" ") // 4
+
+
+def _ler_nome(texto: str):
+    """Lê um nome TMDL (com ou sem aspas simples) e retorna ``(nome, resto)``."""
+    texto = texto.strip()
+    if texto.startswith("'"):
+        nome = []
+        i = 1
+        while i < len(texto):
+            if texto[i] == "'":
+                if texto[i + 1:i + 2] == "'":
+                    nome.append("'")
+                    i += 2
+                    continue
+                return "".join(nome), texto[i + 1:].strip()
+            nome.append(texto[i])
+            i += 1
+        return "".join(nome), ""
+    if "=" in texto:
+        nome, resto = texto.split("=", 1)
+        return nome.strip(), "=" + resto
+    return texto, ""
+
+
+def _valor(texto: str):
+    texto = texto.strip()
+    if texto == "true":
+        return True
+    if texto == "false":
+        return False
+    return texto
+
+
+def _ler_expressao(linhas, i, nivel, inicio):
+    """Lê uma expressão (na mesma linha, nas linhas mais indentadas seguintes ou entre ```)."""
+    if inicio.startswith("```"):
+        corpo = [inicio[3:]] if inicio[3:].strip() else []
+        while i < len(linhas) and linhas[i].strip() != "```":
+            corpo.append(linhas[i])
+            i += 1
+        return textwrap.dedent("\n".join(corpo)).strip(), i + 1
+
+    continuacao = []
+    while i < len(linhas):
+        linha = linhas[i]
+        if linha.strip() and _nivel(linha) <= nivel + 1:
+            break
+        continuacao.append(linha)
+        i += 1
+    while continuacao and not continuacao[-1].strip():
+        continuacao.pop()
+
+    partes = [inicio] if inicio else []
+    if continuacao:
+        partes.append(textwrap.dedent("\n".join(continuacao)))
+    return "\n".join(partes).strip(), i
+
+
+def parsear_tmdl(texto: str) -> list:
+    """
+    Converte um documento TMDL em uma árvore de nós
+    ``{"tipo", "nome", "expressao", "props", "filhos"}``.
+    """
+    linhas = texto.splitlines()
+    raiz = {"filhos": []}
+    pilha = [(-1, raiz)]
+    descricao = []
+    i = 0
+
+    while i < len(linhas):
+        linha = linhas[i]
+        conteudo = linha.strip()
+        i += 1
+        if not conteudo:
+            continue
+
+        nivel = _nivel(linha)
+        while pilha[-1][0] >= nivel:
+            pilha.pop()
+        pai = pilha[-1][1]
+
+        if conteudo.startswith("///"):
+            descricao.append(conteudo[3:].strip())
+            continue
+
+        partes = conteudo.split(None, 1)
+        if partes[0] in PALAVRAS_OBJETO and len(partes) > 1 and not partes[1].startswith(("=", ":")):
+            nome, resto = _ler_nome(partes[1])
+            no = {"tipo": partes[0], "nome": nome, "expressao": None, "props": {}, "filhos": []}
+            if descricao:
+                no["props"]["description"] = "\n".join(descricao)
+                descricao = []
+            if resto.startswith("="):
+                no["expressao"], i = _ler_expressao(linhas, i, nivel, resto[1:].strip())
+            pai["filhos"].append(no)
+            pilha.append((nivel, no))
+            continue
+
+        descricao = []
+        if "props" not in pai:
+            continue
+
+        chave = partes[0].rstrip(":")
+        if partes[0].endswith(":") or (len(partes) > 1 and partes[1].startswith(":")):
+            valor = conteudo.split(":", 1)[1]
+            pai["props"][chave] = _valor(valor)
+        elif len(partes) > 1 and partes[1].startswith("="):
+            pai["props"][chave], i = _ler_expressao(linhas, i, nivel, partes[1][1:].strip())
+        else:
+            pai["props"][chave] = True
+
+    return raiz["filhos"]
+
+
+def _dividir_referencia(texto: str):
+    """Separa uma referência ``Tabela.Coluna`` (nomes podem vir entre aspas simples)."""
+    texto = texto.strip()
+    if texto.startswith("'"):
+        tabela, resto = _ler_nome(texto)
+        resto = resto[1:] if resto.startswith(".") else resto
+    else:
+        tabela, _, resto = texto.partition(".")
+    coluna = _ler_nome(resto)[0] if resto.startswith("'") else resto.strip()
+    return tabela, coluna
+
+
+def _no_para_tabela(no: dict) -> dict:
+    tabela = {"name": no["nome"], **no["props"], "columns": [], "measures": [], "partitions": []}
+    for filho in no["filhos"]:
+        if filho["tipo"] == "column":
+            coluna = {"name": filho["nome"], **filho["props"]}
+            if filho["expressao"]:
+                coluna["type"] = "calculated"
+                coluna["expression"] = filho["expressao"]
+            tabela["columns"].append(coluna)
+        elif filho["tipo"] == "measure":
+            tabela["measures"].append({"name": filho["nome"], "expression": filho["expressao"] or "", **filho["props"]})
+        elif filho["tipo"] == "partition":
+            props = dict(filho["props"])
+            tabela["partitions"].append({
+                "name": filho["nome"],
+                "mode": props.pop("mode", None),
+                "source": {"type": filho["expressao"], "expression": props.pop("source", "")},
+                **props,
+            })
+    return tabela
+
+
+def _no_para_relacionamento(no: dict) -> dict:
+    props = dict(no["props"])
+    relacionamento = {"name": no["nome"]}
+    for lado in ("from", "to"):
+        referencia = props.pop(f"{lado}Column", "")
+        relacionamento[f"{lado}Table"], relacionamento[f"{lado}Column"] = _dividir_referencia(referencia)
+    relacionamento.update(props)
+    return relacionamento
+
+
+def parsear_arquivo_tmdl(caminho: str) -> dict:
+    """Lê um arquivo .tmdl e retorna suas tabelas e relacionamentos no formato do Model.bim."""
+    with open(caminho, "r", encoding="utf-8-sig") as f:
+        nos = parsear_tmdl(f.read())
+    return {
+        "tables": [_no_para_tabela(n) for n in nos if n["tipo"] == "table"],
+        "relationships": [_no_para_relacionamento(n) for n in nos if n["tipo"] == "relationship"],
+    }
+
+
+def localizar_modelo_semantico(caminho: str) -> str | None:
+    """Localiza a pasta ``*.SemanticModel``/``*.Dataset`` a partir de um .pbip ou da pasta do projeto."""
+    if os.path.isfile(caminho):
+        caminho = os.path.dirname(os.path.abspath(caminho))
+    if os.path.basename(caminho) == "definition":
+        return os.path.dirname(caminho)
+    if caminho.endswith((".SemanticModel", ".Dataset")):
+        return caminho
+    candidatos = sorted(glob.glob(os.path.join(caminho, "*.SemanticModel")) + glob.glob(os.path.join(caminho, "*.Dataset")))
+    return candidatos[0] if candidatos else None
+
+
+def _carregar_relatorio_projeto(pasta_projeto: str) -> tuple:
+    """
+    ``(layout, visuais)`` do relatório do projeto.
+
+    Lê o ``report.json`` do formato PBIR-Legacy ou, no PBIR, os visuais de
+    ``definition/pages``; nesse caso não há layout. Sem relatório legível,
+    ``visuais`` é ``None``: o uso em visuais é desconhecido, e não vazio.
+    """
+    for pasta_relatorio in sorted(glob.glob(os.path.join(pasta_projeto, "*.Report"))):
+        caminho = os.path.join(pasta_relatorio, "report.json")
+        if os.path.isfile(caminho):
+            try:
+                with open(caminho, "r", encoding="utf-8-sig") as f:
+                    layout = json.load(f)
+                return layout, indexar_layout(layout)
+            except Exception as e:
+                print(f"⚠️ Erro ao carregar layout {caminho}: {e}")
+        pasta_definicao = os.path.join(pasta_relatorio, "definition")
+        if os.path.isdir(os.path.join(pasta_definicao, "pages")):
+            print(f"📄 Lendo relatório PBIR em: {pasta_definicao}")
+            return None, indexar_relatorio_pbir(pasta_definicao)
+    print("⚠️ Relatório do projeto não encontrado: o uso de medidas em visuais não será avaliado.")
+    return None, None
+
+
+def carregar_definicao_tmdl(pasta_definicao: str, processos=None) -> dict:
+    """
+    Carrega uma pasta ``definition/`` TMDL no mesmo formato do Model.bim.
+
+    Os arquivos de ``tables/`` são parseados em paralelo quando são muitos.
+    """
+    arquivos_tabelas = sorted(glob.glob(os.path.join(pasta_definicao, "tables", "*.tmdl")))
+    arquivos_gerais = [
+        caminho for caminho in sorted(glob.glob(os.path.join(pasta_definicao, "*.tmdl")))
+        if os.path.basename(caminho) != "database.tmdl"
+    ]
+
+    if len(arquivos_tabelas) >= LIMIAR_PARALELO:
+        with ProcessPoolExecutor(max_workers=processos) as pool:
+            partes = list(pool.map(parsear_arquivo_tmdl, arquivos_tabelas, chunksize=8))
+    else:
+        partes = [parsear_arquivo_tmdl(c) for c in arquivos_tabelas]
+    partes += [parsear_arquivo_tmdl(c) for c in arquivos_gerais]
+
+    return {
+        "model": {
+            "tables": [t for p in partes for t in p["tables"]],
+            "relationships": [r for p in partes for r in p["relationships"]],
+        }
+    }
+
+
+def carregar_projeto_pbip(caminho: str) -> dict | None:
+    """
+    Carrega um projeto do Power BI (PBIP) direto da pasta, sem passar por .pbix.
+
+    Aceita o arquivo .pbip, a pasta do projeto ou a pasta ``*.SemanticModel``.
+    Suporta modelos em TMDL (``definition/``) e em TMSL (``model.bim``).
+    Retorna o mesmo formato de ``carregar_modelo_pbix`` e, em ``visuais``, o
+    ``IndiceVisuais`` do relatório (``None`` se o projeto não tiver um legível).
+    """
+    pasta_modelo = localizar_modelo_semantico(caminho)
+    if not pasta_modelo:
+        print("❌ Pasta .SemanticModel não encontrada no projeto.")
+        return None
+
+    pasta_definicao = os.path.join(pasta_modelo, "definition")
+    model_bim = os.path.join(pasta_modelo, "model.bim")
+    if os.path.isdir(pasta_definicao):
+        print(f"📄 Lendo modelo TMDL em: {pasta_definicao}")
+        model_data = carregar_definicao_tmdl(pasta_definicao)
+    elif os.path.isfile(model_bim):
+        print(f"📄 Lendo modelo TMSL em: {model_bim}")
+        with open(model_bim, "r", encoding="utf-8-sig") as f:
+            model_data = json.load(f)
+    else:
+        print("❌ Nem definition/ nem model.bim encontrados no modelo semântico.")
+        return None
+
+    layout, visuais = _carregar_relatorio_projeto(os.path.dirname(pasta_modelo))
+    return {
+        "model": model_data,
+        "layout": layout,
+        "visuais": visuais,
+        "pasta_extraida": None,
+        "manifesto": None,
+    }
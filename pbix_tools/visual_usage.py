@@ -0,0 +1,310 @@
+import glob
+import json
+import os
+from collections import defaultdict
+
+MEDIDA = "medida"
+COLUNA = "coluna"
+
+# Partes do prototypeQuery que referenciam campos do modelo.
+PARTES_CONSULTA = ("Select", "Where", "OrderBy")
+
+# Página e visual sob os quais ficam os filtros que não pertencem a um visual.
+PAGINA_RELATORIO = "(relatório)"
+VISUAL_FILTROS = "(filtros)"
+
+
+def _carregar_se_texto(valor):
+    if isinstance(valor, str):
+        try:
+            return json.loads(valor)
+        except ValueError:
+            return {}
+    return valor if isinstance(valor, dict) else {}
+
+
+def _entidade(expressao, aliases):
+    """Tabela de uma ``Expression`` com ``SourceRef`` (por ``Entity`` ou pelo alias do ``From``)."""
+    origem = (expressao or {}).get("SourceRef", {}) if isinstance(expressao, dict) else {}
+    return origem.get("Entity") or aliases.get(origem.get("Source"))
+
+
+def _campos(no, aliases, encontrados):
+    """
+    Percorre uma parte da consulta coletando ``(tipo, tabela, nome)`` de Measure/Column.
+
+    Níveis de hierarquia (``HierarchyLevel``) contam como uso de uma coluna da
+    tabela da hierarquia: a coluna de data, nas hierarquias automáticas de data
+    (``PropertyVariationSource``), ou a de mesmo nome do nível, nas hierarquias do
+    usuário. Agregações (``Aggregation``) e demais invólucros são percorridos até o campo.
+    """
+    pilha = [no]
+    while pilha:
+        atual = pilha.pop()
+        if isinstance(atual, list):
+            pilha.extend(atual)
+            continue
+        if not isinstance(atual, dict):
+            continue
+        for chave, tipo in (("Measure", MEDIDA), ("Column", COLUNA)):
+            campo = atual.get(chave)
+            if isinstance(campo, dict) and "Property" in campo:
+                tabela = _entidade(campo.get("Expression"), aliases)
+                if tabela:
+                    encontrados.add((tipo, tabela, campo["Property"]))
+        nivel = atual.get("HierarchyLevel")
+        if isinstance(nivel, dict) and "Level" in nivel:
+            hierarquia = (nivel.get("Expression") or {}).get("Hierarchy") or {}
+            origem = hierarquia.get("Expression") or {}
+            variacao = origem.get("PropertyVariationSource")
+            if isinstance(variacao, dict) and "Property" in variacao:
+                tabela, coluna = _entidade(variacao.get("Expression"), aliases), variacao["Property"]
+            else:
+                tabela, coluna = _entidade(origem, aliases), nivel["Level"]
+            if tabela:
+                encontrados.add((COLUNA, tabela, coluna))
+        pilha.extend(v for v in atual.values() if isinstance(v, (dict, list)))
+
+
+def referencias_da_consulta(consulta: dict) -> set:
+    """
+    Extrai as referências exatas ``(tipo, tabela, nome)`` de um ``prototypeQuery``.
+
+    Os aliases do ``From`` são resolvidos para o nome da tabela; agregações,
+    filtros (``Where``) e ordenações (``OrderBy``) são percorridos até o campo.
+    """
+    if not isinstance(consulta, dict):
+        return set()
+    aliases = {
+        origem.get("Name"): origem.get("Entity")
+        for origem in consulta.get("From", []) if isinstance(origem, dict)
+    }
+    encontrados = set()
+    for parte in PARTES_CONSULTA:
+        _campos(consulta.get(parte, []), aliases, encontrados)
+    return encontrados
+
+
+def referencias_dos_filtros(filtros) -> set:
+    """
+    Extrai as referências ``(tipo, tabela, nome)`` de uma lista de filtros.
+
+    Aceita o texto JSON de ``filters`` do Report/Layout (relatório, seções e
+    visualContainers) e o ``filterConfig`` do PBIR. Cada filtro traz o campo em
+    ``expression``/``field`` e a condição em ``filter``, com aliases próprios no ``From``.
+    """
+    if isinstance(filtros, str):
+        try:
+            filtros = json.loads(filtros)
+        except ValueError:
+            return set()
+    if isinstance(filtros, dict):
+        filtros = filtros.get("filters", [])
+    encontrados = set()
+    for filtro in filtros if isinstance(filtros, list) else []:
+        if not isinstance(filtro, dict):
+            continue
+        condicao = filtro.get("filter") if isinstance(filtro.get("filter"), dict) else {}
+        aliases = {
+            origem.get("Name"): origem.get("Entity")
+            for origem in condicao.get("From", []) if isinstance(origem, dict)
+        }
+        _campos(filtro, aliases, encontrados)
+    return encontrados
+
+
+def _consulta_do_visual(visual: dict):
+    """Localiza o ``prototypeQuery`` em um visualContainer do layout ou em um arquivo do pbi-tools."""
+    if "prototypeQuery" in visual:
+        return visual["prototypeQuery"]
+    config = _carregar_se_texto(visual.get("config", visual))
+    return config.get("singleVisual", {}).get("prototypeQuery")
+
+
+class IndiceVisuais:
+    """
+    Índice de uso de medidas e colunas nos visuais do relatório.
+
+    Guarda, para cada visual, as referências exatas ``(tipo, tabela, nome)`` do
+    seu ``prototypeQuery`` e dos seus filtros (os da página ficam sob o visual
+    ``VISUAL_FILTROS``; os do relatório, também na página ``PAGINA_RELATORIO``)
+    e os índices inversos para consultas O(1): por
+    ``(tabela, nome)`` e, para medidas, só pelo nome (únicos no modelo).
+    Comparações ignoram maiúsculas/minúsculas, como no DAX.
+
+    Iterar o índice devolve os nomes (em minúsculas) de tudo que é usado.
+    """
+
+    def __init__(self):
+        self.referencias = []                      # (pagina, visual, tipo, tabela, nome)
+        self.por_visual = defaultdict(set)         # (pagina, visual) -> {(tipo, tabela, nome)}
+        self._por_campo = defaultdict(set)         # (tabela, nome) em minúsculas -> {(pagina, visual)}
+        self._medidas = defaultdict(set)           # nome da medida em minúsculas -> {(pagina, visual)}
+        self._nomes = set()
+
+    def adicionar(self, pagina: str, visual: str, tipo: str, tabela: str, nome: str):
+        """Registra que o ``visual`` da ``pagina`` usa o campo ``tabela[nome]``."""
+        referencia = (tipo, tabela, nome)
+        if referencia in self.por_visual[(pagina, visual)]:
+            return
+        self.referencias.append((pagina, visual, tipo, tabela, nome))
+        self.por_visual[(pagina, visual)].add(referencia)
+        self._por_campo[(tabela.lower(), nome.lower())].add((pagina, visual))
+        if tipo == MEDIDA:
+            self._medidas[nome.lower()].add((pagina, visual))
+        self._nomes.add(nome.lower())
+
+    def adicionar_consulta(self, pagina: str, visual: str, consulta: dict):
+        for tipo, tabela, nome in sorted(referencias_da_consulta(consulta)):
+            self.adicionar(pagina, visual, tipo, tabela, nome)
+
+    def adicionar_filtros(self, pagina: str, visual: str, filtros):
+        for tipo, tabela, nome in sorted(referencias_dos_filtros(filtros)):
+            self.adicionar(pagina, visual, tipo, tabela, nome)
+
+    # === Consultas ===
+
+    def medida_usada(self, nome: str) -> bool:
+        return nome.lower() in self._medidas
+
+    def campo_usado(self, tabela: str, nome: str) -> bool:
+        return (tabela.lower(), nome.lower()) in self._por_campo
+
+    def visuais_com_medida(self, nome: str) -> list:
+        """``(pagina, visual)`` de todos os visuais que exibem a medida."""
+        return sorted(self._medidas.get(nome.lower(), ()))
+
+    def visuais_com_campo(self, tabela: str, nome: str) -> list:
+        return sorted(self._por_campo.get((tabela.lower(), nome.lower()), ()))
+
+    def medidas_usadas(self) -> set:
+        return set(self._medidas)
+
+    def __contains__(self, nome) -> bool:
+        return str(nome).lower() in self._nomes
+
+    def __iter__(self):
+        return iter(self._nomes)
+
+    def __len__(self) -> int:
+        return len(self._nomes)
+
+    # === Serialização (cache de extrações) ===
+
+    def para_lista(self) -> list:
+        return [list(r) for r in self.referencias]
+
+    @classmethod
+    def de_lista(cls, referencias) -> "IndiceVisuais":
+        indice = cls()
+        for pagina, visual, tipo, tabela, nome in referencias or []:
+            indice.adicionar(pagina, visual, tipo, tabela, nome)
+        return indice
+
+
+def indexar_layout(layout: dict) -> IndiceVisuais:
+    """
+    Monta o índice numa única passada pelas seções e visualContainers do Report/Layout.
+
+    Além do ``prototypeQuery`` de cada visual, indexa os ``filters`` do relatório,
+    de cada seção e de cada visualContainer: um campo usado só num filtro também está em uso.
+    """
+    indice = IndiceVisuais()
+    layout = layout or {}
+    indice.adicionar_filtros(PAGINA_RELATORIO, VISUAL_FILTROS, layout.get("filters"))
+    for secao in layout.get("sections", []):
+        pagina = secao.get("displayName") or secao.get("name", "")
+        indice.adicionar_filtros(pagina, VISUAL_FILTROS, secao.get("filters"))
+        for posicao, container in enumerate(secao.get("visualContainers", [])):
+            try:
+                config = _carregar_se_texto(container.get("config", {}))
+                visual = config.get("name") or f"visual_{posicao}"
+                indice.adicionar_consulta(pagina, visual, config.get("singleVisual", {}).get("prototypeQuery"))
+                indice.adicionar_filtros(pagina, visual, container.get("filters"))
+            except Exception as e:
+                print(f"⚠️ Erro ao analisar visual da página {pagina}: {e}")
+    return indice
+
+
+def _ler_filtros(caminho: str):
+    if not os.path.isfile(caminho):
+        return None
+    try:
+        with open(caminho, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"⚠️ Erro lendo filtros {caminho}: {e}")
+        return None
+
+
+def indexar_visuais_extraidos(manifesto: dict) -> IndiceVisuais:
+    """
+    Monta o índice a partir dos arquivos de visuais listados no manifesto do pbi-tools.
+
+    Os ``filters.json`` do relatório, de cada seção e de cada visual entram como
+    no ``indexar_layout``.
+    """
+    indice = IndiceVisuais()
+    if manifesto.get("pasta"):
+        indice.adicionar_filtros(PAGINA_RELATORIO, VISUAL_FILTROS,
+                                 _ler_filtros(os.path.join(manifesto["pasta"], "Report", "filters.json")))
+    for secao in manifesto["secoes"]:
+        pagina = secao["nome"]
+        indice.adicionar_filtros(pagina, VISUAL_FILTROS, _ler_filtros(os.path.join(secao["caminho"], "filters.json")))
+        for caminho in secao["visuais"]:
+            # .../visualContainers/<visual>/config.json: o visual é a pasta do arquivo.
+            visual = os.path.basename(os.path.dirname(caminho))
+            try:
+                with open(caminho, "r", encoding="utf-8") as f:
+                    conteudo = json.load(f)
+            except Exception as e:
+                print(f"⚠️ Erro lendo visual {os.path.basename(caminho)}: {e}")
+                continue
+            if os.path.basename(caminho) == "filters.json":
+                indice.adicionar_filtros(pagina, visual, conteudo)
+                continue
+            for item in conteudo if isinstance(conteudo, list) else [conteudo]:
+                if isinstance(item, dict):
+                    indice.adicionar_consulta(pagina, visual, _consulta_do_visual(item))
+    return indice
+
+
+def _ler_json_pbir(caminho: str):
+    try:
+        with open(caminho, "r", encoding="utf-8-sig") as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"⚠️ Erro lendo {caminho}: {e}")
+        return None
+
+
+def indexar_relatorio_pbir(pasta_definicao: str) -> IndiceVisuais:
+    """
+    Monta o índice a partir de um relatório no formato PBIR (``*.Report/definition/``).
+
+    Cada visual fica em ``pages/<página>/visuals/<visual>/visual.json``; os campos
+    vêm da ``query`` do visual, já com o nome da tabela em ``SourceRef.Entity``, e
+    dos filtros (``filterConfig``) do visual, da página (``page.json``) e do
+    relatório (``report.json``), como no ``indexar_layout``.
+    """
+    indice = IndiceVisuais()
+    caminho_relatorio = os.path.join(pasta_definicao, "report.json")
+    relatorio = _ler_json_pbir(caminho_relatorio) if os.path.isfile(caminho_relatorio) else None
+    if isinstance(relatorio, dict):
+        indice.adicionar_filtros(PAGINA_RELATORIO, VISUAL_FILTROS, relatorio.get("filterConfig"))
+    for pasta_pagina in sorted(glob.glob(os.path.join(pasta_definicao, "pages", "*", ""))):
+        pagina = os.path.basename(os.path.dirname(pasta_pagina))
+        dados_pagina = _ler_json_pbir(os.path.join(pasta_pagina, "page.json")) or {}
+        pagina = dados_pagina.get("displayName") or pagina
+        indice.adicionar_filtros(pagina, VISUAL_FILTROS, dados_pagina.get("filterConfig"))
+        for caminho in sorted(glob.glob(os.path.join(pasta_pagina, "visuals", "*", "visual.json"))):
+            dados = _ler_json_pbir(caminho)
+            if not isinstance(dados, dict):
+                continue
+            visual = dados.get("name") or os.path.basename(os.path.dirname(caminho))
+            encontrados = set()
+            _campos((dados.get("visual") or {}).get("query"), {}, encontrados)
+            for tipo, tabela, nome in sorted(encontrados):
+                indice.adicionar(pagina, visual, tipo, tabela, nome)
+            indice.adicionar_filtros(pagina, visual, dados.get("filterConfig"))
+    return indice
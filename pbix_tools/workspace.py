@@ -0,0 +1,157 @@
+import atexit
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+# Todos os artefatos temporários (uploads e pastas do pbi-tools) ficam sob esta
+# raiz, configurável via ``PBIX_WORKSPACE``, com limites de idade e de tamanho.
+RAIZ_WORKSPACE = os.getenv("PBIX_WORKSPACE", os.path.join(tempfile.gettempdir(), "pbixai"))
+IDADE_MAXIMA_SEGUNDOS = float(os.getenv("PBIX_WORKSPACE_MAX_HORAS", "24")) * 3600
+LIMITE_WORKSPACE_BYTES = int(os.getenv("PBIX_WORKSPACE_MAX_MB", "2048")) * 1024 * 1024
+# Itens modificados há menos que isto estão em uso (por este ou por outro processo
+# que compartilha a raiz) e nunca são removidos pela limpeza, nem pelo limite de tamanho.
+CARENCIA_SEGUNDOS = float(os.getenv("PBIX_WORKSPACE_CARENCIA_MIN", "30")) * 60
+TAMANHO_BLOCO_UPLOAD = 1024 * 1024
+
+
+def _uso(caminho: str) -> tuple[float, int]:
+    """``(última modificação, tamanho)`` de um arquivo ou, para pastas, de tudo o que há dentro."""
+    estado = os.stat(caminho)
+    if not os.path.isdir(caminho):
+        return estado.st_mtime, estado.st_size
+    ultima, total = estado.st_mtime, 0
+    for raiz, pastas, arquivos in os.walk(caminho):
+        for nome in pastas + arquivos:
+            try:
+                estado = os.stat(os.path.join(raiz, nome))
+            except OSError:
+                continue
+            ultima = max(ultima, estado.st_mtime)
+            if nome in arquivos:
+                total += estado.st_size
+    return ultima, total
+
+
+def _remover(caminho: str):
+    try:
+        if os.path.isdir(caminho):
+            shutil.rmtree(caminho, ignore_errors=True)
+        elif os.path.exists(caminho):
+            os.remove(caminho)
+    except OSError as e:
+        print(f"⚠️ Não foi possível remover {caminho}: {e}")
+
+
+class AreaDeTrabalho:
+    """
+    Dona de todos os arquivos temporários da análise.
+
+    Cada upload e cada extração ganha um caminho próprio, prefixado pelo hash
+    do conteúdo: sessões e processos que recebem o mesmo arquivo ao mesmo
+    tempo não apagam o trabalho uns dos outros. ``limpar`` remove o que passou
+    da idade máxima e, em seguida, os itens menos usados até caber no limite,
+    sempre poupando o que foi modificado dentro do período de ``carencia``.
+    """
+
+    def __init__(self, raiz: str = RAIZ_WORKSPACE, idade_maxima: float = IDADE_MAXIMA_SEGUNDOS,
+                 limite_bytes: int = LIMITE_WORKSPACE_BYTES, carencia: float = CARENCIA_SEGUNDOS):
+        self.raiz = raiz
+        self.idade_maxima = idade_maxima
+        self.limite_bytes = limite_bytes
+        self.carencia = carencia
+        self.pasta_uploads = os.path.join(raiz, "uploads")
+        self.pasta_extracoes = os.path.join(raiz, "extracoes")
+        self._trava = threading.Lock()
+        os.makedirs(self.pasta_uploads, exist_ok=True)
+        os.makedirs(self.pasta_extracoes, exist_ok=True)
+
+    def guardar_upload(self, arquivo, sufixo: str = ".pbix",
+                       tamanho_bloco: int = TAMANHO_BLOCO_UPLOAD) -> tuple[str, str]:
+        """
+        Grava um upload em disco em blocos, calculando o SHA-256 na mesma passada.
+
+        ``arquivo`` é qualquer objeto com ``read(n)``; o conteúdo nunca é lido
+        inteiro para a memória. Retorna ``(caminho, hash)``; o caminho é
+        exclusivo desta chamada, para que ``liberar`` não remova o arquivo de
+        outra sessão que enviou o mesmo conteúdo.
+        """
+        sha = hashlib.sha256()
+        fd, temporario = tempfile.mkstemp(dir=self.pasta_uploads, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as destino:
+                for bloco in iter(lambda: arquivo.read(tamanho_bloco), b""):
+                    sha.update(bloco)
+                    destino.write(bloco)
+        except Exception:
+            _remover(temporario)
+            raise
+
+        chave = sha.hexdigest()
+        unico = os.path.basename(temporario)[:-len(".tmp")]
+        caminho = os.path.join(self.pasta_uploads, f"{chave}-{unico}{sufixo}")
+        os.replace(temporario, caminho)
+        return caminho, chave
+
+    def pasta_extracao(self, chave: str) -> str:
+        """Pasta vazia e exclusiva desta chamada para a extração do pbi-tools do arquivo de hash ``chave``."""
+        return tempfile.mkdtemp(prefix=f"{chave}-", dir=self.pasta_extracoes)
+
+    def liberar(self, caminho: str | None):
+        """Remove um artefato que não será mais usado; caminhos fora da área de trabalho são ignorados."""
+        if not caminho:
+            return
+        caminho, raiz = os.path.abspath(caminho), os.path.abspath(self.raiz)
+        # commonpath, e não startswith: "/tmp/pbixai2" não está dentro de "/tmp/pbixai".
+        if caminho != raiz and os.path.commonpath([caminho, raiz]) == raiz:
+            _remover(caminho)
+
+    def limpar(self):
+        """
+        Aplica os limites de idade e de tamanho total à área de trabalho.
+
+        A trava só ordena as limpezas deste processo; entre processos, a
+        proteção é a carência: um item com qualquer arquivo modificado há menos
+        de ``carencia`` segundos é considerado em uso e fica, mesmo que o
+        total passe do limite.
+        """
+        with self._trava:
+            itens = []
+            for pasta in (self.pasta_uploads, self.pasta_extracoes):
+                try:
+                    with os.scandir(pasta) as entradas:
+                        caminhos = [e.path for e in entradas]
+                except OSError:
+                    continue
+                for caminho in caminhos:
+                    try:
+                        itens.append((*_uso(caminho), caminho))
+                    except OSError:
+                        continue
+
+            agora = time.time()
+            total = sum(tamanho for _, tamanho, _ in itens)
+            for ultima, tamanho, caminho in sorted(itens):
+                idade = agora - ultima
+                if idade < self.carencia:
+                    continue
+                if idade > self.idade_maxima or total > self.limite_bytes:
+                    _remover(caminho)
+                    total -= tamanho
+
+    def instalar_limpeza_ao_sair(self):
+        """Registra a limpeza para o encerramento do processo (CLI ou servidor Streamlit)."""
+        atexit.register(self.limpar)
+
+
+_AREA_PADRAO = None
+
+
+def obter_area_de_trabalho() -> AreaDeTrabalho:
+    """Área de trabalho compartilhada pelo processo."""
+    global _AREA_PADRAO
+    if _AREA_PADRAO is None:
+        _AREA_PADRAO = AreaDeTrabalho()
+    return _AREA_PADRAO
@@ -0,0 +1,67 @@
+import json
+import zipfile
+
+import pytest
+
+from pbix_tools import cache
+from pbix_tools.visual_usage import IndiceVisuais
+
+MODELO = {
+    "model": {
+        "tables": [{
+            "name": "Vendas",
+            "columns": [{"name": "Valor", "annotations": [{"name": "a"}]}],
+            "measures": [{"name": "Total", "expression": "SUM('Vendas'[Valor])"}],
+            "partitions": [{"name": "p", "source": {"type": "m", "expression": "let x = 1 in x"}}],
+        }],
+    },
+}
+
+
+@pytest.fixture(autouse=True)
+def _memoria_limpa(monkeypatch):
+    monkeypatch.setattr(cache, "_ENTRADAS_EM_MEMORIA", cache.OrderedDict())
+
+
+def _pbit(tmp_path, nome="modelo.pbit"):
+    caminho = tmp_path / nome
+    with zipfile.ZipFile(caminho, "w") as pacote:
+        pacote.writestr("DataModelSchema", json.dumps(MODELO).encode("utf-16-le"))
+        pacote.writestr("Report/Layout", json.dumps({"sections": []}).encode("utf-16-le"))
+    return str(caminho)
+
+
+def test_entrada_sem_particoes_nem_layout(tmp_path):
+    diretorio = str(tmp_path / "cache")
+    entrada = cache.carregar_pbix_com_cache(_pbit(tmp_path), diretorio=diretorio)
+    tabela = entrada["model"]["model"]["tables"][0]
+    assert set(entrada) == {"hash", "model", "visuais"}
+    assert "partitions" not in tabela and tabela["columns"] == [{"name": "Valor"}]
+
+    # A leitura do disco traz exatamente o mesmo conteúdo.
+    cache._ENTRADAS_EM_MEMORIA.clear()
+    relida = cache.obter_extracao(entrada["hash"], diretorio)
+    assert relida["model"] == entrada["model"] and relida["versao"] == cache.VERSAO_CACHE
+
+
+def test_camada_em_memoria_limitada_por_bytes():
+    for chave, tamanho in (("a", 40), ("b", 40), ("c", 40)):
+        cache._lembrar(chave, {"hash": chave, "visuais": IndiceVisuais()}, tamanho, limite_bytes=100)
+    assert list(cache._ENTRADAS_EM_MEMORIA) == ["b", "c"]
+
+    # Uma entrada maior que o limite fica sozinha, em vez de não ficar nenhuma.
+    cache._lembrar("grande", {"hash": "grande"}, 500, limite_bytes=100)
+    assert list(cache._ENTRADAS_EM_MEMORIA) == ["grande"]
+
+
+def test_acerto_em_memoria_atualiza_a_ordem_de_remocao_do_disco(tmp_path):
+    diretorio = str(tmp_path / "cache")
+    for chave in ("quente", "fria"):
+        cache.salvar_extracao(chave, {"hash": chave, "model": {}, "visuais": IndiceVisuais()}, diretorio)
+    caminhos = {chave: cache._caminho_entrada(chave, diretorio) for chave in ("quente", "fria")}
+    for posicao, chave in enumerate(("quente", "fria")):
+        cache.os.utime(caminhos[chave], (1_000_000 + posicao, 1_000_000 + posicao))
+
+    assert cache.obter_extracao("quente", diretorio)["hash"] == "quente"  # servida da memória
+    cache.limitar_cache(diretorio, cache.os.path.getsize(caminhos["quente"]))
+    assert cache.os.path.exists(caminhos["quente"]) and not cache.os.path.exists(caminhos["fria"])
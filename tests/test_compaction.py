@@ -0,0 +1,54 @@
+import pytest
+
+from dax_analyzer.compaction import compactar_expressao, estimar_tokens, minificar_dax, truncar_no_orcamento
+from dax_analyzer.lexer import COMENTARIO, tokenizar
+
+
+def _valores(expressao):
+    return [t.valor for t in tokenizar(expressao) if t.tipo != COMENTARIO]
+
+
+@pytest.mark.parametrize("expressao", [
+    "x = -1 - -2",
+    "[A] / /* divisor */ [B]",
+    "1 / / 2",
+    "[A] / *[B]",
+    "[A] - /* x */ -[B]",
+    "1 -\n-2",
+])
+def test_minificar_nao_cria_comentarios(expressao):
+    minificada = minificar_dax(expressao)
+    assert not any(t.tipo == COMENTARIO for t in tokenizar(minificada))
+    assert _valores(minificada) == _valores(expressao)
+
+
+def test_minificar_remove_comentarios_e_indentacao():
+    expressao = """
+    // antiga
+    -- CALCULATE(SUM(x))
+    VAR   _total =
+            SUM ( 'Fato'[Valor] )   /* soma */
+    RETURN
+        _total
+    """
+    assert minificar_dax(expressao) == "VAR _total=\nSUM('Fato'[Valor])\nRETURN\n_total"
+
+
+def test_minificar_encolhe_listas_longas():
+    minificada = minificar_dax('F[c] IN { "a", "b", "c", "d", "e", "f", "g" }')
+    assert minificada == 'F[c] IN{"a","b","c",… +4 itens}'
+    assert minificar_dax("F[c] IN {1, 2}") == "F[c] IN{1,2}"
+
+
+def test_strings_ficam_intactas():
+    assert minificar_dax('[A] & "  --  /* não é comentário */"') == '[A]&"  --  /* não é comentário */"'
+
+
+def test_truncar_respeita_orcamento_e_mantem_pontas():
+    texto = "\n".join(f"VAR v{i}=SUM(F[c{i}])" for i in range(200)) + "\nRETURN v0"
+    truncado = truncar_no_orcamento(texto, 60)
+    assert truncado.startswith("VAR v0=")
+    assert truncado.endswith("RETURN v0")
+    assert "caracteres omitidos" in truncado
+    assert estimar_tokens(truncado) <= 60 + 10
+    assert compactar_expressao("SUM(F[c])", 60) == "SUM(F[c])"
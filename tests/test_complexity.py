@@ -0,0 +1,31 @@
+from dax_analyzer.complexity import classificar_por_metricas, metricas_complexidade
+
+
+def test_variancia_nao_conta_como_variavel():
+    metricas = metricas_complexidade("VAR.P('Fato'[Valor]) + VAR.S('Fato'[Valor])")
+    assert metricas["variaveis"] == 0
+    assert metricas["funcoes"] == 2
+    assert classificar_por_metricas(metricas) == "Simples"
+
+
+def test_variaveis_e_ramificacoes_tornam_avancada():
+    metricas = metricas_complexidade("VAR x = [Vendas]\nRETURN IF(x > 0, x, BLANK())")
+    assert metricas["variaveis"] == 1 and metricas["ramificacoes"] == 1
+    assert classificar_por_metricas(metricas) == "Avançada"
+
+
+def test_texto_em_strings_comentarios_e_nomes_e_ignorado():
+    expressao = '[Variance] & "VAR IF(" // CALCULATE(SUMX(\n'
+    metricas = metricas_complexidade(expressao)
+    assert metricas == {**metricas, "variaveis": 0, "funcoes": 0, "calculates": 0, "referencias": 1}
+    assert classificar_por_metricas(metricas) == "Simples"
+
+
+def test_profundidade_e_categorias():
+    metricas = metricas_complexidade(
+        "CALCULATE(SUMX(FILTER(ALL('D'[Ano]), 'D'[Ano] > 1), RELATED('P'[Peso])), KEEPFILTERS('D'[Mes] = 1))"
+    )
+    assert metricas["profundidade"] == 4
+    assert (metricas["calculates"], metricas["iteradores"], metricas["modificadores_filtro"],
+            metricas["relacionais"]) == (1, 2, 2, 1)
+    assert classificar_por_metricas(metricas) == "Avançada"
@@ -0,0 +1,82 @@
+import random
+
+from dax_analyzer.dependencies import GrafoDependencias
+
+
+def _medida(nome, expressao, tabela="T"):
+    return {"nome": nome, "expressao": expressao, "tabela": tabela}
+
+
+def test_fecho_transitivo_nos_dois_sentidos():
+    grafo = GrafoDependencias([
+        _medida("A", "[B] + [C]"), _medida("B", "[D]"), _medida("C", "[D] * 2"), _medida("D", "SUM(T[x])"),
+    ])
+    assert grafo.dependencias("A") == ["B", "C"]
+    assert grafo.dependencias("a", transitivas=True) == ["B", "C", "D"]
+    assert grafo.dependentes("D", transitivas=True) == ["A", "B", "C"]
+    assert grafo.alcancaveis(["B"]) == {"b", "d"}
+    assert grafo.ordem_topologica().index("D") < grafo.ordem_topologica().index("B") < grafo.ordem_topologica().index("A")
+
+
+def test_colunas_e_referencias_de_outra_tabela_nao_sao_arestas():
+    grafo = GrafoDependencias([
+        _medida("Total", "SUM('Vendas'[Valor]) + 'Vendas'[Meta] + 'Outra'[Meta]", "Vendas"),
+        _medida("Meta", "100", "Vendas"),
+        _medida("Valor", "1", "Custos"),
+    ])
+    # 'Vendas'[Meta] é a medida da própria tabela; 'Outra'[Meta] e 'Vendas'[Valor] são colunas.
+    assert grafo.dependencias("Total") == ["Meta"]
+
+
+def test_referencia_pendente_e_ligada_quando_a_medida_aparece():
+    grafo = GrafoDependencias([_medida("A", "[B] + 1")])
+    assert grafo.referencias_pendentes() == {"A": ["b"]}
+    grafo.definir_medida("B", "[C]")
+    grafo.definir_medida("C", "2")
+    assert grafo.dependencias("A", transitivas=True) == ["B", "C"]
+    assert grafo.referencias_pendentes() == {}
+
+    grafo.remover_medida("B")
+    assert grafo.dependencias("A", transitivas=True) == []
+    assert grafo.dependentes("C", transitivas=True) == []
+    assert grafo.referencias_pendentes() == {"A": ["b"]}
+
+
+def test_ciclos_e_autorreferencia():
+    grafo = GrafoDependencias([
+        _medida("A", "[B]"), _medida("B", "[C]"), _medida("C", "[A]"),
+        _medida("D", "[A] + [D]"), _medida("E", "1"),
+    ])
+    assert sorted(grafo.ciclos()) == [["A", "B", "C"], ["D"]]
+    assert grafo.dependencias("A", transitivas=True) == ["A", "B", "C"]
+    ordem = grafo.ordem_topologica()
+    assert sorted(ordem) == ["A", "B", "C", "D", "E"] and ordem[0] == "E"
+
+    # Quebrar o ciclo atualiza o fecho de todos os membros.
+    grafo.definir_medida("C", "5")
+    assert grafo.ciclos() == [["D"]]
+    assert grafo.dependencias("A", transitivas=True) == ["B", "C"]
+    assert grafo.dependentes("A", transitivas=True) == ["D"]
+
+
+def test_atualizacoes_incrementais_igualam_carga_completa():
+    aleatorio = random.Random(7)
+    nomes = [f"M{i}" for i in range(30)]
+    atuais = {}
+    grafo = GrafoDependencias()
+    for _ in range(300):
+        nome = aleatorio.choice(nomes)
+        if atuais and aleatorio.random() < 0.2:
+            removida = aleatorio.choice(sorted(atuais))
+            grafo.remover_medida(removida)
+            del atuais[removida]
+            continue
+        expressao = " + ".join(f"[{n}]" for n in aleatorio.sample(nomes, aleatorio.randint(0, 3))) or "1"
+        grafo.definir_medida(nome, expressao, "T")
+        atuais[nome] = expressao
+
+    completo = GrafoDependencias([_medida(n, e) for n, e in atuais.items()])
+    for nome in atuais:
+        assert grafo.dependencias(nome, transitivas=True) == completo.dependencias(nome, transitivas=True)
+        assert grafo.dependentes(nome, transitivas=True) == completo.dependentes(nome, transitivas=True)
+    assert sorted(map(sorted, grafo.ciclos())) == sorted(map(sorted, completo.ciclos()))
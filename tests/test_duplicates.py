@@ -0,0 +1,70 @@
+import json
+import os
+import subprocess
+import sys
+import textwrap
+
+from dax_analyzer.duplicates import agrupar_duplicadas, impressao_digital, normalizar_tokens
+
+
+def _mesma(a, b):
+    return impressao_digital(normalizar_tokens(a)) == impressao_digital(normalizar_tokens(b))
+
+
+def test_formatacao_comentarios_caixa_e_variaveis_nao_importam():
+    assert _mesma("VAR x = SUM('Vendas'[Valor])\nRETURN x * 2",
+                  "var Total = sum( Vendas[valor] ) // dobro\n return Total*2")
+
+
+def test_aspas_escapadas_no_nome_da_tabela_sao_preservadas():
+    assert _mesma("SUM('O''Brien'[x])", "SUM('o''brien'[X])")
+    assert not _mesma("SUM('O''Brien'[x])", "SUM('OBrien'[x])")
+    assert not _mesma("[Cliente's]", "[Clientes]")
+
+
+def test_strings_e_numeros_fazem_diferenca():
+    assert not _mesma('CALCULATE([T], F[c] = "A")', 'CALCULATE([T], F[c] = "a")')
+    assert not _mesma("[A] * 2", "[A] * 3")
+
+
+def _medida(nome, expressao):
+    return {"nome": nome, "tabela": "T", "expressao": expressao}
+
+
+def test_grupos_identicos_e_similares():
+    # Só o filtro final difere: Jaccard de ~0,95 entre os shingles, longe do limiar de 0,8.
+    longa = " + ".join(f"[Medida {i}]" for i in range(60)) + " + COUNTROWS(FILTER(Loja, Loja[UF] = {}))"
+    medidas = [
+        _medida("A", "SUM(Vendas[Valor])"),
+        _medida("B", "sum('Vendas'[Valor]) -- cópia"),
+        _medida("C", longa.format('"SP"')),
+        _medida("D", longa.format('"RJ"')),
+        _medida("E", "COUNTROWS(Clientes)"),
+        _medida("F", ""),
+    ]
+    grupos = agrupar_duplicadas(medidas)
+    resumo = sorted((g["tipo"], sorted(m["nome"] for m in g["medidas"])) for g in grupos)
+    assert resumo == [("identica", ["A", "B"]), ("similar", ["C", "D"])]
+    similar = next(g for g in grupos if g["tipo"] == "similar")
+    assert similar["similaridade"] >= 0.8
+
+
+def test_grupos_nao_dependem_da_semente_de_hash_do_processo():
+    script = textwrap.dedent("""
+        import json
+        from dax_analyzer.duplicates import agrupar_duplicadas
+        base = " + ".join(f"[M{i}]" for i in range(12))
+        medidas = [{"nome": str(i), "tabela": "T", "expressao": base + f" + [X{i % 3}] * {i % 2}"}
+                   for i in range(8)]
+        print(json.dumps([[g["tipo"], g.get("similaridade"), [m["nome"] for m in g["medidas"]]]
+                          for g in agrupar_duplicadas(medidas, limiar=0.5)]))
+    """)
+    raiz = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    saidas = []
+    for semente in ("1", "2"):
+        ambiente = dict(os.environ, PYTHONHASHSEED=semente, PYTHONPATH=raiz)
+        saida = subprocess.run([sys.executable, "-c", script], env=ambiente, cwd=raiz,
+                               capture_output=True, text=True, check=True).stdout
+        saidas.append(json.loads(saida))
+    assert saidas[0] == saidas[1]
+    assert saidas[0]
@@ -0,0 +1,52 @@
+from dax_analyzer.complexity import metricas_complexidade
+from dax_analyzer.lexer import (
+    COMENTARIO, FUNCAO, PALAVRA_CHAVE, PADRAO_VAR, REF_QUALIFICADA, REFERENCIA, STRING, TABELA, partes_referencia,
+    referencias, tokenizar,
+)
+
+
+def _tipos(expressao):
+    return [(t.tipo, t.valor) for t in tokenizar(expressao)]
+
+
+def test_strings_e_comentarios_nao_viram_codigo():
+    tokens = _tipos('"VAR ""x"" [A]" // IF([B])\n-- CALCULATE(\n/* [C] */ 1')
+    assert tokens[0] == (STRING, '"VAR ""x"" [A]"')
+    assert [tipo for tipo, _ in tokens[1:4]] == [COMENTARIO] * 3
+    assert len(tokens) == 5
+
+
+def test_referencias_qualificadas_e_escapes():
+    expressao = "'O''Brien'[Valor]]x] + Vendas[Qtd] + [Total] + 'Data'"
+    assert referencias(expressao) == [("O'Brien", "Valor]x"), ("Vendas", "Qtd"), (None, "Total")]
+    tabela = [t for t in tokenizar(expressao) if t.tipo == TABELA][0]
+    assert partes_referencia(tabela) == ("Data", None)
+
+
+def test_funcoes_com_ponto_e_palavras_chave():
+    tokens = _tipos("VAR x = VAR.P('F'[v]) RETURN x")
+    assert tokens[0] == (PALAVRA_CHAVE, "VAR")
+    assert (FUNCAO, "VAR.P") in tokens
+    assert (PALAVRA_CHAVE, "RETURN") in tokens
+    assert [tipo for tipo, _ in tokens].count(REF_QUALIFICADA) == 1
+
+
+def test_palavras_chave_seguidas_de_parenteses_nao_sao_funcoes():
+    assert _tipos("VAR x = 1 RETURN (x + 1)")[4] == (PALAVRA_CHAVE, "RETURN")
+    expressao = "RETURN (x && NOT (x IN (1))) || x or(1)"
+    assert [valor for tipo, valor in _tipos(expressao) if tipo == FUNCAO] == []
+    assert [valor for tipo, valor in _tipos("RETURNS(1) + INT(2) + VAR.S(F, F[v])") if tipo == FUNCAO] == [
+        "RETURNS", "INT", "VAR.S",
+    ]
+    assert metricas_complexidade("VAR x = SUM(F[v]) RETURN (x && NOT (x IN (1)))")["funcoes"] == 1
+
+
+def test_padrao_var_ignora_funcoes_de_variancia():
+    assert len(PADRAO_VAR.findall("VAR.P('F'[v]) + var.s('F'[v]) + VARX.P(F, F[v])")) == 0
+    assert len(PADRAO_VAR.findall("VAR a = 1\nvar b = VAR.S('F'[v])\nRETURN a + b")) == 2
+
+
+def test_posicoes_e_espacos():
+    tokens = tokenizar("[A] +  1", incluir_espacos=True)
+    assert [t.pos for t in tokens] == [0, 3, 4, 5, 7]
+    assert tokens[0].tipo == REFERENCIA
@@ -0,0 +1,44 @@
+from dax_analyzer.column_usage import analisar_uso_colunas
+from dax_analyzer.model_stats import EstatisticasModelo
+from pbix_tools.model_index import ModelIndex
+
+MODELO = {"model": {"tables": [
+    {"name": "Vendas", "columns": [
+        {"name": "RowNumber-2662979B-1795-4F74-8F37-6A1BA8059B61", "type": "rowNumber", "isHidden": True},
+        {"name": "Valor", "dataType": "double"},
+        {"name": "Dobro", "type": "calculated", "expression": "Vendas[Valor] * 2", "isHidden": True},
+        {"name": "Sobra", "dataType": "string"},
+    ], "measures": [
+        {"name": "Total", "expression": "SUM(Vendas[Valor])"},
+        {"name": "Complexa", "expression": "VAR x = [Total] RETURN IF(x > 0, x)"},
+    ]},
+    {"name": "Vazia", "isHidden": True, "columns": [{"name": "RowNumber-1", "type": "RowNumber"}]},
+]}}
+
+
+def test_colunas_internas_ficam_fora_das_estatisticas_e_do_uso():
+    indice = ModelIndex(MODELO)
+    estatisticas = EstatisticasModelo(indice, medidas_em_uso={"total"})
+    uso = analisar_uso_colunas(indice.tabelas, indice.relacionamentos, indice.medidas)
+
+    assert indice.nomes_colunas("Vendas") == ["Valor", "Dobro", "Sobra"]
+    assert estatisticas.totais["colunas"] == len(uso) == 3
+    assert estatisticas.totais["colunas_calculadas"] == 1
+    assert dict(zip(uso["coluna"], uso["usada"])) == {"Valor": True, "Dobro": False, "Sobra": False}
+
+
+def test_totais_por_tabela_e_complexidade():
+    estatisticas = EstatisticasModelo(ModelIndex(MODELO), medidas_em_uso={"total"})
+    assert estatisticas.totais["taxa_medidas_em_uso"] == 0.5
+    por_tabela = estatisticas.por_tabela.set_index("tabela")
+    assert por_tabela.loc["Vazia", "colunas"] == 0 and por_tabela.loc["Vendas", "medidas"] == 2
+    assert estatisticas.histograma_complexidade.to_dict() == {"Simples": 1, "Intermediária": 0, "Avançada": 1}
+
+
+def test_frequencia_de_funcoes_sem_palavras_chave():
+    modelo = {"model": {"tables": [{"name": "T", "measures": [
+        {"name": "A", "expression": "VAR x = SUM(T[v]) RETURN (x && NOT (x IN (1)))"},
+        {"name": "B", "expression": "IF(AND(1, 2), sum(T[v]))"},
+    ]}]}}
+    frequencia = EstatisticasModelo(ModelIndex(modelo)).frequencia_funcoes
+    assert frequencia.to_dict() == {"SUM": 2, "IF": 1}
@@ -0,0 +1,47 @@
+import threading
+import time
+
+from dax_analyzer import backends
+from dax_analyzer.backends import BackendFalso
+from dax_analyzer.explain import explicar_medida_dax_stream
+from dax_analyzer.pipeline import PipelineExplicacoes
+
+
+class BackendContador(BackendFalso):
+    """Conta quantas chamadas ficam em andamento ao mesmo tempo."""
+
+    def __init__(self):
+        super().__init__(atraso=0.02)
+        self._trava = threading.Lock()
+        self.em_andamento = self.maximo = 0
+
+    def conversar(self, prompt, formato_json=False):
+        with self._trava:
+            self.em_andamento += 1
+            self.maximo = max(self.maximo, self.em_andamento)
+        try:
+            return super().conversar(prompt, formato_json)
+        finally:
+            with self._trava:
+                self.em_andamento -= 1
+
+
+def _medidas(prefixo):
+    return [{"nome": f"{prefixo}{i}", "expressao": f"CALCULATE([Base], Loja[Id] = {i}) * {i}"} for i in range(6)]
+
+
+def test_limite_por_backend_vale_para_todos_os_pipelines_e_para_o_stream(monkeypatch):
+    monkeypatch.setitem(backends._semaforos, "falso", threading.BoundedSemaphore(2))
+    backend = BackendContador()
+    with PipelineExplicacoes(max_workers=4, backend=backend, tamanho_lote=1) as a, \
+            PipelineExplicacoes(max_workers=4, backend=backend, tamanho_lote=1) as b:
+        futuros = a.enviar_medidas(_medidas("A")) + b.enviar_medidas(_medidas("B"))
+        streams = [threading.Thread(target=lambda i=i: list(explicar_medida_dax_stream(f"S{i}", f"[Base] * {i}", backend)))
+                   for i in range(3)]
+        for tarefa in streams:
+            tarefa.start()
+        resultados = [f.result() for f in futuros]
+        for tarefa in streams:
+            tarefa.join()
+    assert backend.maximo == 2
+    assert all(r.startswith("Explicação simulada") for r in resultados)
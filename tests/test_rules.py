@@ -0,0 +1,43 @@
+import pytest
+
+from dax_analyzer import rules
+from dax_analyzer.rules import explicar_por_regras
+
+
+@pytest.mark.parametrize("expressao, esperado", [
+    ("SUM('Fato Vendas'[Valor])", "Soma os valores da coluna Valor da tabela Fato Vendas"),
+    ("distinctcount(Clientes[Id]) // clientes únicos", "Conta os valores distintos da coluna Id da tabela Clientes"),
+    ("COUNTROWS('Vendas')", "Conta as linhas da tabela Vendas"),
+    ("[Receita] - [Custo]", "Subtrai [Custo] de [Receita]"),
+    ("[Receita] * 1.1", "Multiplica [Receita] por 1.1"),
+    ("DIVIDE([Lucro], [Receita], 0)", "Divide [Lucro] por [Receita] com DIVIDE, retornando 0"),
+    ("DIVIDE([Lucro], [Receita])", "retornando vazio (BLANK)"),
+    ("[Total Vendas]", "Repete o resultado da medida [Total Vendas]"),
+    ("-1", "Retorna sempre o valor fixo -1"),
+    ("BLANK()", "Retorna sempre vazio (BLANK)"),
+    ('SELECTEDVALUE(Loja[UF], "Todas")', 'caso contrário, retorna "Todas"'),
+    ("CALCULATE([Vendas], ALL('Data'))", "ignorando todos os filtros da tabela Data"),
+    ('CALCULATE([Vendas], Loja[UF] = "SP")', 'em que UF da tabela Loja é igual a "SP"'),
+])
+def test_medidas_triviais(expressao, esperado):
+    assert esperado in explicar_por_regras("M", expressao)
+
+
+@pytest.mark.parametrize("expressao", [
+    "SUMX(Vendas, Vendas[Qtd] * Vendas[Preco])",
+    "[A] + [B] + [C]",
+    "1 + 2",
+    "SUM(Vendas)",
+    "VAR x = [A] RETURN x",
+    "CALCULATE([Vendas], Loja[UF] = \"SP\", Loja[Ativa] = TRUE())",
+    "IF([A] > 0, [A])",
+    "",
+    None,
+])
+def test_o_que_pede_raciocinio_vai_ao_llm(expressao):
+    assert explicar_por_regras("M", expressao) is None
+
+
+def test_regras_desligadas(monkeypatch):
+    monkeypatch.setattr(rules, "USAR_REGRAS", False)
+    assert explicar_por_regras("M", "SUM(T[c])") is None
@@ -0,0 +1,58 @@
+from dax_analyzer.search import IndiceBusca
+
+MEDIDAS = [
+    {"tabela": "Vendas", "nome": "Total Vendas", "expressao": "SUM('Vendas'[Valor])"},
+    {"tabela": "Vendas", "nome": "Vendas Filtradas", "expressao": "CALCULATE([Total Vendas], 'Loja'[UF] = \"SP\")"},
+    {"tabela": "Custos", "nome": "Custo", "expressao": "SUMX('Custos', 'Custos'[Qtd] * 'Custos'[Preco])"},
+    {"tabela": "Custos", "nome": "Margem", "expressao": "DIVIDE([Total Vendas] - [Custo], [Total Vendas])"},
+]
+
+
+def _nomes(indice, **filtros):
+    return [indice.medidas[i]["nome"] for i in indice.buscar(**filtros)]
+
+
+def test_sem_filtros_retorna_todas_na_ordem_original():
+    assert IndiceBusca(MEDIDAS).buscar() == [0, 1, 2, 3]
+
+
+def test_busca_por_nome_ignora_caixa_e_ordena_por_nome():
+    assert _nomes(IndiceBusca(MEDIDAS), nome="VENDAS") == ["Total Vendas", "Vendas Filtradas"]
+
+
+def test_trecho_dax_confirma_o_trecho_contiguo():
+    indice = IndiceBusca(MEDIDAS)
+    # "sum" está em SUM e SUMX; "sumx(" só na medida de custo.
+    assert set(_nomes(indice, trecho_dax="sum")) == {"Total Vendas", "Custo"}
+    assert _nomes(indice, trecho_dax="sumx(") == ["Custo"]
+    assert _nomes(indice, trecho_dax="inexistente") == []
+
+
+def test_termo_exato_vem_antes_de_quem_so_contem_o_trecho():
+    # "sum" é termo exato de Total Vendas; em Custo aparece só dentro de SUMX.
+    assert _nomes(IndiceBusca(MEDIDAS), trecho_dax="sum") == ["Total Vendas", "Custo"]
+
+
+def test_filtros_combinados_e_tabela():
+    indice = IndiceBusca(MEDIDAS)
+    assert _nomes(indice, tabela="Custos") == ["Custo", "Margem"]
+    assert _nomes(indice, tabela="Custos", trecho_dax="total vendas") == ["Margem"]
+    assert _nomes(indice, tabela="Todas", nome="ma") == ["Margem"]
+    assert indice.buscar(tabela="Outra") == []
+
+
+def test_trecho_menor_que_um_trigrama():
+    assert _nomes(IndiceBusca(MEDIDAS), nome="c") == ["Custo"]
+
+
+def test_medidas_com_termo():
+    nomes = [m["nome"] for m in IndiceBusca(MEDIDAS).medidas_com_termo("Total Vendas")]
+    assert nomes == ["Vendas Filtradas", "Margem"]
+
+
+def test_muitas_medidas_usa_busca_binaria_na_intersecao():
+    medidas = [{"tabela": "T", "nome": f"Medida {i}", "expressao": f"[Base] * {i}"} for i in range(500)]
+    medidas.append({"tabela": "T", "nome": "Rara", "expressao": "[Base] * 7 + RARA()"})
+    indice = IndiceBusca(medidas)
+    assert _nomes(indice, trecho_dax="[base] * 7 + rara") == ["Rara"]
+    assert len(indice.buscar(trecho_dax="[base]")) == 501
@@ -0,0 +1,93 @@
+import io
+import json
+import zipfile
+
+from pbix_tools import reader
+
+from pbix_tools.extractor import carregar_tabelas_modelo
+from pbix_tools.streaming import LeitorJSONIncremental, carregar_modelo_enxuto, iterar_medidas, iterar_modelo
+
+MODELO = {
+    "name": "Modelo",
+    "model": {
+        "culture": "pt-BR",
+        "tables": [
+            {
+                "columns": [{"name": "Valor", "dataType": "double", "annotations": [{"name": "x", "value": "y"}]}],
+                "name": "Vendas",
+                "measures": [
+                    {"name": "Total", "expression": "SUM('Vendas'[Valor])", "lineageTag": "abc"},
+                    {"name": "Texto \"com\" aspas", "expression": ["VAR x = 1", "RETURN x"]},
+                ],
+                "partitions": [{"name": "p1", "source": {"type": "m", "expression": "let Fonte = 1 in Fonte"}}],
+            },
+            {"name": "Vazia", "columns": [], "measures": []},
+        ],
+        "relationships": [{"fromTable": "Vendas", "toTable": "Vazia"}],
+        "annotations": [{"name": "grande", "value": "x" * 5000}],
+    },
+}
+
+
+def _gravar(tmp_path, dados, encoding="utf-8"):
+    caminho = tmp_path / "model.bim"
+    caminho.write_text(json.dumps(dados, ensure_ascii=False), encoding=encoding)
+    return str(caminho)
+
+
+def test_modelo_enxuto_igual_ao_json_sem_subarvores_ignoradas(tmp_path):
+    modelo = carregar_modelo_enxuto(_gravar(tmp_path, MODELO))["model"]
+    vendas = modelo["tables"][0]
+    assert [t["name"] for t in modelo["tables"]] == ["Vendas", "Vazia"]
+    assert vendas["columns"] == [{"name": "Valor", "dataType": "double"}]
+    assert vendas["measures"][0] == {"name": "Total", "expression": "SUM('Vendas'[Valor])"}
+    assert vendas["partitions"][0]["source"]["expression"] == "let Fonte = 1 in Fonte"
+    assert modelo["relationships"] == MODELO["model"]["relationships"]
+
+
+def test_sem_particoes_e_nome_da_tabela_depois_dos_itens(tmp_path):
+    caminho = _gravar(tmp_path, MODELO)
+    itens = list(iterar_modelo(caminho))
+    assert ("coluna", "Vendas", {"name": "Valor", "dataType": "double"}) in itens
+    assert not any(tipo == "particao" for tipo, _, _ in itens)
+    assert "partitions" not in carregar_modelo_enxuto(caminho, incluir_particoes=False)["model"]["tables"][0]
+
+
+def test_medidas_em_utf16(tmp_path):
+    medidas = list(iterar_medidas(_gravar(tmp_path, MODELO, encoding="utf-16")))
+    assert medidas[1] == {"tabela": "Vendas", "nome": 'Texto "com" aspas', "expressao": "VAR x = 1\nRETURN x"}
+
+
+def test_blocos_pequenos_cortam_strings_e_numeros():
+    dados = {"a": ["x\\\"y" * 40, 12345.5e-3, -7, True, None], "b": {"c": "ç" * 100}}
+    texto = json.dumps(dados)
+    for tamanho in (1, 7, 64):
+        leitor = LeitorJSONIncremental(io.StringIO(texto), tamanho_bloco=tamanho)
+        assert leitor.ler_valor() == dados
+
+        leitor = LeitorJSONIncremental(io.StringIO(texto), tamanho_bloco=tamanho)
+        chaves = []
+        for chave in leitor.iterar_objeto():
+            chaves.append(chave)
+            leitor.pular_valor()
+        assert chaves == ["a", "b"]
+
+
+def test_tabelas_com_fallback_para_database_json(tmp_path):
+    (tmp_path / "Model").mkdir()
+    (tmp_path / "Model" / "database.json").write_text(json.dumps(MODELO), encoding="utf-8")
+    vazio = tmp_path / "vazio.json"
+    vazio.write_text("{}", encoding="utf-8")
+    tabelas = carregar_tabelas_modelo(str(vazio), str(tmp_path))
+    assert [t["name"] for t in tabelas] == ["Vendas", "Vazia"]
+    assert "partitions" not in tabelas[0]
+
+
+def test_leitura_incremental_do_pacote_sem_particoes(tmp_path, monkeypatch):
+    pacote = tmp_path / "modelo.pbit"
+    with zipfile.ZipFile(pacote, "w") as zf:
+        zf.writestr(reader.ENTRADA_MODELO, json.dumps(MODELO).encode("utf-16-le"))
+    monkeypatch.setattr(reader, "LIMITE_LEITURA_INTEGRAL", 0)
+    tabelas = reader.ler_pbix(str(pacote))["model"]["model"]["tables"]
+    assert tabelas[0]["measures"][0]["name"] == "Total"
+    assert "partitions" not in tabelas[0]
@@ -0,0 +1,97 @@
+import json
+
+from pbix_tools.tmdl import carregar_projeto_pbip, parsear_arquivo_tmdl
+
+TABELA_VENDAS = """\
+table Vendas
+\tlineageTag: 123
+
+\t/// Soma do valor vendido
+\tmeasure 'Total Vendas' = SUM(Vendas[Valor])
+\t\tformatString: #,0
+
+\tmeasure Margem =
+\t\t\tVAR custo = [Custo]
+\t\t\tRETURN
+\t\t\t\tDIVIDE([Total Vendas] - custo, [Total Vendas])
+\t\tdisplayFolder: Indicadores
+
+\tmeasure Custo = ```
+\t\t\tSUMX(Vendas, Vendas[Qtd] * Vendas[Preco])
+\t\t\t```
+
+\tcolumn Valor
+\t\tdataType: double
+\t\tisHidden
+
+\tcolumn 'Ano Mês' = FORMAT(Vendas[Data], "yyyy-mm")
+\t\tdataType: string
+
+\tpartition Vendas = m
+\t\tmode: import
+\t\tsource = let Fonte = 1 in Fonte
+"""
+
+RELACIONAMENTOS = """\
+relationship abc
+\tfromColumn: Vendas.'Data Venda'
+\ttoColumn: 'Calendário'.Data
+"""
+
+
+def _projeto(tmp_path, relatorio=None):
+    definicao = tmp_path / "Projeto.SemanticModel" / "definition"
+    (definicao / "tables").mkdir(parents=True)
+    (definicao / "tables" / "Vendas.tmdl").write_text(TABELA_VENDAS, encoding="utf-8")
+    (definicao / "relationships.tmdl").write_text(RELACIONAMENTOS, encoding="utf-8")
+    (tmp_path / "Projeto.pbip").write_text("{}", encoding="utf-8")
+    if relatorio:
+        relatorio(tmp_path / "Projeto.Report")
+    return str(tmp_path / "Projeto.pbip")
+
+
+def test_tabela_tmdl_com_expressoes_de_varias_formas(tmp_path):
+    caminho = tmp_path / "Vendas.tmdl"
+    caminho.write_text(TABELA_VENDAS, encoding="utf-8")
+    tabela = parsear_arquivo_tmdl(str(caminho))["tables"][0]
+
+    medidas = {m["name"]: m for m in tabela["measures"]}
+    assert medidas["Total Vendas"]["expression"] == "SUM(Vendas[Valor])"
+    assert medidas["Total Vendas"]["description"] == "Soma do valor vendido"
+    assert medidas["Margem"]["expression"] == "VAR custo = [Custo]\nRETURN\n\tDIVIDE([Total Vendas] - custo, [Total Vendas])"
+    assert medidas["Margem"]["displayFolder"] == "Indicadores"
+    assert medidas["Custo"]["expression"] == "SUMX(Vendas, Vendas[Qtd] * Vendas[Preco])"
+
+    colunas = {c["name"]: c for c in tabela["columns"]}
+    assert colunas["Valor"] == {"name": "Valor", "dataType": "double", "isHidden": True}
+    assert colunas["Ano Mês"]["type"] == "calculated"
+    assert tabela["partitions"][0]["mode"] == "import"
+
+
+def test_projeto_com_relatorio_pbir(tmp_path):
+    def pbir(pasta):
+        visual = pasta / "definition" / "pages" / "p1" / "visuals" / "v1"
+        visual.mkdir(parents=True)
+        (pasta / "definition" / "pages" / "p1" / "page.json").write_text(json.dumps({"displayName": "Resumo"}))
+        campo = {"Measure": {"Expression": {"SourceRef": {"Entity": "Vendas"}}, "Property": "Margem"}}
+        filtro = {"Column": {"Expression": {"SourceRef": {"Entity": "Vendas"}}, "Property": "Valor"}}
+        (visual / "visual.json").write_text(json.dumps({
+            "name": "v1",
+            "visual": {"query": {"queryState": {"Values": {"projections": [{"field": campo}]}}}},
+            "filterConfig": {"filters": [{"field": filtro}]},
+        }))
+
+    conteudo = carregar_projeto_pbip(_projeto(tmp_path, pbir))
+    assert conteudo["layout"] is None
+    assert conteudo["visuais"].visuais_com_medida("margem") == [("Resumo", "v1")]
+    assert conteudo["visuais"].campo_usado("Vendas", "Valor")
+    assert not conteudo["visuais"].medida_usada("Total Vendas")
+    relacionamento = conteudo["model"]["model"]["relationships"][0]
+    assert (relacionamento["fromTable"], relacionamento["fromColumn"]) == ("Vendas", "Data Venda")
+    assert (relacionamento["toTable"], relacionamento["toColumn"]) == ("Calendário", "Data")
+
+
+def test_projeto_sem_relatorio_deixa_uso_em_visuais_indefinido(tmp_path):
+    conteudo = carregar_projeto_pbip(_projeto(tmp_path))
+    assert conteudo["visuais"] is None
+    assert [m["name"] for m in conteudo["model"]["model"]["tables"][0]["measures"]] == ["Total Vendas", "Margem", "Custo"]
@@ -0,0 +1,141 @@
+import json
+
+from dax_analyzer.column_usage import analisar_uso_colunas
+from pbix_tools.visual_usage import (
+    COLUNA, MEDIDA, PAGINA_RELATORIO, VISUAL_FILTROS, IndiceVisuais, indexar_layout, indexar_relatorio_pbir,
+    indexar_visuais_extraidos, referencias_da_consulta,
+)
+
+
+def _ref(alias, propriedade, tipo="Column"):
+    return {tipo: {"Expression": {"SourceRef": {"Source": alias}}, "Property": propriedade}}
+
+
+CONSULTA = {
+    "From": [{"Name": "v", "Entity": "Vendas"}, {"Name": "d", "Entity": "Calendário"}],
+    "Select": [
+        {"Aggregation": {"Expression": _ref("v", "Valor"), "Function": 0}, "Name": "Sum(Vendas.Valor)"},
+        _ref("v", "Total Vendas", "Measure"),
+        {"HierarchyLevel": {
+            "Expression": {"Hierarchy": {"Expression": {"SourceRef": {"Source": "d"}}, "Hierarchy": "Período"}},
+            "Level": "Ano",
+        }},
+        {"HierarchyLevel": {
+            "Expression": {"Hierarchy": {
+                "Expression": {"PropertyVariationSource": {
+                    "Expression": {"SourceRef": {"Source": "v"}}, "Name": "Variation", "Property": "Data Venda",
+                }},
+                "Hierarchy": "Hierarquia de datas",
+            }},
+            "Level": "Mês",
+        }},
+    ],
+    "Where": [{"Condition": {"In": {"Expressions": [_ref("d", "Trimestre")], "Values": [[{"Literal": {"Value": "1"}}]]}}}],
+}
+
+
+def test_agregacoes_hierarquias_e_filtros():
+    assert referencias_da_consulta(CONSULTA) == {
+        (COLUNA, "Vendas", "Valor"),
+        (MEDIDA, "Vendas", "Total Vendas"),
+        (COLUNA, "Calendário", "Ano"),
+        (COLUNA, "Vendas", "Data Venda"),
+        (COLUNA, "Calendário", "Trimestre"),
+    }
+
+
+def test_indice_do_layout_e_serializacao():
+    config = {"name": "grafico1", "singleVisual": {"prototypeQuery": CONSULTA}}
+    layout = {"sections": [{"displayName": "Resumo", "visualContainers": [{"config": json.dumps(config)}]}]}
+    indice = indexar_layout(layout)
+
+    assert indice.medida_usada("TOTAL VENDAS") and not indice.medida_usada("Valor")
+    assert indice.visuais_com_campo("calendário", "ano") == [("Resumo", "grafico1")]
+    assert "data venda" in indice and len(indice) == 5
+
+    copia = IndiceVisuais.de_lista(json.loads(json.dumps(indice.para_lista())))
+    assert copia.referencias == indice.referencias
+
+
+def _filtro(tabela, coluna):
+    """Filtro no formato do Report/Layout: campo por ``Entity`` e condição com alias próprio."""
+    return {
+        "name": f"Filtro{coluna}",
+        "expression": {"Column": {"Expression": {"SourceRef": {"Entity": tabela}}, "Property": coluna}},
+        "filter": {
+            "Version": 2,
+            "From": [{"Name": "f", "Entity": tabela, "Type": 0}],
+            "Where": [{"Condition": {"In": {
+                "Expressions": [{"Column": {"Expression": {"SourceRef": {"Source": "f"}}, "Property": coluna}}],
+                "Values": [[{"Literal": {"Value": "'SP'"}}]],
+            }}}],
+        },
+    }
+
+
+LAYOUT_COM_FILTROS = {
+    "filters": json.dumps([_filtro("Loja", "Região")]),
+    "sections": [{
+        "displayName": "Resumo",
+        "filters": json.dumps([_filtro("Loja", "UF")]),
+        "visualContainers": [{
+            "config": json.dumps({"name": "grafico1", "singleVisual": {"prototypeQuery": {
+                "From": [{"Name": "v", "Entity": "Vendas"}], "Select": [_ref("v", "Total Vendas", "Measure")],
+            }}}),
+            "filters": json.dumps([_filtro("Loja", "Cidade")]),
+        }],
+    }],
+}
+
+
+def test_filtros_do_relatorio_da_pagina_e_do_visual():
+    indice = indexar_layout(LAYOUT_COM_FILTROS)
+    assert indice.visuais_com_campo("Loja", "Região") == [(PAGINA_RELATORIO, VISUAL_FILTROS)]
+    assert indice.visuais_com_campo("Loja", "UF") == [("Resumo", VISUAL_FILTROS)]
+    assert indice.visuais_com_campo("Loja", "Cidade") == [("Resumo", "grafico1")]
+
+
+def test_coluna_usada_so_em_filtro_nao_fica_ociosa():
+    tabelas = [{"name": "Loja", "columns": [{"name": n} for n in ("Região", "UF", "Cidade", "Gerente")]}]
+    uso = analisar_uso_colunas(tabelas, visuais=indexar_layout(LAYOUT_COM_FILTROS))
+    assert dict(zip(uso["coluna"], uso["usada"])) == {"Região": True, "UF": True, "Cidade": True, "Gerente": False}
+
+
+def _gravar_json(caminho, dados):
+    caminho.parent.mkdir(parents=True, exist_ok=True)
+    caminho.write_text(json.dumps(dados), encoding="utf-8")
+
+
+def test_pbir_e_pasta_do_pbitools_indexam_os_mesmos_filtros_do_layout(tmp_path):
+    secao = LAYOUT_COM_FILTROS["sections"][0]
+    container = secao["visualContainers"][0]
+    config = json.loads(container["config"])
+    filtros_pagina = {"filters": json.loads(secao["filters"])}
+    filtros_visual = {"filters": json.loads(container["filters"])}
+
+    definicao = tmp_path / "pbir" / "definition"
+    _gravar_json(definicao / "report.json", {"filterConfig": {"filters": json.loads(LAYOUT_COM_FILTROS["filters"])}})
+    _gravar_json(definicao / "pages" / "p1" / "page.json", {"displayName": "Resumo", "filterConfig": filtros_pagina})
+    _gravar_json(definicao / "pages" / "p1" / "visuals" / "grafico1" / "visual.json", {
+        "name": "grafico1",
+        "visual": {"query": {"queryState": {"Values": {"projections": [{"field": {"Measure": {
+            "Expression": {"SourceRef": {"Entity": "Vendas"}}, "Property": "Total Vendas"}}}]}}}},
+        "filterConfig": filtros_visual,
+    })
+
+    extraida = tmp_path / "extraida"
+    _gravar_json(extraida / "Report" / "filters.json", json.loads(LAYOUT_COM_FILTROS["filters"]))
+    _gravar_json(extraida / "Report" / "sections" / "Resumo" / "filters.json", json.loads(secao["filters"]))
+    pasta_visual = extraida / "Report" / "sections" / "Resumo" / "visualContainers" / "grafico1"
+    _gravar_json(pasta_visual / "config.json", config)
+    _gravar_json(pasta_visual / "filters.json", json.loads(container["filters"]))
+    manifesto = {"pasta": str(extraida), "secoes": [{
+        "nome": "Resumo",
+        "caminho": str(extraida / "Report" / "sections" / "Resumo"),
+        "visuais": [str(pasta_visual / "config.json"), str(pasta_visual / "filters.json")],
+    }]}
+
+    esperado = sorted(indexar_layout(LAYOUT_COM_FILTROS).referencias)
+    assert len(esperado) == 4
+    assert sorted(indexar_relatorio_pbir(str(definicao)).referencias) == esperado
+    assert sorted(indexar_visuais_extraidos(manifesto).referencias) == esperado
@@ -0,0 +1,112 @@
+import os
+
+from dax_analyzer.backends import BackendFalso
+from dax_analyzer.pipeline import PipelineExplicacoes
+from watch import ObservadorProjeto, normalizar_expressao
+
+
+def _escrever(pasta, nome, medidas):
+    linhas = [f"table {nome}"]
+    for medida, expressao in medidas.items():
+        linhas.append(f"\tmeasure '{medida}' = {expressao}")
+    caminho = pasta / f"{nome}.tmdl"
+    caminho.write_text("\n".join(linhas) + "\n", encoding="utf-8")
+    # mtime distinto a cada escrita, mesmo em sistemas de arquivos de baixa resolução.
+    instante = os.stat(caminho).st_mtime_ns + 10 ** 9 * len(linhas)
+    os.utime(caminho, ns=(instante, instante))
+
+
+def _projeto(tmp_path):
+    tabelas = tmp_path / "P.SemanticModel" / "definition" / "tables"
+    tabelas.mkdir(parents=True)
+    return tabelas
+
+
+def _observador(tmp_path, **kwargs):
+    chamadas = []
+
+    def explicar(nome, expressao):
+        chamadas.append(nome)
+        return f"explica {nome}"
+
+    observador = ObservadorProjeto(str(tmp_path / "P.SemanticModel"), explicar=explicar, arquivo_deltas=None, **kwargs)
+    return observador, chamadas
+
+
+def test_nova_medida_liga_referencia_pendente_e_impacta_quem_a_usa(tmp_path):
+    tabelas = _projeto(tmp_path)
+    _escrever(tabelas, "Vendas", {"Margem": "[Receita] - [Custo]", "Receita": "SUM(Vendas[Valor])"})
+    observador, chamadas = _observador(tmp_path)
+    observador.verificar()
+    assert sorted(chamadas) == ["Margem", "Receita"]
+
+    # [Custo] era uma referência pendente de Margem; ao ser criada, Margem passa a depender dela.
+    _escrever(tabelas, "Custos", {"Custo": "SUM(Custos[Valor])"})
+    delta = observador.verificar()
+    assert [m["nome"] for m in delta["medidas_adicionadas"]] == ["Custo"]
+    assert delta["medidas_impactadas"] == ["Margem"]
+
+
+def test_alterada_e_removida_impactam_dependentes_transitivos(tmp_path):
+    tabelas = _projeto(tmp_path)
+    _escrever(tabelas, "Vendas", {"Base": "1", "Meio": "[Base] * 2", "Topo": "[Meio] + 1", "Solta": "3"})
+    observador, chamadas = _observador(tmp_path)
+    observador.verificar()
+
+    _escrever(tabelas, "Vendas", {"Base": "10", "Meio": "[Base] * 2", "Topo": "[Meio] + 1", "Solta": "3"})
+    delta = observador.verificar()
+    assert [m["nome"] for m in delta["medidas_alteradas"]] == ["Base"]
+    assert delta["medidas_impactadas"] == ["Meio", "Topo"]
+
+    _escrever(tabelas, "Vendas", {"Base": "10", "Topo": "[Meio] + 1", "Solta": "3"})
+    delta = observador.verificar()
+    assert delta["medidas_removidas"] == [{"tabela": "Vendas", "nome": "Meio"}]
+    assert delta["medidas_impactadas"] == ["Topo"]
+    # Reformatar não gera nova explicação.
+    chamadas.clear()
+    _escrever(tabelas, "Vendas", {"Base": " 10 ", "Topo": "[Meio]+1", "Solta": "3"})
+    assert observador.verificar()["medidas_alteradas"] == [] and chamadas == []
+
+
+def test_carga_inicial_pelo_pipeline_em_ordem_de_dependencia(tmp_path):
+    tabelas = _projeto(tmp_path)
+    _escrever(tabelas, "Vendas", {"Total": "SUMX(Vendas, Vendas[Qtd] * Vendas[Preco])",
+                                  "Dobro": "CALCULATE([Total], ALL(Vendas)) * 2"})
+    with PipelineExplicacoes(max_workers=2, backend=BackendFalso(), tamanho_lote=1) as pipeline:
+        observador, chamadas = _observador(tmp_path, pipeline=pipeline)
+        observador.verificar()
+
+    explicacoes = {m["nome"]: m["explicacao"] for m in observador.medidas_por_arquivo[str(tabelas / "Vendas.tmdl")].values()}
+    assert chamadas == []
+    assert explicacoes["Total"].startswith("Explicação simulada de Total")
+    assert explicacoes["Dobro"].startswith("Explicação simulada de Dobro")
+
+
+def test_medida_alterada_recebe_o_contexto_das_dependencias_ja_explicadas(tmp_path):
+    def explicacoes(observador):
+        return {m["nome"]: m["explicacao"] for por_chave in observador.medidas_por_arquivo.values()
+                for m in por_chave.values()}
+
+    primeiro, segundo = tmp_path / "incremental", tmp_path / "completo"
+    total = "SUMX(Vendas, Vendas[Qtd] * Vendas[Preco])"
+    with PipelineExplicacoes(max_workers=2, backend=BackendFalso(), tamanho_lote=1) as pipeline:
+        tabelas = _projeto(primeiro)
+        _escrever(tabelas, "Vendas", {"Total": total, "Dobro": "CALCULATE([Total], ALL(Vendas)) * 2"})
+        incremental, _ = _observador(primeiro, pipeline=pipeline)
+        incremental.verificar()
+        _escrever(tabelas, "Vendas", {"Total": total, "Dobro": "CALCULATE([Total], ALL(Vendas)) * 3"})
+        incremental.verificar()
+
+        _escrever(_projeto(segundo), "Vendas", {"Total": total, "Dobro": "CALCULATE([Total], ALL(Vendas)) * 3"})
+        completo, _ = _observador(segundo, pipeline=pipeline)
+        completo.verificar()
+
+    assert explicacoes(incremental) == explicacoes(completo)
+
+
+def test_normalizacao_pelo_lexer_distingue_codigo_de_comentario():
+    assert normalizar_expressao("// total\n[A] + 1") != normalizar_expressao("// total [A] + 1")
+    assert normalizar_expressao("// total [A] + 1") == normalizar_expressao("")
+    assert normalizar_expressao("VAR x = 1\n  RETURN   x -- fim") == normalizar_expressao("VAR x=1 RETURN x")
+    assert normalizar_expressao("VAR x = 1 RETURN x") != normalizar_expressao("VARx = 1 RETURNx")
+    assert normalizar_expressao('"a  b"') != normalizar_expressao('"a b"')
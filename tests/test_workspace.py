@@ -0,0 +1,66 @@
+import io
+import os
+import time
+
+from pbix_tools.workspace import AreaDeTrabalho
+
+
+def _envelhecer(caminho, segundos):
+    instante = time.time() - segundos
+    for raiz, pastas, arquivos in os.walk(caminho):
+        for nome in pastas + arquivos:
+            os.utime(os.path.join(raiz, nome), (instante, instante))
+    os.utime(caminho, (instante, instante))
+
+
+def test_mesmo_conteudo_gera_caminhos_independentes(tmp_path):
+    area = AreaDeTrabalho(str(tmp_path))
+    caminho_a, chave_a = area.guardar_upload(io.BytesIO(b"pbix"))
+    caminho_b, chave_b = area.guardar_upload(io.BytesIO(b"pbix"))
+    assert chave_a == chave_b and caminho_a != caminho_b
+
+    pasta_a, pasta_b = area.pasta_extracao(chave_a), area.pasta_extracao(chave_a)
+    assert pasta_a != pasta_b and os.path.basename(pasta_a).startswith(chave_a)
+
+    # Uma sessão liberando o que é seu não afeta a outra.
+    area.liberar(caminho_a)
+    area.liberar(pasta_a)
+    assert os.path.exists(caminho_b) and os.path.isdir(pasta_b)
+
+
+def test_liberar_ignora_caminhos_fora_da_area(tmp_path):
+    area = AreaDeTrabalho(str(tmp_path / "pbixai"))
+    vizinha = tmp_path / "pbixai2" / "dados"
+    vizinha.mkdir(parents=True)
+    area.liberar(str(vizinha))
+    area.liberar(str(tmp_path / "pbixai" / ".." / "pbixai2"))
+    area.liberar(area.raiz)
+    assert vizinha.is_dir() and os.path.isdir(area.raiz)
+
+
+def test_limpeza_poupa_itens_em_uso(tmp_path):
+    area = AreaDeTrabalho(str(tmp_path), idade_maxima=3600, limite_bytes=0, carencia=600)
+    antiga = area.pasta_extracao("a")
+    em_uso = area.pasta_extracao("b")
+    for pasta in (antiga, em_uso):
+        os.makedirs(os.path.join(pasta, "Model"))
+        with open(os.path.join(pasta, "Model", "database.json"), "w") as f:
+            f.write("{}")
+    _envelhecer(antiga, 7200)
+    _envelhecer(em_uso, 7200)
+    # Um arquivo recente dentro da pasta basta para considerá-la em uso.
+    os.utime(os.path.join(em_uso, "Model", "database.json"))
+
+    area.limpar()
+    assert not os.path.exists(antiga)
+    assert os.path.isdir(em_uso)
+
+
+def test_limite_de_tamanho_remove_os_mais_antigos(tmp_path):
+    area = AreaDeTrabalho(str(tmp_path), idade_maxima=10 ** 6, limite_bytes=10, carencia=60)
+    caminhos = [area.guardar_upload(io.BytesIO(bytes(8)))[0] for _ in range(3)]
+    for i, caminho in enumerate(caminhos):
+        _envelhecer(caminho, 1000 - i)
+
+    area.limpar()
+    assert [os.path.exists(c) for c in caminhos] == [False, False, True]
@@ -1,10 +1,9 @@
 import streamlit as st
-import tempfile
 import os
 import json
 import hashlib
 import time
-from collections import defaultdict, Counter
+from collections import defaultdict
 import pandas as pd
 import plotly.express as px
 from io import BytesIO, StringIO
@@ -15,14 +14,19 @@ import sys
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 IGNORAR_TABELAS_PREFIXOS = ["DateTableTemplate", "LocalDateTable", "_", "~"]
-
-from pbix_tools.extractor import (
-    desmontar_pbix_com_pbitools,
-    localizar_model_bim,
-    parse_measures,
-)
-from dax_analyzer.explain import explicar_medida_dax, explicar_tabela
-from pbix_tools.extractor import encontrar_dax_usadas_em_visuais
+LIMITE_RESULTADOS_PESQUISA = 50
+
+from pbix_tools.cache import carregar_pbix_com_cache, obter_extracao
+from pbix_tools.workspace import obter_area_de_trabalho
+from pbix_tools.model_index import ModelIndex
+from dax_analyzer.backends import aquecer_em_segundo_plano
+from dax_analyzer.column_usage import analisar_uso_colunas, colunas_nao_utilizadas
+from dax_analyzer.dependencies import GrafoDependencias
+from dax_analyzer.duplicates import agrupar_duplicadas
+from dax_analyzer.explain import explicar_medida_dax, explicar_medida_dax_stream, explicar_tabela
+from dax_analyzer.model_stats import EstatisticasModelo
+from dax_analyzer.pipeline import PipelineExplicacoes
+from dax_analyzer.search import IndiceBusca
 from utils import gerar_hash_medida, classificar_complexidade, carregar_cache, salvar_cache, gerar_html_relatorio
 
 st.set_page_config(page_title="Power BI Analyzer com IA", layout="wide")
@@ -81,28 +85,87 @@ salvar_cache(CACHE_PATH, cache_persistente)
 def explicar_tabela_com_cache(nome, colunas):
     return explicar_tabela(nome, colunas)
 
+@st.cache_resource(show_spinner=False, max_entries=4)
+def obter_indice_modelo(hash_pbix, _model_data):
+    # O hash identifica o modelo; o dict em si não precisa ser hasheado pelo Streamlit.
+    return ModelIndex(_model_data)
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def obter_grafo_dependencias(hash_pbix, _medidas):
+    return GrafoDependencias(_medidas)
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def obter_grupos_duplicadas(hash_pbix, _medidas):
+    return agrupar_duplicadas(_medidas)
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def obter_indice_busca(hash_pbix, _medidas):
+    return IndiceBusca(_medidas)
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def obter_uso_colunas(hash_pbix, _indice, _visuais):
+    return analisar_uso_colunas(_indice.tabelas, _indice.relacionamentos, _indice.medidas, _visuais)
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def obter_estatisticas(hash_pbix, _indice, _medidas_em_uso):
+    return EstatisticasModelo(_indice, _medidas_em_uso)
+
+@st.cache_resource(show_spinner=False)
+def obter_pipeline():
+    # Um pool por processo do servidor, compartilhado entre sessões e reruns.
+    return PipelineExplicacoes()
+
+@st.cache_resource(show_spinner=False)
+def aquecer_modelo_app():
+    # Uma vez por processo do servidor: o modelo carrega enquanto o usuário envia o arquivo.
+    return aquecer_em_segundo_plano()
+
+@st.cache_resource(show_spinner=False)
+def obter_area_de_trabalho_app():
+    # Executado uma vez por processo do servidor: limpa sobras de execuções anteriores
+    # e garante a limpeza quando o servidor for encerrado.
+    area = obter_area_de_trabalho()
+    area.limpar()
+    area.instalar_limpeza_ao_sair()
+    return area
+
+area_de_trabalho = obter_area_de_trabalho_app()
+aquecer_modelo_app()
+
 # === UPLOAD ===
-uploaded_file = st.file_uploader("Escolha um arquivo .pbix", type=["pbix"])
+uploaded_file = st.file_uploader("Escolha um arquivo .pbix", type=["pbix", "pbit"])
 
 # === PROCESSAMENTO ===
 if uploaded_file is not None:
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".pbix") as tmp:
-        tmp.write(uploaded_file.read())
-        pbix_path = tmp.name
-
-    with st.spinner("Desmontando o .pbix com pbi-tools..."):
-        pasta_extraida = desmontar_pbix_com_pbitools(pbix_path)
-
-        if not pasta_extraida or not os.path.exists(pasta_extraida):
-            st.error("❌ Erro: Não foi possível extrair o .pbix com o pbi-tools. Verifique o caminho do executável.")
+    sufixo = os.path.splitext(uploaded_file.name)[1] or ".pbix"
+    # Hash de cada upload já processado na sessão: nos reruns, vai direto ao cache.
+    hashes_upload = st.session_state.setdefault("hashes_upload", {})
+    chave_upload = hashes_upload.get(uploaded_file.file_id)
+
+    with st.spinner("Lendo o modelo do .pbix..."):
+        conteudo = obter_extracao(chave_upload) if chave_upload else None
+        if not conteudo:
+            # Grava em blocos e calcula o hash na mesma passada; um upload repetido
+            # é reconhecido pelo cache antes de qualquer extração.
+            uploaded_file.seek(0)
+            pbix_path, chave_upload = area_de_trabalho.guardar_upload(uploaded_file, sufixo)
+            hashes_upload[uploaded_file.file_id] = chave_upload
+            try:
+                conteudo = carregar_pbix_com_cache(pbix_path, chave=chave_upload, area=area_de_trabalho)
+            finally:
+                area_de_trabalho.liberar(pbix_path)
+                area_de_trabalho.limpar()
+
+        if not conteudo:
+            st.error("❌ Erro: Não foi possível carregar o modelo do .pbix. Se o arquivo não for um .pbit, verifique o caminho do pbi-tools.")
         else:
-            model_file = localizar_model_bim(pasta_extraida)
-            nomes_usados_em_visuais = encontrar_dax_usadas_em_visuais(pasta_extraida)
+            indice = obter_indice_modelo(conteudo["hash"], conteudo["model"])
+            nomes_usados_em_visuais = conteudo["visuais"]
             
-            if not model_file:
+            if not indice.tabelas:
                 st.error("❌ Arquivo de modelo (model.bim ou model.json) não encontrado.")
             else:
-                medidas = parse_measures(model_file)
+                medidas = indice.medidas
 
                 if not medidas:
                     st.warning("⚠️ Nenhuma medida DAX foi encontrada.")
@@ -110,19 +173,56 @@ if uploaded_file is not None:
                     for medida in medidas:
                         medida["complexidade"] = classificar_complexidade(medida.get("expressao", ""))
 
-                    resumo = defaultdict(list)
-                    for m in medidas:
-                        resumo[m['tabela']].append(m)
+                    resumo = indice.medidas_por_tabela
+                    grafo = obter_grafo_dependencias(conteudo["hash"], medidas)
+                    # Medidas dos visuais mais tudo de que elas dependem, em qualquer nível.
+                    medidas_em_uso = grafo.alcancaveis(nomes_usados_em_visuais.medidas_usadas())
 
                     if aba == "📊 Overview":
                         st.markdown("### 📊 Visão Geral do Modelo")
-                        df_resumo = pd.DataFrame([{ "Tabela": t, "Qtd. Medidas": len(meds) } for t, meds in resumo.items()])
+                        estatisticas = obter_estatisticas(conteudo["hash"], indice, medidas_em_uso)
+                        totais = estatisticas.totais
+
+                        c1, c2, c3, c4, c5 = st.columns(5)
+                        c1.metric("Tabelas", totais["tabelas"])
+                        c2.metric("Medidas", totais["medidas"])
+                        c3.metric("Colunas", totais["colunas"], help=f"{totais['colunas_calculadas']} calculadas")
+                        c4.metric("Colunas ocultas", f"{totais['taxa_colunas_ocultas']:.0%}")
+                        c5.metric("Medidas em uso", f"{totais['taxa_medidas_em_uso']:.0%}",
+                                  help="Usadas por algum visual, diretamente ou através de outra medida.")
+
+                        df_resumo = estatisticas.por_tabela.rename(columns={
+                            "tabela": "Tabela", "oculta": "Oculta", "medidas": "Qtd. Medidas",
+                            "comprimento_medio": "Tamanho médio (car.)", "taxa_em_uso": "% Medidas em uso",
+                            "colunas": "Qtd. Colunas", "taxa_ocultas": "% Colunas ocultas", "calculadas": "Calculadas",
+                        })
                         st.dataframe(df_resumo, use_container_width=True)
 
                         fig = px.bar(df_resumo, x="Tabela", y="Qtd. Medidas", color="Tabela",
                                      title="Distribuição de Medidas por Tabela", height=400)
                         st.plotly_chart(fig, use_container_width=True)
 
+                        col_esq, col_dir = st.columns(2)
+                        with col_esq:
+                            complexidade = estatisticas.histograma_complexidade
+                            st.plotly_chart(px.bar(x=complexidade.index.astype(str), y=complexidade.values,
+                                                   labels={"x": "Complexidade", "y": "Medidas"},
+                                                   title="Medidas por Complexidade", height=350),
+                                            use_container_width=True)
+                        with col_dir:
+                            comprimento = estatisticas.distribuicao_comprimento
+                            st.plotly_chart(px.bar(x=comprimento.index.astype(str), y=comprimento.values,
+                                                   labels={"x": "Caracteres", "y": "Medidas"},
+                                                   title="Tamanho das Expressões", height=350),
+                                            use_container_width=True)
+
+                        funcoes = estatisticas.frequencia_funcoes.head(20)
+                        if not funcoes.empty:
+                            st.plotly_chart(px.bar(x=funcoes.values, y=funcoes.index, orientation="h",
+                                                   labels={"x": "Chamadas", "y": "Função"},
+                                                   title="Funções DAX Mais Usadas", height=500),
+                                            use_container_width=True)
+
                     elif aba == "🧩 Mapa de Medidas":
                         st.markdown("### 🗺️ Mapa de Medidas por Tabela")
                         for tabela, lista in resumo.items():
@@ -136,11 +236,37 @@ if uploaded_file is not None:
                         filtro_nome = st.sidebar.text_input("Filtrar por nome da medida")
                         busca_texto = st.sidebar.text_input("Buscar trecho DAX (qualquer parte do código)")
 
+                        indice_busca = obter_indice_busca(conteudo["hash"], medidas)
+                        encontradas = indice_busca.buscar(nome=filtro_nome, trecho_dax=busca_texto, tabela=filtro_tabela)
+                        st.caption(f"{len(encontradas)} de {len(medidas)} medidas atendem aos filtros.")
+                        if len(encontradas) > LIMITE_RESULTADOS_PESQUISA:
+                            st.info(f"Mostrando as {LIMITE_RESULTADOS_PESQUISA} primeiras; refine os filtros para ver as demais.")
+                            encontradas = encontradas[:LIMITE_RESULTADOS_PESQUISA]
+
+                        # Agenda de uma vez tudo que falta no cache; os resultados são exibidos em ordem.
+                        pipeline = obter_pipeline()
+                        pendentes = {}
+                        for posicao in encontradas:
+                            medida = medidas[posicao]
+                            expressao = medida.get("expressao", "")
+                            if not isinstance(expressao, str):
+                                continue
+                            nome = medida.get("nome", "Sem nome")
+                            chave = gerar_hash_medida(nome, expressao)
+                            if chave not in cache_persistente and chave not in pendentes:
+                                pendentes[chave] = {"nome": nome, "expressao": expressao}
+                        # A primeira que falta é exibida token a token; as demais seguem pelo pool.
+                        em_tempo_real = next(iter(pendentes), None)
+                        pendentes.pop(em_tempo_real, None)
+                        pendentes = dict(zip(pendentes, pipeline.enviar_medidas(list(pendentes.values()))))
+
+                        houve_novas = bool(pendentes) or em_tempo_real is not None
                         resultados = []
                         barra_progresso = st.progress(0, text="🔄 Gerando explicações...")
 
-                        total = len(medidas)
-                        for i, medida in enumerate(medidas, start=1):
+                        total = len(encontradas)
+                        for i, posicao in enumerate(encontradas, start=1):
+                            medida = medidas[posicao]
                             nome = medida.get("nome", "Sem nome")
                             expressao = medida.get("expressao", "")
                             tabela = medida.get("tabela", "Desconhecida")
@@ -149,30 +275,34 @@ if uploaded_file is not None:
                                 st.warning(f"⚠️ Medida '{nome}' possui expressão malformada e foi ignorada.")
                                 continue
 
-                            hash_id = gerar_hash_medida(nome, expressao)
-
-                            with st.expander(f"📌 {nome} ({medida['tabela']})", expanded=False):
-                                st.code(expressao, language='dax')
-                                explicacao = explicar_com_cache(nome, expressao)
-                                medida["explicacao"] = explicacao
-                                st.markdown(f"🧠 **Explicação gerada:**\n\n{explicacao}")
-                                resultados.append(medida)
-
-                            barra_progresso.progress(i / total, text=f"🔄 Processando {i}/{total} medidas...")
-
-                            hash_id = gerar_hash_medida(nome, expressao)
-
-                            with st.expander(f"📌 {nome} ({tabela})", expanded=False):
+                            chave = gerar_hash_medida(nome, expressao)
+                            with st.expander(f"📌 {nome} ({tabela})", expanded=chave == em_tempo_real):
                                 st.code(expressao, language='dax')
                                 inicio = time.time()
-                                explicacao = explicar_com_cache(nome, expressao)
+                                transmitida = chave == em_tempo_real and chave not in cache_persistente
+                                if transmitida:
+                                    st.markdown("🧠 **Explicação gerada:**")
+                                    cache_persistente[chave] = st.write_stream(explicar_medida_dax_stream(nome, expressao)).strip()
+                                elif chave in pendentes:
+                                    try:
+                                        cache_persistente[chave] = pendentes.pop(chave).result()
+                                    except Exception as e:
+                                        st.error(f"Erro ao gerar explicação: {e}")
+                                        cache_persistente[chave] = "Erro ao gerar explicação."
+                                explicacao = cache_persistente[chave]
                                 fim = time.time()
 
                                 medida["explicacao"] = explicacao
-                                st.markdown(f"<div class='result-box'>🧠 <strong>Explicação gerada:</strong><br><br>{explicacao}</div>", unsafe_allow_html=True)
+                                if not transmitida:
+                                    st.markdown(f"<div class='result-box'>🧠 <strong>Explicação gerada:</strong><br><br>{explicacao}</div>", unsafe_allow_html=True)
                                 st.markdown(f"<div class='metric-line'>🕒 Tempo: {fim - inicio:.2f}s | 🔍 Complexidade: {medida['complexidade']}</div>", unsafe_allow_html=True)
                                 resultados.append(medida)
 
+                            barra_progresso.progress(i / total, text=f"🔄 Processando {i}/{total} medidas...")
+
+                        if houve_novas:
+                            salvar_cache(CACHE_PATH, cache_persistente)
+
                         if resultados:
                             st.markdown("---")
                             st.markdown("### 📀 Baixar resultado em Excel")
@@ -188,23 +318,38 @@ if uploaded_file is not None:
                     elif aba == "🛠️ Auditoria":
                         st.markdown("### 🛠️ Modo Auditoria")
 
-                        nomes_duplicados = [item for item, count in Counter(m["expressao"] for m in medidas).items() if count > 1]
-                        medidas_duplicadas = [m for m in medidas if m["expressao"] in nomes_duplicados]
+                        grupos_duplicadas = obter_grupos_duplicadas(conteudo["hash"], medidas)
                         medidas_genericas = [m for m in medidas if m["nome"].lower().startswith("measure") or "sem nome" in m["nome"].lower()]
 
                         st.subheader("🔁 Medidas Duplicadas")
-                        for m in medidas_duplicadas:
-                            st.markdown(f"- **{m['nome']}** na tabela *{m['tabela']}*")
+                        st.caption("Ignora espaços, comentários, maiúsculas e nomes de variáveis; grupos \"similares\" diferem em poucos trechos.")
+                        for grupo in grupos_duplicadas:
+                            if grupo["tipo"] == "identica":
+                                st.markdown(f"**Idênticas** ({len(grupo['medidas'])} medidas)")
+                            else:
+                                st.markdown(f"**Similares** (≥ {grupo['similaridade']:.0%}, {len(grupo['medidas'])} medidas)")
+                            for m in grupo["medidas"]:
+                                st.markdown(f"- **{m['nome']}** na tabela *{m['tabela']}*")
 
                         st.subheader("⚠️ Medidas com Nome Genérico")
                         for m in medidas_genericas:
                             st.markdown(f"- **{m['nome']}** na tabela *{m['tabela']}*")
                         
+                        st.subheader("🔄 Dependências Circulares")
+                        ciclos = grafo.ciclos()
+                        if ciclos:
+                            for ciclo in ciclos:
+                                st.markdown(f"- {' → '.join(f'**{nome}**' for nome in ciclo)}")
+                        else:
+                            st.success("✅ Nenhuma dependência circular entre medidas.")
+
                         st.subheader("🧹 Medidas Ociosas (não utilizadas em visuais)")
+                        st.caption("Uma medida só é ociosa se nenhum visual a usa, nem diretamente nem através de outra medida.")
+
 
                         medidas_ociosas = [
                             m for m in medidas
-                            if m["nome"].lower() not in nomes_usados_em_visuais
+                            if m["nome"].lower() not in medidas_em_uso
                         ]
 
                         if medidas_ociosas:
@@ -234,22 +379,35 @@ if uploaded_file is not None:
                         else:
                             st.success("✅ Nenhuma medida ociosa detectada com base nos visuais.")
 
+                        st.subheader("🧱 Colunas Não Utilizadas")
+                        st.caption("Colunas que nenhuma medida, relacionamento, visual, coluna calculada, ordenação ou hierarquia usa.")
+                        uso_colunas = obter_uso_colunas(conteudo["hash"], indice, nomes_usados_em_visuais)
+                        uso_colunas = uso_colunas[~uso_colunas["tabela"].str.startswith(tuple(IGNORAR_TABELAS_PREFIXOS))]
+                        colunas_ociosas = colunas_nao_utilizadas(uso_colunas)
+
+                        if colunas_ociosas:
+                            st.dataframe(pd.DataFrame([
+                                {"Tabela": tabela, "Não utilizadas": len(info["nao_utilizadas"]),
+                                 "Ocultas e não utilizadas": len(info["ocultas_nao_utilizadas"])}
+                                for tabela, info in colunas_ociosas.items()
+                            ]), use_container_width=True)
+                            for tabela, info in colunas_ociosas.items():
+                                with st.expander(f"🗂️ {tabela} — {len(info['nao_utilizadas'])} coluna(s)"):
+                                    st.markdown(f"**Não utilizadas:** {', '.join(info['nao_utilizadas'])}")
+                                    if info["ocultas_nao_utilizadas"]:
+                                        st.markdown(f"**Ocultas e não utilizadas (remoção mais segura):** {', '.join(info['ocultas_nao_utilizadas'])}")
+                        else:
+                            st.success("✅ Todas as colunas são usadas em algum lugar.")
+
 
                     elif aba == "📂 Tabelas":
                         st.markdown("### 📂 Tabelas do Modelo")
 
-                        try:
-                            with open(model_file, "r", encoding="utf-8") as f:
-                                model_data = json.load(f)
-                            tables = [t for t in model_data.get("model", {}).get("tables", [])
-                                        if not any(t.get("name", "").startswith(prefixo) for prefixo in IGNORAR_TABELAS_PREFIXOS)]
-                        except Exception as e:
-                            st.error(f"❌ Erro ao carregar colunas do modelo: {e}")
-                            tables = []
+                        tables = indice.tabelas_visiveis(IGNORAR_TABELAS_PREFIXOS)
 
                         for tabela in tables:
                             nome = tabela.get("name", "Desconhecida")
-                            colunas = [c.get("name") for c in tabela.get("columns", [])]
+                            colunas = indice.nomes_colunas(nome)
 
                             with st.expander(f"🗂️ {nome} ({len(colunas)} colunas)"):
                                 st.markdown(f"**Colunas:** {', '.join(colunas)}")
@@ -26,7 +26,6 @@ try:
         localizar_model_bim,
         parse_measures, # Assumindo que parse_measures só pega medidas
         encontrar_dax_usadas_em_visuais,
-        localizar_database_modelo,
         carregar_tabelas_modelo
     )
 
@@ -142,7 +141,6 @@ if uploaded_file is not None and 'medidas' not in st.session_state:
 
         model_file = localizar_model_bim(pasta_extraida)
         if not model_file:
-            model_file = localizar_database_modelo(pasta_extraida)
             st.error("❌ Arquivo de modelo (model.bim ou DataModelSchema) não encontrado na pasta extraída.")
             st.stop()
 
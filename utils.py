@@ -3,6 +3,8 @@ import os
 import json
 import datetime
 
+from dax_analyzer.complexity import classificar_por_metricas, metricas_complexidade
+
 def gerar_hash_medida(nome, expressao):
     nome = str(nome).strip()
     if isinstance(expressao, list):
@@ -12,13 +14,7 @@ def gerar_hash_medida(nome, expressao):
     return hashlib.md5(texto.encode("utf-8")).hexdigest()
 
 def classificar_complexidade(expressao):
-    expressao = expressao.lower()
-    if any(x in expressao for x in ["var", "switch", "if("]):
-        return "Avançada"
-    elif any(x in expressao for x in ["calculate", "filter", "all", "related", "distinct"]):
-        return "Intermediária"
-    else:
-        return "Simples"
+    return classificar_por_metricas(metricas_complexidade(str(expressao)))
 
 def carregar_cache(caminho_arquivo):
     if not os.path.exists(caminho_arquivo):
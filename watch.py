@@ -0,0 +1,235 @@
+import datetime
+import json
+import os
+import time
+
+from dax_analyzer.dependencies import GrafoDependencias
+from dax_analyzer.explain import explicar_medida_dax
+from dax_analyzer.lexer import COMENTARIO, tokenizar
+from dax_analyzer.pipeline import PipelineExplicacoes
+from pbix_tools.streaming import carregar_modelo_enxuto
+from pbix_tools.tmdl import localizar_modelo_semantico, parsear_arquivo_tmdl
+from utils import gerar_hash_medida
+
+INTERVALO_PADRAO = 1.0
+ARQUIVO_DELTAS = os.path.join("outputs", "watch_deltas.jsonl")
+
+
+def normalizar_expressao(expressao: str) -> str:
+    """
+    Forma da expressão usada no hash de mudança: os tokens do lexer, sem espaços
+    nem comentários, separados por ``\x1f``. Reformatar ou editar comentários não
+    dispara nova explicação; comentar ou descomentar código, sim.
+    """
+    return "\x1f".join(t.valor for t in tokenizar(str(expressao)) if t.tipo != COMENTARIO)
+
+
+def _parsear_arquivo(caminho: str) -> dict:
+    if caminho.endswith(".tmdl"):
+        return parsear_arquivo_tmdl(caminho)
+    return carregar_modelo_enxuto(caminho, incluir_particoes=False)["model"]
+
+
+class ObservadorProjeto:
+    """
+    Acompanha um projeto PBIP e reanalisa apenas o que mudou.
+
+    Cada verificação compara ``mtime``/tamanho dos arquivos do modelo, reparseia só
+    os arquivos alterados e explica de novo apenas as medidas cuja expressão
+    normalizada mudou (comparada por ``gerar_hash_medida``).
+
+    Com um ``pipeline``, as medidas de cada verificação (na carga inicial, todas)
+    são explicadas em paralelo e em ordem de dependência; sem ele, uma a uma
+    com ``explicar``. ``observar`` cria um pipeline se nenhum for informado.
+    """
+
+    def __init__(self, caminho_projeto: str, explicar=explicar_medida_dax, arquivo_deltas=ARQUIVO_DELTAS,
+                 pipeline: PipelineExplicacoes | None = None):
+        pasta_modelo = localizar_modelo_semantico(caminho_projeto)
+        if not pasta_modelo:
+            raise FileNotFoundError(f"Pasta .SemanticModel não encontrada em {caminho_projeto}")
+        self.pasta_modelo = pasta_modelo
+        self.explicar = explicar
+        self.arquivo_deltas = arquivo_deltas
+        self.pipeline = pipeline
+
+        self.assinaturas = {}          # caminho -> (mtime_ns, tamanho)
+        self.medidas_por_arquivo = {}  # caminho -> {(tabela, nome): medida}
+        self.colunas_por_arquivo = {}  # caminho -> {tabela: [colunas]}
+        self.explicacoes = {}          # hash da medida -> explicação
+        self.grafo = GrafoDependencias()
+
+    def _listar_arquivos(self) -> dict:
+        pasta_definicao = os.path.join(self.pasta_modelo, "definition")
+        if not os.path.isdir(pasta_definicao):
+            model_bim = os.path.join(self.pasta_modelo, "model.bim")
+            pastas, filtro = [self.pasta_modelo], (lambda nome: nome == "model.bim")
+            if not os.path.isfile(model_bim):
+                return {}
+        else:
+            pastas = [pasta_definicao, os.path.join(pasta_definicao, "tables")]
+            filtro = lambda nome: nome.endswith(".tmdl")
+
+        assinaturas = {}
+        for pasta in pastas:
+            try:
+                with os.scandir(pasta) as entradas:
+                    for entrada in entradas:
+                        if entrada.is_file() and filtro(entrada.name):
+                            info = entrada.stat()
+                            assinaturas[entrada.path] = (info.st_mtime_ns, info.st_size)
+            except OSError:
+                continue
+        return assinaturas
+
+    def _explicacoes_das_dependencias(self, medidas: list) -> dict:
+        """``{nome: explicação}`` já geradas das medidas que ``medidas`` usam, pelo hash atual de cada uma."""
+        hashes = {
+            m["nome"].lower(): m["hash"] for por_chave in self.medidas_por_arquivo.values() for m in por_chave.values()
+        }
+        existentes = {}
+        for medida in medidas:
+            for dependencia in self.grafo.dependencias(medida["nome"]):
+                explicacao = self.explicacoes.get(hashes.get(dependencia.lower()))
+                if explicacao:
+                    existentes[dependencia] = explicacao
+        return existentes
+
+    def _explicar(self, medidas: list):
+        """Preenche ``explicacao`` das medidas, gerando só as que ainda não estão em ``self.explicacoes``."""
+        pendentes = list({m["hash"]: m for m in medidas if m["hash"] not in self.explicacoes}.values())
+        if self.pipeline and pendentes:
+            # O grafo já está atualizado: as dependências são explicadas antes de quem as usa, e
+            # as que não mudaram entram no prompt com a explicação que já tinham.
+            explicacoes = self.pipeline.explicar_medidas_por_dependencia(
+                pendentes, self.grafo, explicacoes_existentes=self._explicacoes_das_dependencias(pendentes)
+            )
+        else:
+            explicacoes = [self.explicar(m["nome"], m["expressao"]) for m in pendentes]
+        self.explicacoes.update(zip((m["hash"] for m in pendentes), explicacoes))
+        for medida in medidas:
+            medida["explicacao"] = self.explicacoes[medida["hash"]]
+
+    def verificar(self) -> dict | None:
+        """Executa uma verificação e retorna o relatório de delta, ou ``None`` se nada mudou."""
+        atuais = self._listar_arquivos()
+        alterados = [c for c, a in atuais.items() if self.assinaturas.get(c) != a]
+        removidos = [c for c in self.assinaturas if c not in atuais]
+        if not alterados and not removidos:
+            return None
+
+        antigas, novas = {}, {}
+        tabelas_alteradas = set()
+
+        for caminho in removidos:
+            antigas.update(self.medidas_por_arquivo.pop(caminho, {}))
+            tabelas_alteradas.update(self.colunas_por_arquivo.pop(caminho, {}))
+            del self.assinaturas[caminho]
+
+        for caminho in alterados:
+            try:
+                conteudo = _parsear_arquivo(caminho)
+            except Exception as e:
+                # Arquivo possivelmente em gravação; tenta de novo na próxima verificação.
+                print(f"⚠️ Erro ao ler {caminho}: {e}")
+                continue
+
+            medidas = {}
+            colunas = {}
+            for tabela in conteudo["tables"]:
+                nome_tabela = tabela.get("name", "Desconhecida")
+                colunas[nome_tabela] = [c.get("name") for c in tabela.get("columns", [])]
+                for m in tabela.get("measures", []):
+                    expressao = m.get("expression", "")
+                    expressao = "\n".join(expressao) if isinstance(expressao, list) else str(expressao)
+                    nome = m.get("name", "Sem nome")
+                    medidas[(nome_tabela, nome)] = {
+                        "tabela": nome_tabela,
+                        "nome": nome,
+                        "expressao": expressao,
+                        "hash": gerar_hash_medida(nome, normalizar_expressao(expressao)),
+                    }
+
+            colunas_antigas = self.colunas_por_arquivo.get(caminho, {})
+            tabelas_alteradas.update(t for t in set(colunas) | set(colunas_antigas)
+                                     if colunas.get(t) != colunas_antigas.get(t))
+
+            antigas.update(self.medidas_por_arquivo.get(caminho, {}))
+            novas.update(medidas)
+            self.medidas_por_arquivo[caminho] = medidas
+            self.colunas_por_arquivo[caminho] = colunas
+            self.assinaturas[caminho] = atuais[caminho]
+
+        adicionadas, alteradas = [], []
+        for chave, medida in novas.items():
+            anterior = antigas.get(chave)
+            if anterior and anterior["hash"] == medida["hash"]:
+                medida["explicacao"] = anterior.get("explicacao")
+                continue
+            (alteradas if anterior else adicionadas).append(medida)
+        removidas = [m for chave, m in antigas.items() if chave not in novas]
+
+        # Quem usa (direta ou indiretamente) uma medida nova, alterada ou removida também muda de
+        # resultado. Os dependentes das removidas só existem no grafo antes da remoção; os das
+        # novas e alteradas, depois da atualização (referências pendentes passam a ser ligadas).
+        impactadas = {d for m in removidas for d in self.grafo.dependentes(m["nome"], transitivas=True)}
+        for m in removidas:
+            self.grafo.remover_medida(m["nome"])
+        for m in adicionadas + alteradas:
+            self.grafo.definir_medida(m["nome"], m["expressao"], m["tabela"])
+        for m in adicionadas + alteradas:
+            impactadas.update(self.grafo.dependentes(m["nome"], transitivas=True))
+        mudaram = {m["nome"] for m in adicionadas + alteradas + removidas}
+
+        self._explicar(adicionadas + alteradas)
+
+        return {
+            "momento": datetime.datetime.now().isoformat(timespec="seconds"),
+            "arquivos_alterados": sorted(alterados + removidos),
+            "tabelas_alteradas": sorted(tabelas_alteradas),
+            "medidas_adicionadas": adicionadas,
+            "medidas_alteradas": alteradas,
+            "medidas_removidas": [{"tabela": m["tabela"], "nome": m["nome"]} for m in removidas],
+            "medidas_impactadas": sorted(impactadas - mudaram, key=str.lower),
+        }
+
+    def _emitir(self, delta: dict):
+        print(f"🔄 {delta['momento']} — {len(delta['arquivos_alterados'])} arquivo(s) alterado(s)")
+        for m in delta["medidas_adicionadas"]:
+            print(f"   ➕ {m['nome']} ({m['tabela']}): {m['explicacao']}")
+        for m in delta["medidas_alteradas"]:
+            print(f"   ✏️ {m['nome']} ({m['tabela']}): {m['explicacao']}")
+        for m in delta["medidas_removidas"]:
+            print(f"   ➖ {m['nome']} ({m['tabela']})")
+        if delta["medidas_impactadas"]:
+            print(f"   🔗 Dependem das alterações: {', '.join(delta['medidas_impactadas'])}")
+        for t in delta["tabelas_alteradas"]:
+            print(f"   🗂️ Colunas alteradas em {t}")
+
+        if self.arquivo_deltas:
+            os.makedirs(os.path.dirname(self.arquivo_deltas) or ".", exist_ok=True)
+            with open(self.arquivo_deltas, "a", encoding="utf-8") as f:
+                f.write(json.dumps(delta, ensure_ascii=False) + "\n")
+
+    def observar(self, intervalo: float = INTERVALO_PADRAO):
+        """Faz a carga inicial e passa a verificar o projeto a cada ``intervalo`` segundos."""
+        print(f"👀 Observando {self.pasta_modelo} (Ctrl+C para sair)")
+        pipeline_proprio = None
+        if self.pipeline is None:
+            self.pipeline = pipeline_proprio = PipelineExplicacoes()
+        try:
+            delta = self.verificar()
+            if delta:
+                total = sum(len(m) for m in self.medidas_por_arquivo.values())
+                print(f"✅ Carga inicial: {total} medidas explicadas.")
+            while True:
+                time.sleep(intervalo)
+                delta = self.verificar()
+                if delta:
+                    self._emitir(delta)
+        except KeyboardInterrupt:
+            print("👋 Observação encerrada.")
+        finally:
+            if pipeline_proprio:
+                pipeline_proprio.encerrar(esperar=False)
+                self.pipeline = None